@@ -277,6 +277,14 @@ class NotificationCoordinatorAdmin(admin.ModelAdmin):
     raw_id_fields = ('coordinator',)
 
 
+@admin.register(ArchivedNotification)
+class ArchivedNotificationAdmin(admin.ModelAdmin):
+    list_display = ('recipient', 'source', 'title', 'notification_type', 'created_at', 'archived_at')
+    list_filter = ('source', 'notification_type', 'archived_at')
+    search_fields = ('recipient__email', 'title', 'message')
+    raw_id_fields = ('recipient', 'sender')
+
+
 @admin.register(FeedbackAlumni)
 class FeedbackAlumniAdmin(admin.ModelAdmin):
     list_display = ('alumni', 'feedback_type', 'subject', 'rating', 'is_resolved', 'created_at')
@@ -4,7 +4,7 @@ from django.contrib.auth.decorators import login_required
 from django.http import HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render, reverse
 from django.views.decorators.csrf import csrf_exempt
-from django.db.models import Q, Count, Sum, Prefetch
+from django.db.models import Q, Count, Prefetch
 from django.core.paginator import Paginator
 from django.utils import timezone
 from django.conf import settings
@@ -12,7 +12,12 @@ from datetime import datetime, timedelta
 
 from .models import *
 from .forms import *
-from .excel_utils import export_alumni_to_excel, export_alumni_by_graduation_year, export_alumni_statistics
+from . import rollups
+from .conversations import inbox, mark_read
+from .dashboard import dashboard_stats
+from .exports import submit_export
+from .receipts import record_read
+from .recipients import recipient_search_response
 
 
 
@@ -81,27 +86,30 @@ def verify_alumni(request, alumni_id):
     return render(request, 'admin_template/verify_alumni.html', context)
 
 
+def _admin_stats(snapshot):
+    return {
+        'total_alumni': snapshot['alumni_verified'],
+        'pending_verifications': snapshot['alumni_pending'],
+        'total_coordinators': snapshot['coordinators'],
+        'active_events': snapshot['events_upcoming'],
+        'total_jobs': snapshot['jobs_active'],
+        'total_companies': snapshot['companies_verified'],
+        'total_donations': snapshot['donations_completed_total'],
+        'active_mentorships': snapshot['mentorships_active'],
+        'published_news': snapshot['news_published'],
+        'unresolved_feedback': snapshot['feedback_unresolved'],
+    }
+
+
 @login_required
 def admin_home(request):
     """System Administrator dashboard"""
     if request.user.user_type != '1':
         return redirect('login_page')
     
-    # Get comprehensive statistics
-    stats = {
-        'total_alumni': Alumni.objects.filter(admin__is_verified=True).count(),
-        'pending_verifications': Alumni.objects.filter(admin__is_verified=False).count(),
-        'total_coordinators': AlumniCoordinator.objects.count(),
-        'active_events': Event.objects.filter(status='upcoming').count(),
-        'total_jobs': JobPosting.objects.filter(is_active=True).count(),
-        'total_companies': Company.objects.filter(is_verified=True).count(),
-        'total_donations': Donation.objects.filter(payment_status='completed').aggregate(
-            total=Sum('amount')
-        )['total'] or 0,
-        'active_mentorships': MentorshipProgram.objects.filter(status='active').count(),
-        'published_news': News.objects.filter(is_published=True).count(),
-        'unresolved_feedback': FeedbackAlumni.objects.filter(is_resolved=False).count(),
-    }
+    # Get comprehensive statistics from the cached snapshot
+    snapshot = dashboard_stats()
+    stats = _admin_stats(snapshot)
     
     # Get recent activities
     recent_alumni = Alumni.objects.filter(
@@ -115,23 +123,11 @@ def admin_home(request):
     ).order_by('-created_at')[:5]
     
     # Get system metrics
-    today = timezone.now().date()
-    last_30_days = today - timedelta(days=30)
-    
     metrics = {
-        'new_alumni_30_days': Alumni.objects.filter(
-            admin__date_joined__gte=last_30_days
-        ).count(),
-        'new_jobs_30_days': JobPosting.objects.filter(
-            created_at__gte=last_30_days
-        ).count(),
-        'donations_30_days': Donation.objects.filter(
-            created_at__gte=last_30_days,
-            payment_status='completed'
-        ).aggregate(total=Sum('amount'))['total'] or 0,
-        'events_30_days': Event.objects.filter(
-            created_at__gte=last_30_days
-        ).count(),
+        'new_alumni_30_days': snapshot['alumni_new_30_days'],
+        'new_jobs_30_days': snapshot['jobs_new_30_days'],
+        'donations_30_days': snapshot['donations_30_days'],
+        'events_30_days': snapshot['events_new_30_days'],
     }
     
     context = {
@@ -662,16 +658,22 @@ def delete_company(request, company_id):
     return render(request, 'admin_template/delete_company.html', context)
 
 
+ANALYTICS_MONTHS = 12
+ANALYTICS_WEEKS = 12
+
+
 @login_required
 def system_analytics(request):
     """System analytics and reports"""
     if request.user.user_type != '1':
         return redirect('login_page')
     
+    snapshot = dashboard_stats()
+    
     # Alumni statistics
     alumni_stats = {
-        'total': Alumni.objects.count(),
-        'verified': Alumni.objects.filter(admin__is_verified=True).count(),
+        'total': snapshot['alumni_verified'] + snapshot['alumni_pending'],
+        'verified': snapshot['alumni_verified'],
         'by_graduation_year': Alumni.objects.values(
             'graduation_year__year'
         ).annotate(count=Count('id')).order_by('-graduation_year__year')[:10],
@@ -684,48 +686,42 @@ def system_analytics(request):
     }
     
     # Job statistics
+    job_types = rollups.totals_by_type('jobs', 'job_type')
     job_stats = {
-        'total': JobPosting.objects.count(),
-        'active': JobPosting.objects.filter(is_active=True).count(),
-        'by_type': JobPosting.objects.values(
-            'job_type'
-        ).annotate(count=Count('id')),
-        'applications': JobApplication.objects.count(),
+        'total': sum(row['count'] for row in job_types),
+        'active': snapshot['jobs_active'],
+        'by_type': job_types,
+        'applications': rollups.totals('applications')['count'],
     }
     
     # Event statistics
+    event_types = rollups.totals_by_type('events', 'event_type')
+    registrations = {
+        row['event_type']: row['count']
+        for row in rollups.totals_by_type('registrations', 'event_type')
+    }
+    for row in event_types:
+        row['registrations'] = registrations.get(row['event_type'], 0)
     event_stats = {
-        'total': Event.objects.count(),
-        'upcoming': Event.objects.filter(status='upcoming').count(),
-        'registrations': EventRegistration.objects.count(),
-        'by_type': Event.objects.values(
-            'event_type'
-        ).annotate(count=Count('id')),
+        'total': sum(row['count'] for row in event_types),
+        'upcoming': snapshot['events_upcoming'],
+        'registrations': sum(registrations.values()),
+        'by_type': event_types,
     }
     
-    # Donation statistics - MySQL compatible version
-    from django.db.models.functions import ExtractMonth
-    
+    # Donation statistics, served from the daily rollups
+    donations = rollups.totals('donations')
     donation_stats = {
-        'total_amount': Donation.objects.filter(
-            payment_status='completed'
-        ).aggregate(total=Sum('amount'))['total'] or 0,
-        'total_count': Donation.objects.filter(payment_status='completed').count(),
-        'by_type': Donation.objects.filter(
-            payment_status='completed'
-        ).values('donation_type').annotate(
-            count=Count('id'),
-            total=Sum('amount')
-        ),
-        'monthly_trend': Donation.objects.filter(
-            payment_status='completed',
-            created_at__gte=timezone.now() - timezone.timedelta(days=365)
-        ).annotate(
-            month=ExtractMonth('created_at')
-        ).values('month').annotate(
-            count=Count('id'),
-            total=Sum('amount')
-        ).order_by('month'),
+        'total_amount': donations['total'],
+        'total_count': donations['count'],
+        'by_type': rollups.totals_by_type('donations', 'donation_type'),
+        'monthly_trend': rollups.series('donations', 'month', ANALYTICS_MONTHS),
+        'weekly_trend': rollups.series('donations', 'week', ANALYTICS_WEEKS),
+    }
+    
+    trends = {
+        'jobs': rollups.series('jobs', 'month', ANALYTICS_MONTHS),
+        'applications': rollups.series('applications', 'month', ANALYTICS_MONTHS),
     }
     
     context = {
@@ -733,6 +729,7 @@ def system_analytics(request):
         'job_stats': job_stats,
         'event_stats': event_stats,
         'donation_stats': donation_stats,
+        'trends': trends,
     }
     
     return render(request, 'admin_template/system_analytics.html', context)
@@ -838,24 +835,6 @@ def admin_fcmtoken(request):
     return JsonResponse({'status': 'error', 'message': 'Invalid request'})
 
 
-@csrf_exempt
-def get_system_stats(request):
-    """AJAX endpoint for dashboard statistics"""
-    if request.user.user_type != '1':
-        return JsonResponse({'status': 'error', 'message': 'Unauthorized'})
-    
-    stats = {
-        'total_alumni': Alumni.objects.filter(admin__is_verified=True).count(),
-        'active_jobs': JobPosting.objects.filter(is_active=True).count(),
-        'upcoming_events': Event.objects.filter(status='upcoming').count(),
-        'total_donations': float(Donation.objects.filter(
-            payment_status='completed'
-        ).aggregate(total=Sum('amount'))['total'] or 0),
-    }
-    
-    return JsonResponse(stats)
-
-
 @login_required
 def admin_messages_inbox(request):
     """Admin messages inbox - shows sent messages"""
@@ -869,14 +848,11 @@ def admin_messages_inbox(request):
         messages.error(request, 'Admin profile not found.')
         return redirect('login_page')
     
-    # Get messages sent by this admin
-    sent_messages = Message.objects.filter(
-        sender_type='admin',
-        sender_admin=admin_profile
-    ).select_related('recipient', 'recipient__admin').order_by('-created_at')
-    
+    # Threads started by this admin, most recently active first
+    conversations = inbox(request.user, 'sender')
+
     # Pagination
-    paginator = Paginator(sent_messages, 10)
+    paginator = Paginator(conversations, 10)
     page_number = request.GET.get('page')
     messages_page = paginator.get_page(page_number)
     
@@ -929,6 +905,15 @@ def admin_send_message(request, recipient_id=None):
     return render(request, 'admin_template/send_message.html', context)
 
 
+@login_required
+def admin_alumni_search(request):
+    """AJAX endpoint listing verified alumni for the recipient picker."""
+    if request.user.user_type != '1':
+        return JsonResponse({'error': 'Unauthorized'}, status=403)
+    
+    return JsonResponse(recipient_search_response(request.GET))
+
+
 @login_required
 def admin_view_message(request, message_id):
     """View a specific message"""
@@ -965,10 +950,8 @@ def admin_view_message(request, message_id):
     )
     
     # Mark as read if not already
-    if message.status != 'read':
-        message.status = 'read'
-        message.read_at = timezone.now()
-        message.save()
+    record_read(message)
+    mark_read(message.id, request.user)
 
     replies = list(message.replies.all())
     reply_form = MessageReplyForm()
@@ -1025,20 +1008,12 @@ def get_system_stats(request):
     if request.user.user_type != '1':
         return redirect('login_page')
     
-    stats = {
-        'total_alumni': Alumni.objects.filter(admin__is_verified=True).count(),
-        'pending_verifications': Alumni.objects.filter(admin__is_verified=False).count(),
-        'total_coordinators': AlumniCoordinator.objects.count(),
-        'active_events': Event.objects.filter(status='upcoming').count(),
-        'total_jobs': JobPosting.objects.filter(is_active=True).count(),
-        'total_companies': Company.objects.filter(is_verified=True).count(),
-        'total_donations': Donation.objects.filter(payment_status='completed').aggregate(
-            total=Sum('amount')
-        )['total'] or 0,
-        'active_mentorships': MentorshipProgram.objects.filter(status='active').count(),
-        'published_news': News.objects.filter(is_published=True).count(),
-        'unresolved_feedback': FeedbackAlumni.objects.filter(is_resolved=False).count(),
-    }
+    snapshot = dashboard_stats()
+    stats = _admin_stats(snapshot)
+    stats['total_donations'] = float(stats['total_donations'])
+    # Keys kept for older dashboard polling scripts
+    stats['active_jobs'] = stats['total_jobs']
+    stats['upcoming_events'] = stats['active_events']
     
     return JsonResponse(stats)
 
@@ -1117,81 +1092,39 @@ def delete_alumni(request, alumni_id):
 
 @login_required
 def export_alumni_excel(request, export_type='all'):
-    """Export alumni data to Excel format"""
+    """Queue an alumni Excel export"""
     if request.user.user_type != '1':  # Admin only
         return redirect('login_page')
     
-    try:
-        # Get all alumni with related data
-        alumni_queryset = Alumni.objects.select_related(
-            'admin', 'graduation_year', 'degree', 'current_company'
-        ).all()
-        
-        # Apply filters if provided
-        search_query = request.GET.get('search', '')
-        graduation_year = request.GET.get('graduation_year', '')
-        degree = request.GET.get('degree', '')
-        
-        if search_query:
-            alumni_queryset = alumni_queryset.filter(
-                Q(admin__first_name__icontains=search_query) |
-                Q(admin__last_name__icontains=search_query) |
-                Q(admin__email__icontains=search_query) |
-                Q(student_id__icontains=search_query)
-            )
-        
-        if graduation_year:
-            alumni_queryset = alumni_queryset.filter(graduation_year_id=graduation_year)
-        
-        if degree:
-            alumni_queryset = alumni_queryset.filter(degree_id=degree)
-        
-        # Export to Excel
-        response = export_alumni_to_excel(alumni_queryset, export_type)
-        
-        # Log the export action
-        messages.success(request, f'Successfully exported {alumni_queryset.count()} alumni records to Excel!')
-        
-        return response
-        
-    except Exception as e:
-        messages.error(request, f'Error exporting alumni data: {str(e)}')
-        return redirect('manage_alumni')
+    params = {
+        'export_type': export_type,
+        'search': request.GET.get('search', ''),
+        'graduation_year': request.GET.get('graduation_year', ''),
+        'degree': request.GET.get('degree', ''),
+    }
+    job = submit_export(request.user, 'alumni', params)
+    return redirect('export_job_detail', job_id=job.id)
 
 
 @login_required
 def export_alumni_by_year_excel(request, year_id):
-    """Export alumni by class level to Excel"""
+    """Queue an Excel export of one class"""
     if request.user.user_type != '1':  # Admin only
         return redirect('login_page')
     
-    try:
-        graduation_year = get_object_or_404(GraduationYear, id=year_id)
-        response = export_alumni_by_graduation_year(graduation_year)
-        
-        messages.success(request, f'Successfully exported Class of {graduation_year.year} alumni to Excel!')
-        return response
-        
-    except Exception as e:
-        messages.error(request, f'Error exporting alumni data: {str(e)}')
-        return redirect('manage_alumni')
+    graduation_year = get_object_or_404(GraduationYear, id=year_id)
+    job = submit_export(request.user, 'class', {'graduation_year': graduation_year.id})
+    return redirect('export_job_detail', job_id=job.id)
 
 
 @login_required
 def export_alumni_statistics_excel(request):
-    """Export alumni statistics to Excel"""
+    """Queue an Excel export of alumni statistics"""
     if request.user.user_type != '1':  # Admin only
         return redirect('login_page')
     
-    try:
-        response = export_alumni_statistics()
-        
-        messages.success(request, 'Successfully exported alumni statistics to Excel!')
-        return response
-        
-    except Exception as e:
-        messages.error(request, f'Error exporting statistics: {str(e)}')
-        return redirect('admin_home')
+    job = submit_export(request.user, 'statistics')
+    return redirect('export_job_detail', job_id=job.id)
 
 
 @login_required
@@ -0,0 +1,86 @@
+"""
+Grouped alumni breakdowns for the statistics export.
+
+Every breakdown is one grouped query, so the number of queries stays the
+same however many classes, degrees or countries there are. Breakdowns over a
+lookup table (classes, degrees, departments) start from that table, so empty
+entries are still listed, and alumni without one are reported as
+"Not specified".
+"""
+
+from django.db.models import Count, Q
+
+from .models import Alumni, Degree, Department, GraduationYear
+
+NOT_SPECIFIED = "Not specified"
+
+
+def overview():
+    """Totals and flag counts for every alumni, in one query."""
+    return Alumni.objects.aggregate(
+        total=Count('pk'),
+        active=Count('pk', filter=Q(admin__is_active=True)),
+        verified=Count('pk', filter=Q(admin__is_verified=True)),
+        mentors=Count('pk', filter=Q(is_mentor=True)),
+        job_seekers=Count('pk', filter=Q(is_job_seeker=True)),
+        hiring=Count('pk', filter=Q(willing_to_hire=True)),
+        open_to_contact=Count('pk', filter=Q(allow_contact=True)),
+        newsletter=Count('pk', filter=Q(newsletter_subscription=True)),
+    )
+
+
+def _with_unassigned(rows, total):
+    unassigned = total - sum(count for _, count in rows)
+    if unassigned > 0:
+        rows.append((NOT_SPECIFIED, unassigned))
+    return rows
+
+
+def by_graduation_year(total):
+    years = GraduationYear.objects.annotate(count=Count('alumni')).order_by('-year').values_list('year', 'count')
+    return _with_unassigned([(f"Class of {year}", count) for year, count in years], total)
+
+
+def by_degree(total):
+    degrees = Degree.objects.annotate(count=Count('alumni')).order_by('department__name', 'name').values_list(
+        'name', 'department__name', 'count'
+    )
+    return _with_unassigned([(f"{name} ({department})", count) for name, department, count in degrees], total)
+
+
+def by_department(total):
+    departments = Department.objects.annotate(count=Count('degree__alumni')).order_by('name').values_list(
+        'name', 'count'
+    )
+    return _with_unassigned(list(departments), total)
+
+
+def _by_choice(field, choices):
+    labels = dict(choices)
+    rows = Alumni.objects.order_by().values_list(field).annotate(count=Count('pk'))
+    return sorted(
+        ((labels.get(value, value or NOT_SPECIFIED), count) for value, count in rows),
+        key=lambda row: -row[1],
+    )
+
+
+def by_country():
+    rows = Alumni.objects.order_by().values_list('current_country').annotate(count=Count('pk')).order_by('-count')
+    return [(country or NOT_SPECIFIED, count) for country, count in rows]
+
+
+def alumni_breakdowns():
+    """
+    ``(overview, [(title, column, rows)])`` with each breakdown's rows as
+    ``(label, count)`` pairs. Issues seven queries in total.
+    """
+    totals = overview()
+    total = totals['total']
+    return totals, [
+        ("Graduation Years", "Class", by_graduation_year(total)),
+        ("Degrees", "Degree", by_degree(total)),
+        ("Departments", "Department", by_department(total)),
+        ("Employment", "Employment Status", _by_choice('employment_status', Alumni.EMPLOYMENT_STATUS)),
+        ("Privacy", "Privacy Level", _by_choice('privacy_level', Alumni.PRIVACY_LEVELS)),
+        ("Countries", "Country", by_country()),
+    ]
@@ -19,6 +19,16 @@ from django.template.loader import render_to_string
 from .models import *
 from .models import Follow, FriendRequest, Friendship, Notification, CustomUser
 from .forms import *
+from .badges import badge_context, invalidate_users
+from .conversations import inbox, mark_read
+from .dashboard import dashboard_stats
+from .facets import directory_facets
+from .notification_feed import feed_page, mark_feed_read, read_limit, read_position
+from .recipients import contactable_recipients, recipient_search_response
+from .receipts import deliver_pending, record_read
+from .pagination import KeysetPaginator, alumni_directory_keyset, cached_count, wants_cursor
+from .search import search_alumni
+from .skills import filter_by_skill, prefetch_skills
 
 
 def alumni_profile_required(view_func):
@@ -50,15 +60,14 @@ def alumni_home(request):
     """COSA DASHBOARD"""
     alumni = request.alumni
     
-    # Get dashboard statistics
+    # Get dashboard statistics; global counts come from the cached snapshot
+    snapshot = dashboard_stats()
+    listed_self = request.user.is_verified and alumni.privacy_level in ('public', 'limited')
     stats = {
-        'total_alumni': Alumni.objects.filter(admin__is_verified=True).count(),
-        'my_connections': Alumni.objects.filter(
-            privacy_level__in=['public', 'limited'],
-            admin__is_verified=True
-        ).exclude(id=alumni.id).count(),
-        'available_jobs': JobPosting.objects.filter(is_active=True).count(),
-        'upcoming_events': Event.objects.filter(status='upcoming').count(),
+        'total_alumni': snapshot['alumni_verified'],
+        'my_connections': snapshot['alumni_listed'] - int(listed_self),
+        'available_jobs': snapshot['jobs_active'],
+        'upcoming_events': snapshot['events_upcoming'],
         'my_applications': JobApplication.objects.filter(applicant=alumni).count(),
         'my_registrations': EventRegistration.objects.filter(alumni=alumni).count(),
     }
@@ -131,7 +140,7 @@ def alumni_directory(request):
     return render(request, 'alumni_template/alumni_directory.html', context)
 
 
-def _build_alumni_directory_context(request):
+def _build_alumni_directory_context(request, with_facets=False):
     """Helper to build context for alumni directory listings."""
     form = AlumniSearchForm(request.GET or None)
     alumni_list = Alumni.objects.filter(
@@ -151,17 +160,21 @@ def _build_alumni_directory_context(request):
     )
     
     # Apply search filters
+    searched = False
+    searched_list = alumni_list
     if form.is_valid():
         search = form.cleaned_data.get('search')
         if search:
-            alumni_list = alumni_list.filter(
-                Q(admin__first_name__icontains=search) |
-                Q(admin__last_name__icontains=search) |
-                Q(current_company__name__icontains=search) |
-                Q(skills__icontains=search) |
-                Q(industry__icontains=search)
+            alumni_list = search_alumni(alumni_list, search).order_by(
+                'search_rank', *Alumni._meta.ordering
             )
         
+        skill = form.cleaned_data.get('skill')
+        if skill:
+            alumni_list = filter_by_skill(alumni_list, skill)
+        searched = bool(search or skill)
+        searched_list = alumni_list
+        
         graduation_year = form.cleaned_data.get('graduation_year')
         if graduation_year:
             alumni_list = alumni_list.filter(graduation_year__year=graduation_year)
@@ -176,23 +189,42 @@ def _build_alumni_directory_context(request):
         if form.cleaned_data.get('willing_to_hire'):
             alumni_list = alumni_list.filter(willing_to_hire=True)
     
-    # Pagination
-    paginator = Paginator(alumni_list, settings.ALUMNI_PER_PAGE)
-    page_number = request.GET.get('page')
-    alumni = paginator.get_page(page_number)
+    # Pagination; cursors seek on the directory order, so ranked searches page by number
+    cursor_mode = wants_cursor(request) and not (form.is_valid() and form.cleaned_data.get('search'))
+    if cursor_mode:
+        keyed_list, keys = alumni_directory_keyset(prefetch_skills(alumni_list))
+        paginator = KeysetPaginator(keyed_list, keys, settings.ALUMNI_PER_PAGE)
+        alumni = paginator.get_page(request.GET.get('cursor'))
+        viewer_id = request.alumni.id if hasattr(request, 'alumni') else 0
+        total_count = cached_count(alumni_list, f'alumni-directory:{viewer_id}', request.GET)
+    else:
+        paginator = Paginator(prefetch_skills(alumni_list), settings.ALUMNI_PER_PAGE)
+        page_number = request.GET.get('page')
+        alumni = paginator.get_page(page_number)
+        total_count = paginator.count
     
-    return {
+    context = {
         'alumni': alumni,
         'form': form,
-        'total_count': alumni_list.count(),
+        'total_count': total_count,
+        'cursor_mode': cursor_mode,
     }
+    if with_facets:
+        selected = form.cleaned_data if form.is_valid() else {}
+        context['facets'] = directory_facets(
+            searched_list,
+            selected,
+            searched=searched,
+            exclude=getattr(request, 'alumni', None),
+        )
+    return context
 
 
 @login_required
 @alumni_profile_required
 def alumni_directory_data(request):
     """AJAX endpoint for alumni directory filters."""
-    context = _build_alumni_directory_context(request)
+    context = _build_alumni_directory_context(request, with_facets=True)
     html = render_to_string(
         'alumni_template/partials/alumni_directory_results.html',
         context,
@@ -201,9 +233,19 @@ def alumni_directory_data(request):
     
     alumni_page = context['alumni']
     
+    if context['cursor_mode']:
+        return JsonResponse({
+            'html': html,
+            'total_count': context['total_count'],
+            'facets': context['facets'],
+            'next_cursor': alumni_page.next_cursor,
+            'previous_cursor': alumni_page.previous_cursor,
+        })
+    
     return JsonResponse({
         'html': html,
         'total_count': context['total_count'],
+        'facets': context['facets'],
         'page_count': alumni_page.paginator.num_pages if alumni_page.paginator else 1,
         'page_number': alumni_page.number,
     })
@@ -380,25 +422,36 @@ def list_friends(request, user_id=None):
 
 @login_required
 def notifications_feed(request):
-    """Return unread and all notifications for the authenticated user."""
-    unread_only = request.GET.get('unread') == '1'
-    qs = Notification.objects.filter(recipient=request.user).select_related('sender')
-    if unread_only:
-        qs = qs.filter(is_read=False)
-    qs = qs.order_by('-created_at')[:100]
-    data = [{
-        'id': n.id,
-        'type': n.notification_type,
-        'message': n.message,
-        'sender': {
-            'id': n.sender.id,
-            'name': n.sender.get_full_name() or n.sender.email,
-            'email': n.sender.email,
-        },
-        'is_read': n.is_read,
-        'created_at': n.created_at.isoformat(),
-    } for n in qs]
-    return JsonResponse({'results': data})
+    """Return a page of the user's alumni and social notifications, newest first."""
+    page = feed_page(
+        request.user,
+        cursor=request.GET.get('cursor'),
+        limit=read_limit(request.GET),
+        unread_only=request.GET.get('unread') == '1',
+    )
+    return JsonResponse({
+        'results': page.object_list,
+        'next_cursor': page.next_cursor,
+        'unread': badge_context(request.user)['alumni_badges'].get('alerts', 0),
+    })
+
+
+@login_required
+def mark_notifications_read(request):
+    """Mark the feed items from the ``first`` to the ``last`` item cursor read."""
+    if request.method != 'POST':
+        return JsonResponse({'status': 'error', 'message': 'Invalid method'}, status=405)
+    first, last = request.POST.get('first'), request.POST.get('last')
+    if read_position(first) is None or read_position(last) is None:
+        return JsonResponse({'status': 'error', 'message': 'Invalid cursor'}, status=400)
+    marked = mark_feed_read(request.user, first, last)
+    if marked:
+        invalidate_users([request.user.pk])
+    return JsonResponse({
+        'status': 'success',
+        'marked': marked,
+        'unread': badge_context(request.user)['alumni_badges'].get('alerts', 0),
+    })
 
 
 @login_required
@@ -703,22 +756,13 @@ def messages_inbox(request):
     alumni = request.alumni
 
     # Mark freshly received messages as delivered once inbox is opened
-    Message.objects.filter(
-        recipient=alumni,
-        status='sent'
-    ).update(status='delivered')
-
-    # Get all messages sent to this alumni (from any sender type)
-    messages_list = Message.objects.filter(
-        recipient=alumni
-    ).select_related(
-        'sender_alumni', 'sender_alumni__admin',
-        'sender_admin', 'sender_admin__admin',
-        'sender_coordinator', 'sender_coordinator__admin'
-    ).order_by('-created_at')
-    
+    deliver_pending(request.user, alumni)
+
+    # Threads sent to this alumni, most recently active first
+    conversations = inbox(request.user, 'recipient')
+
     # Pagination
-    paginator = Paginator(messages_list, 20)
+    paginator = Paginator(conversations, 20)
     page_number = request.GET.get('page')
     message_list = paginator.get_page(page_number)
     
@@ -857,6 +901,15 @@ def send_message(request, recipient_id=None):
     return render(request, 'alumni_template/send_message.html', context)
 
 
+@login_required
+@alumni_profile_required
+def alumni_recipient_search(request):
+    """AJAX endpoint listing contactable alumni for the recipient picker, by name or COSA ID."""
+    return JsonResponse(recipient_search_response(
+        request.GET, scope='contactable-recipients', base=contactable_recipients(), match_email=False
+    ))
+
+
 @login_required
 @alumni_profile_required
 def view_message(request, message_id):
@@ -883,10 +936,8 @@ def view_message(request, message_id):
     )
     
     # Mark as read
-    if message.status != 'read':
-        message.status = 'read'
-        message.read_at = timezone.now()
-        message.save()
+    record_read(message)
+    mark_read(message.id, request.user)
 
     replies = list(message.replies.all())
     reply_form = MessageReplyForm()
@@ -954,6 +1005,7 @@ def notifications(request):
         is_read=True,
         read_at=timezone.now()
     )
+    invalidate_users([request.user.pk])
     
     # Pagination
     paginator = Paginator(notifications_list, 20)
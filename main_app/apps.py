@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class MainAppConfig(AppConfig):
     name = 'main_app'
+
+    def ready(self):
+        # Register signal handlers that keep derived tables in sync.
+        from . import badges, conversations, counters, dashboard, facets, rollups, search, skills  # noqa: F401
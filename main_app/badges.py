@@ -0,0 +1,237 @@
+"""
+Cached counts behind the header badges.
+
+``header_counts`` runs for every template rendered with a request, so its
+counts are cached: the moderation queues every admin and coordinator sees
+share one key, and each user's own unread counts live under a per-user key.
+Signal handlers drop the affected key when a row that feeds a badge is
+saved or deleted, so a normal page render issues no badge queries. Those
+drops only reach other worker processes through a shared cache (Redis, see
+``CACHE_URL``); with a process-local cache the counts are kept just
+``LOCAL_BADGE_CACHE_TIMEOUT`` seconds, so another worker's stale badge
+corrects itself quickly. Every
+drop is also published through ``main_app.live`` so open pages can refresh
+their badges, together with notifications as they are created.
+"""
+
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import live
+
+from .models import (
+    Alumni,
+    AlumniCoordinator,
+    Company,
+    CustomUser,
+    Donation,
+    Event,
+    EventRegistration,
+    FeedbackAlumni,
+    Message,
+    Notification,
+    NotificationAlumni,
+    NotificationCoordinator,
+)
+
+BADGE_CACHE_TIMEOUT = 60 * 5
+LOCAL_BADGE_CACHE_TIMEOUT = 15
+GLOBAL_CACHE_KEY = 'badges:global'
+
+
+def user_cache_key(user_id):
+    return f'badges:user:{user_id}'
+
+
+def badge_cache_timeout():
+    """How long counts stay cached; short when other workers cannot drop this process's copy."""
+    if isinstance(caches['default'], LocMemCache):
+        return LOCAL_BADGE_CACHE_TIMEOUT
+    return BADGE_CACHE_TIMEOUT
+
+
+def global_counts():
+    """Counts shared by every admin and coordinator."""
+    counts = cache.get(GLOBAL_CACHE_KEY)
+    if counts is None:
+        counts = {
+            'pending_alumni': Alumni.objects.filter(admin__is_verified=False).count(),
+            'unverified_companies': Company.objects.filter(is_verified=False).count(),
+            'open_feedback': FeedbackAlumni.objects.filter(is_resolved=False).count(),
+            'pending_donations': Donation.objects.filter(payment_status='pending').count(),
+        }
+        cache.set(GLOBAL_CACHE_KEY, counts, badge_cache_timeout())
+    return counts
+
+
+def _coordinator_counts(user):
+    coordinator = getattr(user, 'alumnicoordinator', None)
+    if coordinator is None:
+        return {'pending_registrations': 0, 'unread_notices': 0}
+    return {
+        'pending_registrations': EventRegistration.objects.filter(
+            status='pending', event__organizer=coordinator
+        ).count(),
+        'unread_notices': NotificationCoordinator.objects.filter(coordinator=coordinator, is_read=False).count(),
+    }
+
+
+def _alumni_counts(user):
+    alumni = getattr(user, 'alumni', None)
+    counts = {'unread_messages': 0, 'unread_notifications': 0}
+    if alumni is not None:
+        counts['unread_messages'] = Message.objects.filter(recipient=alumni, status='sent').count()
+        counts['unread_notifications'] = NotificationAlumni.objects.filter(alumni=alumni, is_read=False).count()
+    counts['social_unread'] = Notification.objects.filter(recipient=user, is_read=False).count()
+    return counts
+
+
+def user_counts(user):
+    """Counts that belong to one coordinator or alumnus."""
+    key = user_cache_key(user.pk)
+    counts = cache.get(key)
+    if counts is None:
+        if user.user_type == '2':
+            counts = _coordinator_counts(user)
+        elif user.user_type == '3':
+            counts = _alumni_counts(user)
+        else:
+            counts = {}
+        cache.set(key, counts, badge_cache_timeout())
+    return counts
+
+
+def badge_context(user):
+    """The ``*_badges`` dicts that the header templates read for ``user``."""
+    data = {
+        'admin_badges': {},
+        'coordinator_badges': {},
+        'alumni_badges': {},
+    }
+
+    if user is None or not user.is_authenticated:
+        return data
+
+    user_type = getattr(user, 'user_type', None)
+
+    if user_type == '1':  # Administrator
+        shared = global_counts()
+        data['admin_badges'] = {
+            'alumni': shared['pending_alumni'],
+            'companies': shared['unverified_companies'],
+            'feedback': shared['open_feedback'],
+        }
+    elif user_type == '2':  # Coordinator
+        shared = global_counts()
+        own = user_counts(user)
+        data['coordinator_badges'] = {
+            'alumni': shared['pending_alumni'],
+            'events': own['pending_registrations'],
+            'donations': shared['pending_donations'],
+            'messages': own['unread_notices'],
+            'feedback': shared['open_feedback'],
+        }
+    elif user_type == '3':  # Alumni
+        own = user_counts(user)
+        unread_messages = own['unread_messages']
+        # Social notifications count for any authenticated alumnus
+        alerts = own['unread_notifications'] + own['social_unread']
+
+        data['alumni_badges'] = {
+            'messages': unread_messages,
+            'alerts': alerts,
+            'notifications': alerts,
+            'feedback': 0,
+            'home': unread_messages + alerts,
+        }
+
+    return data
+
+
+BADGES_EVENT = {'type': 'badges'}
+
+
+def invalidate_global():
+    cache.delete(GLOBAL_CACHE_KEY)
+    live.publish(None, BADGES_EVENT)
+
+
+def invalidate_users(user_ids):
+    user_ids = [user_id for user_id in user_ids if user_id is not None]
+    if user_ids:
+        cache.delete_many([user_cache_key(user_id) for user_id in user_ids])
+        live.publish(user_ids, BADGES_EVENT)
+
+
+def notification_event(notification):
+    """Live event payload for a new ``Notification`` or ``NotificationAlumni``."""
+    return {
+        'type': 'notification',
+        'id': notification.pk,
+        'kind': notification.notification_type,
+        'title': getattr(notification, 'title', '') or notification.get_notification_type_display(),
+        'message': notification.message,
+        'url': getattr(notification, 'link_url', ''),
+    }
+
+
+@receiver([post_save, post_delete], sender=Alumni)
+@receiver([post_save, post_delete], sender=Company)
+@receiver([post_save, post_delete], sender=FeedbackAlumni)
+@receiver([post_save, post_delete], sender=Donation)
+def drop_global_badges(sender, **kwargs):
+    invalidate_global()
+
+
+@receiver(post_save, sender=CustomUser)
+def drop_badges_on_verification(sender, instance, update_fields=None, **kwargs):
+    # Logins only touch last_login, which no badge depends on.
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    invalidate_global()
+
+
+@receiver([post_save, post_delete], sender=EventRegistration)
+def drop_organizer_badges(sender, instance, **kwargs):
+    organizer = Event.objects.filter(pk=instance.event_id).values_list('organizer__admin_id', flat=True).first()
+    invalidate_users([organizer])
+
+
+def _read_row_deleted(instance, signal):
+    # Badges count unread notifications only, so archiving read ones changes none.
+    return signal is post_delete and instance.is_read
+
+
+@receiver([post_save, post_delete], sender=NotificationCoordinator)
+def drop_coordinator_badges(sender, instance, signal=None, **kwargs):
+    if _read_row_deleted(instance, signal):
+        return
+    invalidate_users(
+        AlumniCoordinator.objects.filter(pk=instance.coordinator_id).values_list('admin_id', flat=True)
+    )
+
+
+@receiver([post_save, post_delete], sender=Message)
+def drop_recipient_badges(sender, instance, **kwargs):
+    invalidate_users(Alumni.objects.filter(pk=instance.recipient_id).values_list('admin_id', flat=True))
+
+
+@receiver([post_save, post_delete], sender=NotificationAlumni)
+def drop_alumni_badges(sender, instance, created=False, signal=None, **kwargs):
+    if _read_row_deleted(instance, signal):
+        return
+    user_ids = list(Alumni.objects.filter(pk=instance.alumni_id).values_list('admin_id', flat=True))
+    invalidate_users(user_ids)
+    if created:
+        live.publish(user_ids, notification_event(instance))
+
+
+@receiver([post_save, post_delete], sender=Notification)
+def drop_social_badges(sender, instance, created=False, signal=None, **kwargs):
+    if _read_row_deleted(instance, signal):
+        return
+    invalidate_users([instance.recipient_id])
+    if created:
+        live.publish([instance.recipient_id], notification_event(instance))
@@ -0,0 +1,167 @@
+"""
+Conversation read model behind the messaging inboxes.
+
+A thread is a ``Message`` plus its ``MessageReply`` rows. Each thread has one
+``Conversation`` row holding both participants' user ids, the time and a
+snippet of the latest entry, and how many entries each participant has not
+seen yet. Writing a message or reply updates that row with a single
+``UPDATE``, so an inbox is one indexed query on ``(participant,
+last_message_at)`` and a thread moves to the top whenever someone replies.
+"""
+
+from django.db.models import Case, F, PositiveIntegerField, Q, Value, When
+from django.db.models.signals import post_delete, post_save
+
+from .models import Conversation, Message, MessageReply
+
+SENDER_PROFILES = {
+    'alumni': 'sender_alumni',
+    'admin': 'sender_admin',
+    'coordinator': 'sender_coordinator',
+}
+
+
+def snippet(content):
+    text = ' '.join((content or '').split())
+    limit = Conversation.SNIPPET_LENGTH
+    return text if len(text) <= limit else text[:limit - 1] + '…'
+
+
+def _sender_user_id(entry):
+    """User id behind a message or reply's sender profile."""
+    profile = getattr(entry, SENDER_PROFILES.get(entry.sender_type, ''), None)
+    return profile.admin_id if profile is not None else None
+
+
+def open_conversation(message):
+    """Create the conversation row for a newly sent message."""
+    return Conversation.objects.create(
+        message=message,
+        sender_id=_sender_user_id(message),
+        recipient_id=message.recipient.admin_id,
+        sender_type=message.sender_type,
+        subject=message.subject,
+        last_message_at=message.created_at,
+        last_snippet=snippet(message.content),
+        recipient_unread=0 if message.status == 'read' else 1,
+    )
+
+
+def record_reply(reply):
+    """Move the reply's thread to the top and count it as unread for the other participant."""
+    author_id = _sender_user_id(reply)
+    Conversation.objects.filter(pk=reply.message_id).update(
+        last_message_at=reply.created_at,
+        last_snippet=snippet(reply.content),
+        sender_unread=Case(
+            When(sender_id=author_id, then=F('sender_unread')),
+            default=F('sender_unread') + 1,
+            output_field=PositiveIntegerField(),
+        ),
+        recipient_unread=Case(
+            When(recipient_id=author_id, then=F('recipient_unread')),
+            default=F('recipient_unread') + 1,
+            output_field=PositiveIntegerField(),
+        ),
+    )
+
+
+def refresh_conversation(message_id):
+    """Recompute the latest entry of a thread, e.g. after a reply is deleted."""
+    latest = MessageReply.objects.filter(message_id=message_id).order_by('-created_at').values(
+        'created_at', 'content'
+    ).first() or Message.objects.filter(pk=message_id).values('created_at', 'content').first()
+    if latest is None:
+        return
+    Conversation.objects.filter(pk=message_id).update(
+        last_message_at=latest['created_at'], last_snippet=snippet(latest['content'])
+    )
+
+
+def mark_read(message_id, user):
+    """Clear ``user``'s unread count on a thread, matching no row when it is already zero."""
+    Conversation.objects.filter(
+        Q(sender=user, sender_unread__gt=0) | Q(recipient=user, recipient_unread__gt=0), pk=message_id
+    ).update(
+        sender_unread=Case(
+            When(sender=user, then=0), default=F('sender_unread'), output_field=PositiveIntegerField()
+        ),
+        recipient_unread=Case(
+            When(recipient=user, then=0), default=F('recipient_unread'), output_field=PositiveIntegerField()
+        ),
+    )
+
+
+def inbox(user, role):
+    """``user``'s conversations as ``role`` ('sender' or 'recipient'), latest activity first."""
+    counterpart = 'recipient' if role == 'sender' else 'sender'
+    return Conversation.objects.filter(**{role: user}).select_related(counterpart).order_by('-last_message_at')
+
+
+def rebuild_conversations(batch_size=1000):
+    """Recreate every conversation row from the messages and replies. Returns the number written."""
+    Conversation.objects.all().delete()
+    messages = Message.objects.order_by('pk').values(
+        'pk', 'sender_type', 'recipient__admin_id', 'subject', 'content', 'created_at', 'status',
+        *(f'{profile}__admin_id' for profile in SENDER_PROFILES.values()),
+    )
+    written = 0
+    for start in range(0, messages.count(), batch_size):
+        batch = list(messages[start:start + batch_size])
+        latest = {
+            reply['message_id']: reply
+            for reply in MessageReply.objects.filter(message_id__in=[row['pk'] for row in batch]).order_by(
+                'created_at'
+            ).values('message_id', 'created_at', 'content')
+        }
+        rows = []
+        for row in batch:
+            sender_id = row.get(f"{SENDER_PROFILES.get(row['sender_type'])}__admin_id")
+            if sender_id is None:
+                continue
+            last = latest.get(row['pk'], row)
+            rows.append(Conversation(
+                message_id=row['pk'],
+                sender_id=sender_id,
+                recipient_id=row['recipient__admin_id'],
+                sender_type=row['sender_type'],
+                subject=row['subject'],
+                last_message_at=last['created_at'],
+                last_snippet=snippet(last['content']),
+                recipient_unread=0 if row['status'] == 'read' else 1,
+            ))
+        Conversation.objects.bulk_create(rows)
+        written += len(rows)
+    return written
+
+
+def message_saved(sender, instance, created=False, **kwargs):
+    if created:
+        if _sender_user_id(instance) is not None:
+            open_conversation(instance)
+        return
+    update_fields = kwargs.get('update_fields')
+    if update_fields is not None and not {'subject', 'content'} & set(update_fields):
+        return
+    # An edit only changes the snippet while the message is still the latest entry.
+    Conversation.objects.filter(pk=instance.pk).update(
+        subject=instance.subject,
+        last_snippet=Case(
+            When(last_message_at=instance.created_at, then=Value(snippet(instance.content))),
+            default=F('last_snippet'),
+        ),
+    )
+
+
+def reply_saved(sender, instance, created=False, **kwargs):
+    if created:
+        record_reply(instance)
+
+
+def reply_deleted(sender, instance, **kwargs):
+    refresh_conversation(instance.message_id)
+
+
+post_save.connect(message_saved, sender=Message, dispatch_uid='conversations-message-save')
+post_save.connect(reply_saved, sender=MessageReply, dispatch_uid='conversations-reply-save')
+post_delete.connect(reply_deleted, sender=MessageReply, dispatch_uid='conversations-reply-delete')
@@ -14,7 +14,15 @@ from django.conf import settings
 
 from .models import *
 from .forms import *
-from .excel_utils import export_alumni_to_excel, export_alumni_by_graduation_year, export_alumni_statistics
+from .conversations import inbox, mark_read
+from .dashboard import dashboard_stats
+from .exports import submit_export
+from .fanout import submit_broadcast
+from .receipts import record_read
+from .recipients import (
+    DEFAULT_LIMIT as RECIPIENT_PAGE_SIZE, filter_recipients, read_filters, recipient_counts,
+    recipient_search_response, verified_recipients,
+)
 
 
 @login_required
@@ -25,16 +33,17 @@ def coordinator_home(request):
     
     coordinator = request.user.alumnicoordinator
     
-    # Get dashboard statistics
+    # Get dashboard statistics from the cached snapshot
+    snapshot = dashboard_stats()
     stats = {
-        'total_alumni': Alumni.objects.filter(admin__is_verified=True).count(),
-        'pending_verifications': Alumni.objects.filter(admin__is_verified=False).count(),
-        'active_events': Event.objects.filter(status='upcoming').count(),
-        'pending_registrations': EventRegistration.objects.filter(status='pending').count(),
-        'active_jobs': JobPosting.objects.filter(is_active=True).count(),
-        'total_donations': Donation.objects.filter(payment_status='completed').count(),
-        'active_mentorships': MentorshipProgram.objects.filter(status='active').count(),
-        'unread_feedback': FeedbackAlumni.objects.filter(is_resolved=False).count(),
+        'total_alumni': snapshot['alumni_verified'],
+        'pending_verifications': snapshot['alumni_pending'],
+        'active_events': snapshot['events_upcoming'],
+        'pending_registrations': snapshot['registrations_pending'],
+        'active_jobs': snapshot['jobs_active'],
+        'total_donations': snapshot['donations_completed_count'],
+        'active_mentorships': snapshot['mentorships_active'],
+        'unread_feedback': snapshot['feedback_unresolved'],
     }
     
     # Get recent activities
@@ -753,55 +762,55 @@ def send_notification(request):
         return redirect('login_page')
     
     if request.method == 'POST':
-        title = request.POST.get('title')
-        message = request.POST.get('message')
-        notification_type = request.POST.get('notification_type', 'system')
         target_audience = request.POST.get('target_audience', 'all')
+        # The form calls class programmes "level"
+        if target_audience == 'level':
+            target_audience = 'degree'
+        if target_audience not in dict(NotificationBroadcast.AUDIENCES):
+            messages.error(request, 'Please choose who should receive this notification.')
+            return redirect('send_notification')
         
-        # Determine recipients
-        if target_audience == 'all':
-            recipients = Alumni.objects.filter(admin__is_verified=True)
-        elif target_audience == 'graduation_year':
-            year_id = request.POST.get('graduation_year')
-            recipients = Alumni.objects.filter(
-                graduation_year_id=year_id,
-                admin__is_verified=True
-            )
-        elif target_audience == 'degree':
-            degree_id = request.POST.get('degree')
-            recipients = Alumni.objects.filter(
-                degree_id=degree_id,
-                admin__is_verified=True
-            )
-        else:
-            recipients = Alumni.objects.none()
-        
-        # Create notifications
-        notifications = []
-        for recipient in recipients:
-            notifications.append(
-                NotificationAlumni(
-                    alumni=recipient,
-                    title=title,
-                    message=message,
-                    notification_type=notification_type
-                )
-            )
-        
-        NotificationAlumni.objects.bulk_create(notifications)
+        # Recipients are written in the background; the broadcast reports progress
+        submit_broadcast(
+            request.user,
+            title=request.POST.get('title'),
+            message=request.POST.get('message'),
+            notification_type=request.POST.get('notification_type', 'system'),
+            audience=target_audience,
+            graduation_year=request.POST.get('graduation_year'),
+            degree=request.POST.get('degree') or request.POST.get('level'),
+        )
         
-        messages.success(request, f'Notification sent to {len(notifications)} Citizens Secondary School alumni!')
-        return redirect('coordinator_home')
+        messages.success(request, 'Notification queued for delivery to Citizens Secondary School alumni.')
+        return redirect('send_notification')
     
     context = {
         'graduation_years': GraduationYear.objects.filter(is_active=True),
         'degrees': Degree.objects.filter(is_active=True),
         'notification_types': NotificationAlumni.NOTIFICATION_TYPES,
+        'broadcasts': NotificationBroadcast.objects.filter(sender=request.user)[:5],
     }
     
     return render(request, 'coordinator_template/send_notification.html', context)
 
 
+@login_required
+def broadcast_status(request, broadcast_id):
+    """Progress of one of the coordinator's notification broadcasts"""
+    if request.user.user_type != '2':
+        return JsonResponse({'error': 'Unauthorized'}, status=403)
+    
+    broadcast = get_object_or_404(NotificationBroadcast, id=broadcast_id, sender=request.user)
+    return JsonResponse({
+        'id': broadcast.id,
+        'status': broadcast.status,
+        'processed': broadcast.processed,
+        'total': broadcast.total,
+        'percent': broadcast.percent,
+        'error': broadcast.error,
+    })
+
+
 @login_required
 def coordinator_messages_inbox(request):
     """Coordinator messages inbox - shows sent messages"""
@@ -815,14 +824,11 @@ def coordinator_messages_inbox(request):
         messages.error(request, 'Coordinator profile not found.')
         return redirect('login_page')
     
-    # Get messages sent by this coordinator
-    sent_messages = Message.objects.filter(
-        sender_type='coordinator',
-        sender_coordinator=coordinator_profile
-    ).select_related('recipient', 'recipient__admin').order_by('-created_at')
-    
+    # Threads started by this coordinator, most recently active first
+    conversations = inbox(request.user, 'sender')
+
     # Pagination
-    paginator = Paginator(sent_messages, 10)
+    paginator = Paginator(conversations, 10)
     page_number = request.GET.get('page')
     messages_page = paginator.get_page(page_number)
     
@@ -834,41 +840,6 @@ def coordinator_messages_inbox(request):
     return render(request, 'coordinator_template/messages_inbox.html', context)
 
 
-def _build_alumni_recipient_queryset(request):
-    """Return filtered alumni queryset for messaging recipients."""
-    verified_alumni = Alumni.objects.filter(admin__is_verified=True).select_related('admin', 'graduation_year', 'degree')
-    filters = {
-        'search': request.GET.get('search', '').strip(),
-        'student_id': request.GET.get('student_id', '').strip(),
-        'graduation_year': request.GET.get('graduation_year', '').strip(),
-        'degree': request.GET.get('degree', '').strip(),
-    }
-    
-    queryset = verified_alumni
-    
-    if filters['search']:
-        queryset = queryset.filter(
-            Q(admin__first_name__icontains=filters['search']) |
-            Q(admin__last_name__icontains=filters['search']) |
-            Q(admin__email__icontains=filters['search'])
-        )
-    
-    if filters['student_id']:
-        queryset = queryset.filter(student_id__icontains=filters['student_id'])
-    
-    if filters['graduation_year']:
-        queryset = queryset.filter(graduation_year_id=filters['graduation_year'])
-    
-    if filters['degree']:
-        queryset = queryset.filter(degree_id=filters['degree'])
-    
-    queryset = queryset.order_by('graduation_year__display_order', 'admin__last_name', 'admin__first_name')
-    filtered_count = queryset.count()
-    total_count = verified_alumni.count()
-    
-    return queryset, filters, filtered_count, total_count
-
-
 @login_required
 def coordinator_send_message(request, recipient_id=None):
     """Send a message to an alumni"""
@@ -886,7 +857,10 @@ def coordinator_send_message(request, recipient_id=None):
     if recipient_id:
         recipient = get_object_or_404(Alumni, id=recipient_id, admin__is_verified=True)
     
-    recipient_queryset, filters, filtered_recipient_count, total_recipient_count = _build_alumni_recipient_queryset(request)
+    filters = read_filters(request.GET)
+    filtered_recipient_count, total_recipient_count = recipient_counts(
+        filter_recipients(verified_recipients(), filters), request.GET
+    )
     
     form_initial = {}
     if recipient:
@@ -904,9 +878,6 @@ def coordinator_send_message(request, recipient_id=None):
     else:
         form = CoordinatorMessageForm(initial=form_initial)
     
-    # Apply filtered queryset to recipient field
-    form.fields['recipient'].queryset = recipient_queryset
-    
     context = {
         'form': form,
         'recipient': recipient,
@@ -916,6 +887,7 @@ def coordinator_send_message(request, recipient_id=None):
         'filters': filters,
         'filtered_recipient_count': filtered_recipient_count,
         'total_recipient_count': total_recipient_count,
+        'recipient_page_size': RECIPIENT_PAGE_SIZE,
     }
     
     return render(request, 'coordinator_template/send_message.html', context)
@@ -932,21 +904,7 @@ def coordinator_alumni_search(request):
     except AlumniCoordinator.DoesNotExist:
         return JsonResponse({'error': 'Coordinator profile not found'}, status=403)
     
-    recipient_queryset, _, filtered_recipient_count, total_recipient_count = _build_alumni_recipient_queryset(request)
-    
-    recipients = [
-        {
-            'id': alumni.id,
-            'label': format_alumni_recipient_label(alumni),
-        }
-        for alumni in recipient_queryset
-    ]
-    
-    return JsonResponse({
-        'results': recipients,
-        'filtered_count': filtered_recipient_count,
-        'total_count': total_recipient_count,
-    })
+    return JsonResponse(recipient_search_response(request.GET))
 
 
 @login_required
@@ -985,10 +943,8 @@ def coordinator_view_message(request, message_id):
     )
     
     # Mark as read if not already
-    if message.status != 'read':
-        message.status = 'read'
-        message.read_at = timezone.now()
-        message.save()
+    record_read(message)
+    mark_read(message.id, request.user)
 
     replies = list(message.replies.all())
     reply_form = MessageReplyForm()
@@ -1096,78 +1052,36 @@ def delete_alumni(request, alumni_id):
 
 @login_required
 def coordinator_export_alumni_excel(request, export_type='all'):
-    """Export alumni data to Excel format - Coordinator access"""
+    """Queue an alumni Excel export - Coordinator access"""
     if request.user.user_type not in ['1', '2']:  # Admin or Coordinator
         return redirect('login_page')
     
-    try:
-        # Get all alumni with related data
-        alumni_queryset = Alumni.objects.select_related(
-            'admin', 'graduation_year', 'degree', 'current_company'
-        ).all()
-        
-        # Apply filters if provided
-        search_query = request.GET.get('search', '')
-        graduation_year = request.GET.get('graduation_year', '')
-        degree = request.GET.get('degree', '')
-        
-        if search_query:
-            alumni_queryset = alumni_queryset.filter(
-                Q(admin__first_name__icontains=search_query) |
-                Q(admin__last_name__icontains=search_query) |
-                Q(admin__email__icontains=search_query) |
-                Q(student_id__icontains=search_query)
-            )
-        
-        if graduation_year:
-            alumni_queryset = alumni_queryset.filter(graduation_year_id=graduation_year)
-        
-        if degree:
-            alumni_queryset = alumni_queryset.filter(degree_id=degree)
-        
-        # Export to Excel
-        response = export_alumni_to_excel(alumni_queryset, export_type)
-        
-        # Log the export action
-        messages.success(request, f'Successfully exported {alumni_queryset.count()} alumni records to Excel!')
-        
-        return response
-        
-    except Exception as e:
-        messages.error(request, f'Error exporting alumni data: {str(e)}')
-        return redirect('manage_alumni')
+    params = {
+        'export_type': export_type,
+        'search': request.GET.get('search', ''),
+        'graduation_year': request.GET.get('graduation_year', ''),
+        'degree': request.GET.get('degree', ''),
+    }
+    job = submit_export(request.user, 'alumni', params)
+    return redirect('export_job_detail', job_id=job.id)
 
 
 @login_required
 def coordinator_export_alumni_by_year_excel(request, year_id):
-    """Export alumni by graduation year to Excel - Coordinator access"""
+    """Queue an Excel export of one class - Coordinator access"""
     if request.user.user_type not in ['1', '2']:  # Admin or Coordinator
         return redirect('login_page')
     
-    try:
-        graduation_year = get_object_or_404(GraduationYear, id=year_id)
-        response = export_alumni_by_graduation_year(graduation_year)
-        
-        messages.success(request, f'Successfully exported Class of {graduation_year.year} alumni to Excel!')
-        return response
-        
-    except Exception as e:
-        messages.error(request, f'Error exporting alumni data: {str(e)}')
-        return redirect('manage_alumni')
+    graduation_year = get_object_or_404(GraduationYear, id=year_id)
+    job = submit_export(request.user, 'class', {'graduation_year': graduation_year.id})
+    return redirect('export_job_detail', job_id=job.id)
 
 
 @login_required
 def coordinator_export_alumni_statistics_excel(request):
-    """Export alumni statistics to Excel - Coordinator access"""
+    """Queue an Excel export of alumni statistics - Coordinator access"""
     if request.user.user_type not in ['1', '2']:  # Admin or Coordinator
         return redirect('login_page')
     
-    try:
-        response = export_alumni_statistics()
-        
-        messages.success(request, 'Successfully exported alumni statistics to Excel!')
-        return response
-        
-    except Exception as e:
-        messages.error(request, f'Error exporting statistics: {str(e)}')
-        return redirect('coordinator_home')
+    job = submit_export(request.user, 'statistics')
+    return redirect('export_job_detail', job_id=job.id)
@@ -0,0 +1,144 @@
+"""
+Denormalized like, comment and reply counters.
+
+``News``, ``JobPosting`` and ``Event`` carry ``likes_count`` and
+``comments_count``; ``Comment`` carries ``likes_count`` and
+``replies_count``. Signal handlers adjust them with single ``F()`` updates
+as rows are created and deleted, so reading a count never runs a COUNT.
+Only approved comments are counted. ``reconcile_counters`` recomputes every
+counter in bulk to repair drift from raw SQL or bulk operations that bypass
+signals.
+"""
+
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import Comment, CommentLike, Event, JobPosting, Like, News
+
+CONTENT_MODELS = {
+    'news': News,
+    'job': JobPosting,
+    'event': Event,
+}
+
+
+def _adjust(model, pk, field, delta):
+    if pk is None or not delta:
+        return
+    if delta > 0:
+        value = F(field) + delta
+    else:
+        value = Greatest(F(field) - (-delta), Value(0))
+    model.objects.filter(pk=pk).update(**{field: value})
+
+
+def adjust_target(content_type, object_id, field, delta):
+    model = CONTENT_MODELS.get(content_type)
+    if model is not None:
+        _adjust(model, object_id, field, delta)
+
+
+def adjust_comment(comment_id, field, delta):
+    _adjust(Comment, comment_id, field, delta)
+
+
+def read_counter(content_type, object_id, field):
+    """Current value of a content object's counter, without counting rows."""
+    model = CONTENT_MODELS[content_type]
+    return model.objects.filter(pk=object_id).values_list(field, flat=True).first() or 0
+
+
+@receiver(post_save, sender=Like)
+def count_like_added(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        adjust_target(instance.content_type, instance.object_id, 'likes_count', 1)
+
+
+@receiver(post_delete, sender=Like)
+def count_like_removed(sender, instance, **kwargs):
+    adjust_target(instance.content_type, instance.object_id, 'likes_count', -1)
+
+
+@receiver(post_save, sender=CommentLike)
+def count_comment_like_added(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        _adjust(Comment, instance.comment_id, 'likes_count', 1)
+
+
+@receiver(post_delete, sender=CommentLike)
+def count_comment_like_removed(sender, instance, **kwargs):
+    _adjust(Comment, instance.comment_id, 'likes_count', -1)
+
+
+@receiver(pre_save, sender=Comment)
+def remember_comment_approval(sender, instance, raw=False, **kwargs):
+    instance._was_approved = None
+    if instance.pk and not raw:
+        instance._was_approved = (
+            Comment.objects.filter(pk=instance.pk).values_list('is_approved', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Comment)
+def count_comment_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        delta = 1 if instance.is_approved else 0
+    else:
+        was_approved = getattr(instance, '_was_approved', None)
+        if was_approved is None or was_approved == instance.is_approved:
+            return
+        delta = 1 if instance.is_approved else -1
+    adjust_target(instance.content_type, instance.object_id, 'comments_count', delta)
+    _adjust(Comment, instance.parent_id, 'replies_count', delta)
+
+
+@receiver(post_delete, sender=Comment)
+def count_comment_removed(sender, instance, **kwargs):
+    if instance.is_approved:
+        adjust_target(instance.content_type, instance.object_id, 'comments_count', -1)
+        _adjust(Comment, instance.parent_id, 'replies_count', -1)
+
+
+def _count_subquery(queryset, group_field):
+    counts = queryset.filter(**{group_field: OuterRef('pk')}).order_by().values(group_field)
+    return Coalesce(
+        Subquery(counts.annotate(total=Count('pk')).values('total')[:1]),
+        Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def _repair(model, field, expression, batch_size):
+    """Rewrite ``field`` wherever it disagrees with ``expression``. Returns rows fixed."""
+    drifted = model.objects.annotate(expected=expression).filter(~Q(**{field: F('expected')}))
+    pks = list(drifted.values_list('pk', flat=True))
+    for start in range(0, len(pks), batch_size):
+        model.objects.filter(pk__in=pks[start:start + batch_size]).update(**{field: expression})
+    return len(pks)
+
+
+def reconcile_counters(batch_size=500):
+    """Recompute every engagement counter. Returns ``{label: rows_repaired}``."""
+    repaired = {}
+    approved = Comment.objects.filter(is_approved=True)
+    for content_type, model in CONTENT_MODELS.items():
+        label = model._meta.verbose_name_plural
+        repaired[f'{label} likes'] = _repair(
+            model, 'likes_count', _count_subquery(Like.objects.filter(content_type=content_type), 'object_id'),
+            batch_size,
+        )
+        repaired[f'{label} comments'] = _repair(
+            model, 'comments_count', _count_subquery(approved.filter(content_type=content_type), 'object_id'),
+            batch_size,
+        )
+    repaired['Comment likes'] = _repair(
+        Comment, 'likes_count', _count_subquery(CommentLike.objects.all(), 'comment'), batch_size
+    )
+    repaired['Comment replies'] = _repair(
+        Comment, 'replies_count', _count_subquery(approved, 'parent'), batch_size
+    )
+    return repaired
@@ -0,0 +1,228 @@
+"""
+Versioned snapshot of the global counters shown on the dashboards.
+
+The counters are grouped into sections, each computed by one
+conditional-aggregation query over a single table. Saving or deleting a row
+bumps its section's version in the cache, and the next read recomputes only
+the sections whose version moved or whose values are older than
+``SECTION_MAX_AGE`` (the 30-day windows drift with time). Recomputation is
+single-flight: one request refreshes behind a cache lock while concurrent
+requests keep serving the previous snapshot instead of stampeding the
+database. ``refresh_dashboard_stats`` rebuilds every section on a schedule.
+"""
+
+import time
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from .models import (
+    Alumni,
+    AlumniCoordinator,
+    Company,
+    CustomUser,
+    Donation,
+    Event,
+    EventRegistration,
+    FeedbackAlumni,
+    JobPosting,
+    MentorshipProgram,
+    News,
+)
+
+SNAPSHOT_CACHE_KEY = 'dashboard:stats:v1'
+LOCK_CACHE_KEY = 'dashboard:stats:lock'
+LOCK_TIMEOUT = 30
+SECTION_MAX_AGE = 60 * 10
+WAIT_FOR_SNAPSHOT = 2.0
+WINDOW_DAYS = 30
+
+
+def _window_start():
+    return timezone.now().date() - timedelta(days=WINDOW_DAYS)
+
+
+def _alumni():
+    verified = Q(admin__is_verified=True)
+    return Alumni.objects.aggregate(
+        alumni_verified=Count('pk', filter=verified),
+        alumni_pending=Count('pk', filter=~verified),
+        alumni_listed=Count('pk', filter=verified & Q(privacy_level__in=['public', 'limited'])),
+        alumni_new_30_days=Count('pk', filter=Q(admin__date_joined__gte=_window_start())),
+    )
+
+
+def _coordinators():
+    return AlumniCoordinator.objects.aggregate(coordinators=Count('pk'))
+
+
+def _events():
+    return Event.objects.aggregate(
+        events_upcoming=Count('pk', filter=Q(status='upcoming')),
+        events_new_30_days=Count('pk', filter=Q(created_at__gte=_window_start())),
+    )
+
+
+def _registrations():
+    return EventRegistration.objects.aggregate(registrations_pending=Count('pk', filter=Q(status='pending')))
+
+
+def _jobs():
+    return JobPosting.objects.aggregate(
+        jobs_active=Count('pk', filter=Q(is_active=True)),
+        jobs_new_30_days=Count('pk', filter=Q(created_at__gte=_window_start())),
+    )
+
+
+def _companies():
+    return Company.objects.aggregate(companies_verified=Count('pk', filter=Q(is_verified=True)))
+
+
+def _donations():
+    completed = Q(payment_status='completed')
+    totals = Donation.objects.aggregate(
+        donations_completed_total=Sum('amount', filter=completed),
+        donations_completed_count=Count('pk', filter=completed),
+        donations_30_days=Sum('amount', filter=completed & Q(created_at__gte=_window_start())),
+    )
+    totals['donations_completed_total'] = totals['donations_completed_total'] or 0
+    totals['donations_30_days'] = totals['donations_30_days'] or 0
+    return totals
+
+
+def _mentorships():
+    return MentorshipProgram.objects.aggregate(mentorships_active=Count('pk', filter=Q(status='active')))
+
+
+def _news():
+    return News.objects.aggregate(news_published=Count('pk', filter=Q(is_published=True)))
+
+
+def _feedback():
+    return FeedbackAlumni.objects.aggregate(feedback_unresolved=Count('pk', filter=Q(is_resolved=False)))
+
+
+SECTIONS = {
+    'alumni': _alumni,
+    'coordinators': _coordinators,
+    'events': _events,
+    'registrations': _registrations,
+    'jobs': _jobs,
+    'companies': _companies,
+    'donations': _donations,
+    'mentorships': _mentorships,
+    'news': _news,
+    'feedback': _feedback,
+}
+
+SECTION_MODELS = {
+    Alumni: 'alumni',
+    CustomUser: 'alumni',
+    AlumniCoordinator: 'coordinators',
+    Event: 'events',
+    EventRegistration: 'registrations',
+    JobPosting: 'jobs',
+    Company: 'companies',
+    Donation: 'donations',
+    MentorshipProgram: 'mentorships',
+    News: 'news',
+    FeedbackAlumni: 'feedback',
+}
+
+
+def _version_key(section):
+    return f'dashboard:stats:version:{section}'
+
+
+def bump_section(section):
+    """Mark one section stale; the next read recomputes just that section."""
+    key = _version_key(section)
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def _stale_sections(snapshot, versions, now):
+    if snapshot is None:
+        return list(SECTIONS)
+    stale = []
+    for name in SECTIONS:
+        section = snapshot['sections'].get(name)
+        if (
+            section is None
+            or section['version'] != versions.get(_version_key(name), 0)
+            or now - section['computed_at'] > SECTION_MAX_AGE
+        ):
+            stale.append(name)
+    return stale
+
+
+def refresh(sections=None):
+    """Recompute ``sections`` (all by default) into the snapshot and return it."""
+    snapshot = cache.get(SNAPSHOT_CACHE_KEY) or {'sections': {}}
+    names = list(SECTIONS) if sections is None else list(sections)
+    # Read versions before counting, so a write during the count leaves the
+    # section marked stale for the next read.
+    versions = cache.get_many([_version_key(name) for name in names])
+    now = time.time()
+    for name in names:
+        snapshot['sections'][name] = {
+            'version': versions.get(_version_key(name), 0),
+            'computed_at': now,
+            'values': SECTIONS[name](),
+        }
+    cache.set(SNAPSHOT_CACHE_KEY, snapshot, None)
+    return snapshot
+
+
+def _complete(snapshot):
+    return snapshot is not None and all(name in snapshot['sections'] for name in SECTIONS)
+
+
+def _flatten(snapshot):
+    stats = {}
+    for section in snapshot['sections'].values():
+        stats.update(section['values'])
+    return stats
+
+
+def dashboard_stats():
+    """Every global dashboard counter as one flat dict."""
+    snapshot = cache.get(SNAPSHOT_CACHE_KEY)
+    versions = cache.get_many([_version_key(name) for name in SECTIONS])
+    stale = _stale_sections(snapshot, versions, time.time())
+    if not stale:
+        return _flatten(snapshot)
+
+    if cache.add(LOCK_CACHE_KEY, True, LOCK_TIMEOUT):
+        try:
+            return _flatten(refresh(stale))
+        finally:
+            cache.delete(LOCK_CACHE_KEY)
+
+    # Someone else is refreshing: serve what we have, or wait for a first
+    # snapshot briefly before computing it ourselves.
+    deadline = time.monotonic() + WAIT_FOR_SNAPSHOT
+    while not _complete(snapshot) and time.monotonic() < deadline:
+        time.sleep(0.05)
+        snapshot = cache.get(SNAPSHOT_CACHE_KEY)
+    if _complete(snapshot):
+        return _flatten(snapshot)
+    return _flatten(refresh())
+
+
+def bump_dashboard_section(sender, update_fields=None, **kwargs):
+    # Logins only touch last_login, which no counter depends on.
+    if sender is CustomUser and update_fields and set(update_fields) <= {'last_login'}:
+        return
+    bump_section(SECTION_MODELS[sender])
+
+
+for _model in SECTION_MODELS:
+    post_save.connect(bump_dashboard_section, sender=_model, dispatch_uid=f'dashboard-save-{_model.__name__}')
+    post_delete.connect(bump_dashboard_section, sender=_model, dispatch_uid=f'dashboard-delete-{_model.__name__}')
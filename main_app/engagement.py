@@ -0,0 +1,149 @@
+"""
+Viewer-aware engagement data for news, job and event detail pages.
+
+``load_engagement`` resolves whether the viewer liked the object and the
+first page of approved comments with the viewer's own comment likes. Later
+pages and the rest of each collapsed thread are fetched on demand through
+``load_comment_page`` and ``load_replies``. Like, comment and reply totals
+come from the counter columns maintained by ``main_app.counters``, so it
+issues a fixed number of queries no matter how many comments or replies the
+object has.
+"""
+
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber, Substr
+
+from .likes import is_liked, pending_comment_likes, pending_delta
+from .models import Comment, CommentLike
+from .pagination import KeysetPaginator
+
+COMMENT_PAGE_SIZE = 10
+REPLY_PREVIEW_SIZE = 2
+REPLY_PAGE_SIZE = 20
+
+
+def _viewer(user):
+    return user if user is not None and user.is_authenticated else None
+
+
+def prime_comment(comment, liked=False, replies=None):
+    """Attach the viewer state and preloaded replies read by ``comment_item.html``."""
+    comment._thread_replies = list(replies or [])
+    comment.user_liked = liked
+    return comment
+
+
+def _liked_ids(user, **comment_filters):
+    viewer = _viewer(user)
+    if viewer is None:
+        return set()
+    # Filter through the comment join rather than an id list, which could
+    # exceed the database's bound-parameter limit on busy threads.
+    lookups = {f'comment__{key}': value for key, value in comment_filters.items()}
+    liked_ids = set(CommentLike.objects.filter(user=viewer, **lookups).values_list('comment_id', flat=True))
+    # Toggles still in the like buffer override the stored state.
+    for comment_id, liked in pending_comment_likes(viewer).items():
+        if liked:
+            liked_ids.add(comment_id)
+        else:
+            liked_ids.discard(comment_id)
+    return liked_ids
+
+
+def _hide_branches(replies):
+    """Drop unapproved replies together with everything nested below them."""
+    for hidden_path in replies.filter(is_approved=False).values_list('path', flat=True):
+        replies = replies.exclude(path__gte=hidden_path, path__lt=f'{hidden_path}0')
+    return replies.filter(is_approved=True)
+
+
+def load_comment_page(content_type, object_id, user=None, cursor=None, per_page=COMMENT_PAGE_SIZE):
+    """
+    Return a ``CursorPage`` of approved top-level comments, newest first.
+
+    Each comment is primed with a collapsed preview of its first
+    ``REPLY_PREVIEW_SIZE`` replies in thread order; when its thread holds
+    more, ``more_replies_after`` is the path to pass to ``load_replies``.
+    """
+    top_level = Comment.objects.filter(
+        content_type=content_type,
+        object_id=object_id,
+        depth=0,
+        is_approved=True,
+    ).select_related('user')
+    # Ids grow with ``created_at``, so ``-id`` is newest first and unique.
+    page = KeysetPaginator(top_level, ['-id'], per_page).get_page(cursor)
+    if not page.object_list:
+        return page
+
+    threads = Q()
+    for comment in page:
+        threads |= Q(path__gt=f'{comment.path}/', path__lt=f'{comment.path}0')
+    replies = _hide_branches(
+        Comment.objects.filter(threads, content_type=content_type, object_id=object_id)
+    )
+    # Rank replies within each thread and keep one past the preview, which
+    # tells whether the thread has more to expand.
+    replies = replies.annotate(
+        thread_rank=Window(
+            RowNumber(),
+            partition_by=Substr('path', 1, Comment.PATH_SEGMENT_WIDTH),
+            order_by=F('path').asc(),
+        )
+    ).filter(thread_rank__lte=REPLY_PREVIEW_SIZE + 1).select_related('user').order_by('path')
+
+    previews = {}
+    for reply in replies:
+        previews.setdefault(reply.path[:Comment.PATH_SEGMENT_WIDTH], []).append(reply)
+
+    ids = [comment.id for comment in page]
+    ids += [reply.id for thread in previews.values() for reply in thread]
+    liked_ids = _liked_ids(user, id__in=ids)
+
+    for comment in page:
+        thread = previews.get(comment.path, [])
+        comment.more_replies_after = None
+        if len(thread) > REPLY_PREVIEW_SIZE:
+            thread = thread[:REPLY_PREVIEW_SIZE]
+            comment.more_replies_after = thread[-1].path
+        for reply in thread:
+            prime_comment(reply, liked=reply.id in liked_ids)
+        prime_comment(comment, liked=comment.id in liked_ids, replies=thread)
+    return page
+
+
+def load_replies(comment, user=None, after_path=None, limit=REPLY_PAGE_SIZE):
+    """
+    Return ``(replies, next_path)`` for one page of a comment's subtree.
+
+    Replies come back flat in thread order, each with its ``depth``. Pass
+    ``next_path`` back as ``after_path`` to continue where a page stopped.
+    """
+    # Replies under a hidden reply stay hidden, as in the full thread.
+    descendants = _hide_branches(comment.get_descendants()).select_related('user')
+    if after_path:
+        descendants = descendants.filter(path__gt=after_path)
+    replies = list(descendants[:limit + 1])
+    next_path = replies[limit - 1].path if len(replies) > limit else None
+    replies = replies[:limit]
+
+    liked_ids = _liked_ids(user, id__in=[reply.id for reply in replies]) if replies else set()
+    for reply in replies:
+        prime_comment(reply, liked=reply.id in liked_ids)
+    return replies, next_path
+
+
+def load_engagement(content_type, obj, user=None):
+    """Template context for ``like_comment_section.html``."""
+    viewer = _viewer(user)
+    user_liked = viewer is not None and is_liked(viewer, content_type, obj.pk)
+    page = load_comment_page(content_type, obj.pk, viewer)
+    return {
+        'content_type': content_type,
+        'object_id': obj.pk,
+        'user_liked': user_liked,
+        'total_likes': max(obj.likes_count + pending_delta(content_type, obj.pk), 0),
+        'comments': page.object_list,
+        'comments_cursor': page.next_cursor,
+        'total_comments': obj.comments_count,
+    }
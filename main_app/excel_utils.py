@@ -2,344 +2,295 @@
 Excel export utilities for Citizens Secondary School COSA
 """
 
+import tempfile
+from itertools import islice
+
 from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill, Alignment, Border, NamedStyle, Side
 from openpyxl.utils import get_column_letter
-from django.http import HttpResponse
 from django.utils import timezone
 from datetime import datetime
 
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# Rows fetched per database round trip while exporting
+EXPORT_CHUNK_SIZE = 2000
+# Column widths are estimated from the header and this many leading rows
+WIDTH_SAMPLE_ROWS = 200
+# Rows between calls to a sheet's progress callback
+PROGRESS_EVERY = 500
+MIN_COLUMN_WIDTH = 10
+MAX_COLUMN_WIDTH = 50
+
+THIN_BORDER = Border(
+    left=Side(style='thin'),
+    right=Side(style='thin'),
+    top=Side(style='thin'),
+    bottom=Side(style='thin')
+)
+HEADER_FONT = Font(bold=True, color="FFFFFF", size=12)
+HEADER_FILL = PatternFill(start_color="2E86AB", end_color="2E86AB", fill_type="solid")
+HEADER_ALIGNMENT = Alignment(horizontal="center", vertical="center")
+DATA_FONT = Font(size=11)
+DATA_ALIGNMENT = Alignment(horizontal="left", vertical="center", wrap_text=True)
+SUMMARY_FONT = Font(bold=True)
+
+
+def save_to_tempfile(workbook):
+    """Save the workbook to an anonymous temporary file, rewound for reading"""
+    output = tempfile.TemporaryFile()
+    workbook.save(output)
+    output.seek(0)
+    return output
+
+
+def streaming_workbook():
+    """Write-only workbook with the shared header, data and summary styles registered"""
+    workbook = Workbook(write_only=True)
+    workbook.add_named_style(NamedStyle(
+        name='cosa_header', font=HEADER_FONT, fill=HEADER_FILL, alignment=HEADER_ALIGNMENT, border=THIN_BORDER
+    ))
+    workbook.add_named_style(NamedStyle(
+        name='cosa_data', font=DATA_FONT, alignment=DATA_ALIGNMENT, border=THIN_BORDER
+    ))
+    workbook.add_named_style(NamedStyle(name='cosa_summary', font=SUMMARY_FONT))
+    return workbook
+
+
+def _styled_row(worksheet, values, style):
+    row = []
+    for value in values:
+        cell = WriteOnlyCell(worksheet, value=value)
+        cell.style = style
+        row.append(cell)
+    return row
+
+
+def _column_widths(headers, rows):
+    widths = [len(str(header)) for header in headers]
+    for row in rows:
+        for index, value in enumerate(row):
+            widths[index] = max(widths[index], len(str(value)))
+    return [min(max(width + 2, MIN_COLUMN_WIDTH), MAX_COLUMN_WIDTH) for width in widths]
+
+
+def write_sheet(workbook, title, headers, rows, summary=lambda count: [], progress=None):
+    """
+    Stream ``rows`` into a new sheet of a write-only workbook.
 
-def create_excel_response(filename, workbook):
-    """Create HTTP response for Excel file download"""
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-    workbook.save(response)
-    return response
-
-
-def style_header_cell(cell):
-    """Apply styling to header cells"""
-    cell.font = Font(bold=True, color="FFFFFF", size=12)
-    cell.fill = PatternFill(start_color="2E86AB", end_color="2E86AB", fill_type="solid")
-    cell.alignment = Alignment(horizontal="center", vertical="center")
-
-    thin_border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
-    cell.border = thin_border
-
+    Column widths are estimated from the first ``WIDTH_SAMPLE_ROWS`` rows,
+    since a write-only sheet must size its columns before the first row.
+    ``summary`` receives the number of rows written and returns the lines
+    added below the data; ``progress``, if given, is called with the running
+    count every ``PROGRESS_EVERY`` rows. Returns the number of rows.
+    """
+    worksheet = workbook.create_sheet(title=title)
+    rows = iter(rows)
+    sample = list(islice(rows, WIDTH_SAMPLE_ROWS))
+    for index, width in enumerate(_column_widths(headers, sample), 1):
+        worksheet.column_dimensions[get_column_letter(index)].width = width
+
+    worksheet.append(_styled_row(worksheet, headers, 'cosa_header'))
+    count = 0
+    for chunk in (sample, rows):
+        for values in chunk:
+            worksheet.append(_styled_row(worksheet, values, 'cosa_data'))
+            count += 1
+            if progress and count % PROGRESS_EVERY == 0:
+                progress(count)
+
+    lines = summary(count)
+    if lines:
+        worksheet.append([])
+        worksheet.append([])
+        worksheet.append(_styled_row(worksheet, lines[:1], 'cosa_summary'))
+        for line in lines[1:]:
+            worksheet.append([line])
+    return count
+
+
+def _format_datetime(value, fmt):
+    return timezone.localtime(value).strftime(fmt) if value else ''
+
+
+ALUMNI_EXPORT_HEADERS = {
+    'basic': [
+        "Student ID", "Full Name", "Email", "Phone",
+        "Completion Year", "Level", "Registration Date"
+    ],
+    'detailed': [
+        "Student ID", "First Name", "Last Name", "Email", "Phone",
+        "Completion Year", "Level", "Department", "Current Job",
+        "Company", "Location", "LinkedIn Profile", "Registration Date", "Last Updated"
+    ],
+    'all': [
+        "Student ID", "First Name", "Last Name", "Email", "Phone",
+        "Completion Year", "Level", "Department", "Current Job",
+        "Company", "Location", "LinkedIn Profile", "Bio", "Skills",
+        "Registration Date", "Last Updated", "Status"
+    ],
+}
+
+
+def _location(alumni):
+    return ", ".join(part for part in (alumni.current_city, alumni.current_country) if part)
+
+
+def alumni_export_row(alumni, export_type="all"):
+    """One row of ``export_alumni_to_excel`` for ``export_type``"""
+    user = alumni.admin
+    degree = alumni.degree
+    grad_year = alumni.graduation_year.year if alumni.graduation_year else ''
+    level_name = degree.name if degree else ''
+    department_name = degree.department.name if degree else ''
+    company_name = alumni.current_company.name if alumni.current_company else ''
 
-def style_data_cell(cell):
-    """Apply styling to data cells"""
-    cell.font = Font(size=11)
-    cell.alignment = Alignment(horizontal="left", vertical="center", wrap_text=True)
+    if export_type == "basic":
+        return [
+            alumni.student_id,
+            user.get_full_name(),
+            user.email,
+            user.phone_number,
+            grad_year,
+            level_name,
+            _format_datetime(user.date_joined, '%Y-%m-%d'),
+        ]
 
-    thin_border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
-    cell.border = thin_border
+    row = [
+        alumni.student_id,
+        user.first_name,
+        user.last_name,
+        user.email,
+        user.phone_number,
+        grad_year,
+        level_name,
+        department_name,
+        alumni.job_title,
+        company_name,
+        _location(alumni),
+        alumni.linkedin_profile,
+    ]
+    if export_type != "detailed":
+        row += [alumni.bio, alumni.skills]
+    row += [
+        _format_datetime(user.date_joined, '%Y-%m-%d %H:%M'),
+        _format_datetime(user.updated_at, '%Y-%m-%d %H:%M'),
+    ]
+    if export_type != "detailed":
+        row.append('Active' if user.is_active else 'Inactive')
+    return row
 
 
-def export_alumni_to_excel(alumni_queryset, export_type="all"):
-    """
-    Export alumni data to Excel format
+def _export_queryset(alumni_queryset):
+    return alumni_queryset.select_related(
+        'admin', 'graduation_year', 'degree__department', 'current_company'
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
 
-    Args:
-        alumni_queryset: QuerySet of Alumni objects
-        export_type: Type of export ("all", "basic", "detailed")
 
-    Returns:
-        HttpResponse with Excel file
-    """
-    workbook = Workbook()
-    worksheet = workbook.active
-    worksheet.title = "COSA Alumni Members"
+def build_alumni_workbook(alumni_queryset, export_type="all", progress=None):
+    """``(filename, workbook)`` exporting ``alumni_queryset`` with the ``export_type`` columns"""
+    export_type = export_type if export_type in ALUMNI_EXPORT_HEADERS else "all"
+    workbook = streaming_workbook()
 
-    # Define headers based on export type
-    if export_type == "basic":
-        headers = [
-            "Student ID", "Full Name", "Email", "Phone",
-            "Completion Year", "Level", "Registration Date"
-        ]
-    elif export_type == "detailed":
-        headers = [
-            "Student ID", "First Name", "Last Name", "Email", "Phone",
-            "Completion Year", "Level", "Department", "Current Job",
-            "Company", "Location", "LinkedIn Profile", "Registration Date", "Last Updated"
-        ]
-    else:  # all
-        headers = [
-            "Student ID", "First Name", "Last Name", "Email", "Phone",
-            "Completion Year", "Level", "Department", "Current Job",
-            "Company", "Location", "LinkedIn Profile", "Bio", "Skills",
-            "Registration Date", "Last Updated", "Status"
+    def summary(count):
+        return [
+            "Export Summary:",
+            f"Total Registered Members Exported: {count}",
+            f"Export Date: {timezone.now().strftime('%Y-%m-%d %H:%M:%S')}",
+            f"Export Type: {export_type.title()}",
+            "Generated by Citizens Secondary School COSA System",
         ]
 
-    # Write headers
-    for col_num, header in enumerate(headers, 1):
-        cell = worksheet.cell(row=1, column=col_num, value=header)
-        style_header_cell(cell)
-
-    # Write data
-    row_num = 2
-    for alumni in alumni_queryset:
-        user = alumni.admin  # assuming FK to auth user is 'admin'
-
-        # Derive common fields safely
-        grad_year_val = getattr(getattr(alumni, 'graduation_year', None), 'year', '') or ''
-        level_name = getattr(getattr(alumni, 'level', None), 'name', '') or ''
-        department_obj = getattr(alumni, 'department', None)
-        department_name = getattr(department_obj, 'name', '') if department_obj else ''
-        current_company_obj = getattr(alumni, 'current_company', None)
-        current_company_name = getattr(current_company_obj, 'name', '') if current_company_obj else ''
-        location = ''
-        if getattr(alumni, 'current_city', None):
-            country = getattr(alumni, 'current_country', '') or ''
-            location = f"{alumni.current_city}, {country}".strip().strip(', ')
-        phone_val = getattr(user, 'phone', '') or ''
-
-        if export_type == "basic":
-            data = [
-                getattr(alumni, 'student_id', ''),
-                user.get_full_name(),
-                user.email,
-                phone_val,
-                grad_year_val,
-                level_name,
-                alumni.created_at.strftime('%Y-%m-%d') if getattr(alumni, 'created_at', None) else ''
-            ]
-        elif export_type == "detailed":
-            data = [
-                getattr(alumni, 'student_id', ''),
-                user.first_name,
-                user.last_name,
-                user.email,
-                phone_val,
-                grad_year_val,
-                level_name,
-                department_name,
-                getattr(alumni, 'job_title', '') or getattr(alumni, 'current_job', '') or '',
-                current_company_name or getattr(alumni, 'company', '') or '',
-                location or getattr(alumni, 'location', '') or '',
-                getattr(alumni, 'linkedin_profile', '') or '',
-                alumni.created_at.strftime('%Y-%m-%d %H:%M') if getattr(alumni, 'created_at', None) else '',
-                alumni.updated_at.strftime('%Y-%m-%d %H:%M') if getattr(alumni, 'updated_at', None) else ''
-            ]
-        else:  # all
-            data = [
-                getattr(alumni, 'student_id', ''),
-                user.first_name,
-                user.last_name,
-                user.email,
-                phone_val,
-                grad_year_val,
-                level_name,
-                department_name,
-                getattr(alumni, 'job_title', '') or getattr(alumni, 'current_job', '') or '',
-                current_company_name or getattr(alumni, 'company', '') or '',
-                location or getattr(alumni, 'location', '') or '',
-                getattr(alumni, 'linkedin_profile', '') or '',
-                getattr(alumni, 'bio', '') or '',
-                getattr(alumni, 'skills', '') or '',
-                alumni.created_at.strftime('%Y-%m-%d %H:%M') if getattr(alumni, 'created_at', None) else '',
-                alumni.updated_at.strftime('%Y-%m-%d %H:%M') if getattr(alumni, 'updated_at', None) else '',
-                'Active' if getattr(user, 'is_active', False) else 'Inactive'
-            ]
-
-        # Write row data
-        for col_num, value in enumerate(data, 1):
-            cell = worksheet.cell(row=row_num, column=col_num, value=value)
-            style_data_cell(cell)
-
-        row_num += 1
-
-    # Auto-adjust column widths
-    for col_num in range(1, len(headers) + 1):
-        column_letter = get_column_letter(col_num)
-        max_length = 0
-        for row in worksheet[column_letter]:
-            try:
-                if len(str(row.value)) > max_length:
-                    max_length = len(str(row.value))
-            except Exception:
-                pass
-        adjusted_width = min(max(max_length + 2, 10), 50)
-        worksheet.column_dimensions[column_letter].width = adjusted_width
-
-    # Add summary information
-    summary_row = row_num + 2
-    worksheet.cell(row=summary_row, column=1, value="Export Summary:")
-    worksheet.cell(row=summary_row, column=1).font = Font(bold=True)
-
-    worksheet.cell(row=summary_row + 1, column=1,
-                   value=f"Total Registered Members Exported: {alumni_queryset.count()}")
-    worksheet.cell(row=summary_row + 2, column=1,
-                   value=f"Export Date: {timezone.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    worksheet.cell(row=summary_row + 3, column=1, value=f"Export Type: {export_type.title()}")
-    worksheet.cell(row=summary_row + 4, column=1, value="Generated by Citizens Secondary School COSA System")
+    write_sheet(
+        workbook,
+        "COSA Alumni Members",
+        ALUMNI_EXPORT_HEADERS[export_type],
+        (alumni_export_row(alumni, export_type) for alumni in _export_queryset(alumni_queryset)),
+        summary,
+        progress,
+    )
 
     # Generate filename
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     filename = f"COSA_Alumni_Export_{export_type}_{timestamp}.xlsx"
 
-    return create_excel_response(filename, workbook)
+    return filename, workbook
 
 
-def export_alumni_by_graduation_year(graduation_year):
-    """Export alumni by specific graduation year"""
+def build_class_workbook(graduation_year, progress=None):
+    """``(filename, workbook)`` exporting the alumni of one graduation year"""
     from .models import Alumni
 
-    alumni_queryset = Alumni.objects.filter(
-        graduation_year=graduation_year
-    ).select_related('admin', 'graduation_year', 'level')
-
-    workbook = Workbook()
-    worksheet = workbook.active
-    worksheet.title = f"Class of {getattr(graduation_year, 'year', graduation_year)}"
-
-    # Headers
+    year = getattr(graduation_year, 'year', graduation_year)
     headers = [
         "Student ID", "Full Name", "Email", "Phone", "Level",
         "Department", "Current Job", "Company", "Location", "Registration Date"
     ]
 
-    # Write headers
-    for col_num, header in enumerate(headers, 1):
-        cell = worksheet.cell(row=1, column=col_num, value=header)
-        style_header_cell(cell)
-
-    # Write data
-    row_num = 2
-    for alumni in alumni_queryset:
-        user = alumni.admin
-        level_name = getattr(getattr(alumni, 'level', None), 'name', '') or ''
-        department_obj = getattr(alumni, 'department', None)
-        department_name = getattr(department_obj, 'name', '') if department_obj else ''
-        company_name = getattr(getattr(alumni, 'current_company', None), 'name', '') or getattr(alumni, 'company', '') or ''
-        current_job = getattr(alumni, 'job_title', '') or getattr(alumni, 'current_job', '') or ''
-        location = getattr(alumni, 'location', '')
-        if not location and getattr(alumni, 'current_city', None):
-            country = getattr(alumni, 'current_country', '') or ''
-            location = f"{alumni.current_city}, {country}".strip().strip(', ')
-
-        data = [
-            getattr(alumni, 'student_id', ''),
-            user.get_full_name(),
-            user.email,
-            getattr(user, 'phone', '') or '',
-            level_name,
-            department_name,
-            current_job,
-            company_name,
-            location,
-            alumni.created_at.strftime('%Y-%m-%d') if getattr(alumni, 'created_at', None) else ''
+    def rows():
+        for alumni in _export_queryset(Alumni.objects.filter(graduation_year=graduation_year)):
+            user = alumni.admin
+            yield [
+                alumni.student_id,
+                user.get_full_name(),
+                user.email,
+                user.phone_number,
+                alumni.degree.name if alumni.degree else '',
+                alumni.degree.department.name if alumni.degree else '',
+                alumni.job_title,
+                alumni.current_company.name if alumni.current_company else '',
+                _location(alumni),
+                _format_datetime(user.date_joined, '%Y-%m-%d'),
+            ]
+
+    def summary(count):
+        return [
+            f"Class of {year} Alumni Export",
+            f"Total Registered Members: {count}",
+            f"Export Date: {timezone.now().strftime('%Y-%m-%d %H:%M:%S')}",
         ]
 
-        for col_num, value in enumerate(data, 1):
-            cell = worksheet.cell(row=row_num, column=col_num, value=value)
-            style_data_cell(cell)
-
-        row_num += 1
-
-    # Auto-adjust column widths
-    for col_num in range(1, len(headers) + 1):
-        column_letter = get_column_letter(col_num)
-        max_length = 0
-        for row in worksheet[column_letter]:
-            try:
-                if len(str(row.value)) > max_length:
-                    max_length = len(str(row.value))
-            except Exception:
-                pass
-        adjusted_width = min(max(max_length + 2, 10), 50)
-        worksheet.column_dimensions[column_letter].width = adjusted_width
-
-    # Add summary
-    summary_row = row_num + 2
-    worksheet.cell(row=summary_row, column=1,
-                   value=f"Class of {getattr(graduation_year, 'year', graduation_year)} Alumni Export")
-    worksheet.cell(row=summary_row, column=1).font = Font(bold=True)
-    worksheet.cell(row=summary_row + 1, column=1,
-                   value=f"Total Registered Members: {alumni_queryset.count()}")
-    worksheet.cell(row=summary_row + 2, column=1,
-                   value=f"Export Date: {timezone.now().strftime('%Y-%m-%d %H:%M:%S')}")
-
-    filename = f"COSA_Class_of_{getattr(graduation_year, 'year', graduation_year)}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-    return create_excel_response(filename, workbook)
-
-
-def export_alumni_statistics():
-    """Export alumni statistics and analytics"""
-    from .models import Alumni, GraduationYear, Level
-
-    workbook = Workbook()
-
-    # Statistics Sheet
-    stats_sheet = workbook.active
-    stats_sheet.title = "Alumni Statistics"
-
-    # Headers
-    headers = ["Metric", "Count", "Percentage"]
-    for col_num, header in enumerate(headers, 1):
-        cell = stats_sheet.cell(row=1, column=col_num, value=header)
-        style_header_cell(cell)
-
-    # Calculate statistics
-    total_alumni = Alumni.objects.count()
-    active_alumni = Alumni.objects.filter(admin__is_active=True).count()
+    workbook = streaming_workbook()
+    write_sheet(workbook, f"Class of {year}", headers, rows(), summary, progress)
+
+    filename = f"COSA_Class_of_{year}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+    return filename, workbook
+
+
+def build_statistics_workbook():
+    """``(filename, workbook)`` of alumni statistics, one sheet per breakdown"""
+    from .alumni_stats import alumni_breakdowns
+
+    totals, breakdowns = alumni_breakdowns()
+    total_alumni = totals['total']
 
     def pct(n, d):
         return f"{(n / d * 100):.1f}%" if d > 0 else "0%"
 
-    stats_data = [
+    workbook = streaming_workbook()
+
+    inactive = total_alumni - totals['active']
+    overview = [
         ("Total Registered Members", total_alumni, "100%"),
-        ("Active Alumni", active_alumni, pct(active_alumni, total_alumni)),
-        ("Inactive Alumni", total_alumni - active_alumni, pct(total_alumni - active_alumni, total_alumni)),
+        ("Active Alumni", totals['active'], pct(totals['active'], total_alumni)),
+        ("Inactive Alumni", inactive, pct(inactive, total_alumni)),
+        ("Verified Alumni", totals['verified'], pct(totals['verified'], total_alumni)),
+        ("Mentors", totals['mentors'], pct(totals['mentors'], total_alumni)),
+        ("Job Seekers", totals['job_seekers'], pct(totals['job_seekers'], total_alumni)),
+        ("Willing to Hire", totals['hiring'], pct(totals['hiring'], total_alumni)),
+        ("Open to Contact", totals['open_to_contact'], pct(totals['open_to_contact'], total_alumni)),
+        ("Newsletter Subscribers", totals['newsletter'], pct(totals['newsletter'], total_alumni)),
     ]
+    write_sheet(workbook, "Alumni Statistics", ["Metric", "Count", "Percentage"], overview)
 
-    # Graduation year stats
-    for grad_year in GraduationYear.objects.all().order_by('-year'):
-        count = Alumni.objects.filter(graduation_year=grad_year).count()
-        stats_data.append((f"Class of {grad_year.year}", count, pct(count, total_alumni)))
-
-    # Level stats
-    for level in Level.objects.all():
-        count = Alumni.objects.filter(level=level).count()
-        stats_data.append((f"{level.name} Level", count, pct(count, total_alumni)))
-
-    # Write statistics
-    row_num = 2
-    for metric, count, percentage in stats_data:
-        stats_sheet.cell(row=row_num, column=1, value=metric)
-        stats_sheet.cell(row=row_num, column=2, value=count)
-        stats_sheet.cell(row=row_num, column=3, value=percentage)
-
-        for col_num in range(1, 4):
-            style_data_cell(stats_sheet.cell(row=row_num, column=col_num))
-
-        row_num += 1
-
-    # Auto-adjust column widths
-    for col_num in range(1, 4):
-        column_letter = get_column_letter(col_num)
-        max_length = 0
-        for row in stats_sheet[column_letter]:
-            try:
-                if len(str(row.value)) > max_length:
-                    max_length = len(str(row.value))
-            except Exception:
-                pass
-        adjusted_width = min(max(max_length + 2, 10), 50)
-        stats_sheet.column_dimensions[column_letter].width = adjusted_width
+    for title, column, rows in breakdowns:
+        write_sheet(
+            workbook,
+            title,
+            [column, "Count", "Percentage"],
+            ((label, count, pct(count, total_alumni)) for label, count in rows),
+        )
 
     filename = f"COSA_Alumni_Statistics_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-    return create_excel_response(filename, workbook)
+    return filename, workbook
@@ -0,0 +1,233 @@
+"""
+Background jobs for the alumni spreadsheet exports.
+
+``submit_export`` records an ``ExportJob`` and hands it to the configured
+runner instead of building the file inside the request. Jobs are keyed by a
+fingerprint of their kind, parameters and the alumni data version, so
+repeating an export while an identical job is queued, running or still
+downloadable returns that job. ``run_job`` builds the workbook, saving its
+progress and a heartbeat as it goes, and stores the file in the default
+storage until ``ARTIFACT_TTL`` passes and ``purge_expired`` deletes it. A job
+left running without a heartbeat for ``STALE_AFTER`` (its worker was killed)
+is requeued by ``requeue_stale`` and built again.
+
+``ThreadRunner`` builds jobs on a small in-process thread pool.
+``DatabaseRunner`` leaves them queued for the ``run_export_jobs`` worker;
+select one with the ``EXPORT_JOBS_RUNNER`` setting.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import close_old_connections, transaction
+from django.db.models import Count, F, Max, Q
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.crypto import get_random_string
+from django.utils.module_loading import import_string
+
+from .excel_utils import build_alumni_workbook, build_class_workbook, build_statistics_workbook, save_to_tempfile
+from .models import Alumni, ExportJob, GraduationYear
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_TTL = timedelta(hours=1)
+STALE_AFTER = timedelta(minutes=10)
+DEFAULT_RUNNER = 'main_app.exports.ThreadRunner'
+THREAD_WORKERS = 2
+
+
+def alumni_filters(params, prefix=''):
+    """``Q`` for the manage-alumni filters in ``params``, on the alumni at ``prefix``."""
+    filters = Q()
+    search_query = params.get('search', '')
+    if search_query:
+        filters &= (
+            Q(**{f'{prefix}admin__first_name__icontains': search_query}) |
+            Q(**{f'{prefix}admin__last_name__icontains': search_query}) |
+            Q(**{f'{prefix}admin__email__icontains': search_query}) |
+            Q(**{f'{prefix}student_id__icontains': search_query})
+        )
+    if params.get('graduation_year'):
+        filters &= Q(**{f'{prefix}graduation_year_id': params['graduation_year']})
+    if params.get('degree'):
+        filters &= Q(**{f'{prefix}degree_id': params['degree']})
+    return filters
+
+
+def alumni_export_queryset(params):
+    """The alumni selected by the manage-alumni filters in ``params``."""
+    return Alumni.objects.filter(alumni_filters(params))
+
+
+def _build_alumni(params, progress):
+    alumni_queryset = alumni_export_queryset(params)
+    progress(0, alumni_queryset.count())
+    return build_alumni_workbook(alumni_queryset, params.get('export_type', 'all'), progress)
+
+
+def _build_class(params, progress):
+    graduation_year = GraduationYear.objects.get(pk=params['graduation_year'])
+    progress(0, Alumni.objects.filter(graduation_year=graduation_year).count())
+    return build_class_workbook(graduation_year, progress)
+
+
+def _build_statistics(params, progress):
+    return build_statistics_workbook()
+
+
+BUILDERS = {
+    'alumni': _build_alumni,
+    'class': _build_class,
+    'statistics': _build_statistics,
+}
+
+
+def data_version():
+    """Changes whenever an alumni row is added, removed or its user is saved."""
+    # Profile edits save the user row, which bumps its ``updated_at``.
+    version = Alumni.objects.aggregate(count=Count('pk'), updated=Max('admin__updated_at'))
+    return f"{version['count']}:{version['updated'].isoformat() if version['updated'] else ''}"
+
+
+def fingerprint(kind, params):
+    payload = json.dumps([kind, params, data_version()], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def submit_export(user, kind, params=None):
+    """Return a live job for this export, creating and enqueueing one if needed."""
+    params = params or {}
+    purge_expired()
+    stale = requeue_stale()
+    for job_id in stale:
+        transaction.on_commit(lambda job_id=job_id: get_runner().enqueue(job_id))
+    key = fingerprint(kind, params)
+    existing = ExportJob.objects.filter(
+        fingerprint=key, expires_at__gt=timezone.now(), status__in=['pending', 'running', 'completed']
+    ).order_by('-created_at').first()
+    if existing is not None:
+        return existing
+    job = ExportJob.objects.create(
+        requested_by=user,
+        kind=kind,
+        params=params,
+        fingerprint=key,
+        expires_at=timezone.now() + ARTIFACT_TTL,
+    )
+    transaction.on_commit(lambda: get_runner().enqueue(job.pk))
+    return job
+
+
+def _claim(job_id):
+    """Move a pending job to running; False if another worker got it first."""
+    now = timezone.now()
+    return ExportJob.objects.filter(pk=job_id, status='pending').update(
+        status='running', started_at=now, heartbeat_at=now
+    ) == 1
+
+
+def run_job(job_id):
+    """Build one pending job's file. Returns False if the job was not pending."""
+    if not _claim(job_id):
+        return False
+    job = ExportJob.objects.get(pk=job_id)
+
+    def progress(processed, total=None):
+        fields = {'processed': processed, 'heartbeat_at': timezone.now()}
+        if total is not None:
+            fields['total'] = total
+        ExportJob.objects.filter(pk=job.pk).update(**fields)
+
+    try:
+        filename, workbook = BUILDERS[job.kind](job.params, progress)
+        with save_to_tempfile(workbook) as output:
+            job.file.save(f'{get_random_string(32)}.xlsx', File(output), save=False)
+    except Exception as exc:
+        logger.exception('Export job %s failed', job.pk)
+        ExportJob.objects.filter(pk=job.pk).update(
+            status='failed', error=str(exc), finished_at=timezone.now()
+        )
+        return True
+
+    now = timezone.now()
+    ExportJob.objects.filter(pk=job.pk).update(
+        status='completed',
+        file=job.file.name,
+        filename=filename,
+        processed=Coalesce(F('total'), F('processed')),
+        finished_at=now,
+        expires_at=now + ARTIFACT_TTL,
+    )
+    return True
+
+
+def requeue_stale(stale_after=STALE_AFTER):
+    """Queue running jobs whose worker stopped sending heartbeats. Returns their ids."""
+    cutoff = timezone.now() - stale_after
+    stale = ExportJob.objects.filter(
+        Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff), status='running'
+    )
+    job_ids = list(stale.values_list('pk', flat=True))
+    if job_ids:
+        stale.filter(pk__in=job_ids).update(status='pending', processed=0)
+    return job_ids
+
+
+def run_pending(limit=None):
+    """Run queued jobs oldest first. Returns the number this worker ran."""
+    ran = 0
+    for job_id in ExportJob.objects.filter(status='pending').order_by('created_at').values_list('pk', flat=True)[:limit]:
+        ran += run_job(job_id)
+    return ran
+
+
+def purge_expired():
+    """Delete expired jobs and their files. Returns the number deleted."""
+    expired = list(ExportJob.objects.filter(expires_at__lte=timezone.now()))
+    for job in expired:
+        if job.file:
+            job.file.delete(save=False)
+    ExportJob.objects.filter(pk__in=[job.pk for job in expired]).delete()
+    return len(expired)
+
+
+class DatabaseRunner:
+    """Leave jobs queued in the database for the ``run_export_jobs`` worker."""
+
+    def enqueue(self, job_id):
+        pass
+
+
+class ThreadRunner:
+    """Build jobs on a small thread pool inside the web process."""
+
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(max_workers=THREAD_WORKERS, thread_name_prefix='export-jobs')
+
+    def enqueue(self, job_id):
+        self._executor.submit(self._run, job_id)
+
+    def _run(self, job_id):
+        try:
+            run_job(job_id)
+        finally:
+            close_old_connections()
+
+
+_runner = None
+_runner_lock = threading.Lock()
+
+
+def get_runner():
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            _runner = import_string(getattr(settings, 'EXPORT_JOBS_RUNNER', DEFAULT_RUNNER))()
+        return _runner
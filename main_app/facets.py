@@ -0,0 +1,143 @@
+"""
+Facet counts for the alumni directory filters.
+
+Counts for every filter option come from one grouped query over the searched
+queryset: each row is a distinct (year, level, mentor, hiring) combination
+with its size, and the per-option counts are summed from those rows in
+Python. Each facet honours the other active filters but not its own, so the
+user still sees how many profiles the sibling options would return.
+
+Without a search term the rows are the same for everybody, so they are kept
+in a cached snapshot that ``Alumni`` saves and deletes invalidate.
+"""
+
+from django.core.cache import cache
+from django.db.models import Count
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Alumni, CustomUser
+
+FACET_FIELDS = {
+    'graduation_year': 'graduation_year__year',
+    'degree': 'degree__degree_type',
+    'is_mentor': 'is_mentor',
+    'willing_to_hire': 'willing_to_hire',
+}
+BOOLEAN_FACETS = ('is_mentor', 'willing_to_hire')
+SNAPSHOT_CACHE_KEY = 'facets:alumni-directory:unfiltered'
+SNAPSHOT_TIMEOUT = 60 * 60
+
+
+def visible_alumni():
+    """Profiles that appear in the directory before any filters are applied."""
+    return Alumni.objects.filter(
+        admin__is_verified=True,
+        privacy_level__in=['public', 'limited'],
+    )
+
+
+def facet_rows(queryset):
+    """Return ``(values, count)`` pairs for each distinct facet combination."""
+    lookups = list(FACET_FIELDS.values())
+    grouped = queryset.order_by().values(*lookups).annotate(facet_count=Count('pk'))
+    return [
+        (tuple(row[lookup] for lookup in lookups), row['facet_count'])
+        for row in grouped
+    ]
+
+
+def unfiltered_rows():
+    rows = cache.get(SNAPSHOT_CACHE_KEY)
+    if rows is None:
+        rows = facet_rows(visible_alumni())
+        cache.set(SNAPSHOT_CACHE_KEY, rows, SNAPSHOT_TIMEOUT)
+    return rows
+
+
+def _without_alumni(rows, alumni):
+    """Drop one profile from the snapshot, e.g. the viewer hidden from their own directory."""
+    own = visible_alumni().filter(pk=alumni.pk).values_list(*FACET_FIELDS.values()).first()
+    if own is None:
+        return rows
+    adjusted = []
+    for values, count in rows:
+        if values == own:
+            count -= 1
+        if count:
+            adjusted.append((values, count))
+    return adjusted
+
+
+def _matches(value, facet, selected):
+    wanted = selected.get(facet)
+    if facet in BOOLEAN_FACETS:
+        return not wanted or value is True
+    return not wanted or str(value) == str(wanted)
+
+
+def summarize(rows, selected):
+    """
+    Sum ``rows`` into per-option counts for every facet.
+
+    ``selected`` maps facet names to the active filter values, as found in
+    ``AlumniSearchForm.cleaned_data``.
+    """
+    names = list(FACET_FIELDS)
+    totals = {name: {} for name in names}
+    for values, count in rows:
+        for index, name in enumerate(names):
+            others_match = all(
+                _matches(values[other], names[other], selected)
+                for other in range(len(names)) if other != index
+            )
+            if not others_match:
+                continue
+            option = values[index]
+            if option is None or option == '':
+                continue
+            totals[name][option] = totals[name].get(option, 0) + count
+
+    facets = {}
+    for name in names:
+        if name in BOOLEAN_FACETS:
+            facets[name] = totals[name].get(True, 0)
+        else:
+            facets[name] = [
+                {'value': str(value), 'count': count}
+                for value, count in sorted(totals[name].items(), key=lambda item: str(item[0]))
+            ]
+    return facets
+
+
+def directory_facets(queryset, selected, searched=False, exclude=None):
+    """
+    Facet counts for a directory listing.
+
+    ``queryset`` is the listing after searching but before the facet filters
+    are applied. Unsearched listings use the cached snapshot, minus
+    ``exclude`` when the caller hides a profile from its results.
+    """
+    if searched:
+        rows = facet_rows(queryset)
+    else:
+        rows = unfiltered_rows()
+        if exclude is not None:
+            rows = _without_alumni(rows, exclude)
+    return summarize(rows, selected)
+
+
+@receiver(post_save, sender=Alumni)
+@receiver(post_delete, sender=Alumni)
+def invalidate_facet_snapshot(sender, raw=False, **kwargs):
+    if raw:
+        return
+    cache.delete(SNAPSHOT_CACHE_KEY)
+
+
+@receiver(post_save, sender=CustomUser)
+def invalidate_on_account_change(sender, raw=False, update_fields=None, **kwargs):
+    # Verification and deactivation change who is listed; logins only touch last_login.
+    if raw or (update_fields is not None and not {'is_verified', 'is_active'} & set(update_fields)):
+        return
+    cache.delete(SNAPSHOT_CACHE_KEY)
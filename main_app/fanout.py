@@ -0,0 +1,193 @@
+"""
+Background fan-out for coordinator notification broadcasts.
+
+``submit_broadcast`` records a ``NotificationBroadcast`` and hands it to the
+configured runner, so the request returns before a single notification is
+written. ``run_broadcast`` walks the audience in primary-key order, reading
+only ids, and writes each chunk of ``NotificationAlumni`` rows with one
+``bulk_create``. The chunk and the broadcast's progress (``processed`` and
+the last alumni id written) commit together with a heartbeat. A broadcast
+left running without a heartbeat for ``STALE_AFTER`` (its worker was killed)
+is requeued by ``requeue_stale`` and resumes after the last full chunk. The
+unique ``(broadcast, alumni)`` key turns any overlap into a no-op, so a retry
+never notifies anyone twice. Each chunk's recipients get the same live
+notification event as a single saved notification sends.
+
+``ThreadRunner`` fans out on a small in-process thread pool.
+``DatabaseRunner`` leaves broadcasts queued for the ``run_notification_fanout``
+worker; select one with the ``NOTIFICATION_FANOUT_RUNNER`` setting.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from . import live
+from .badges import invalidate_users, notification_event
+from .models import Alumni, NotificationAlumni, NotificationBroadcast
+
+logger = logging.getLogger(__name__)
+
+FANOUT_CHUNK_SIZE = 1000
+DEFAULT_RUNNER = 'main_app.fanout.ThreadRunner'
+THREAD_WORKERS = 1
+STALE_AFTER = timedelta(minutes=10)
+
+
+def audience(broadcast):
+    """Verified alumni the broadcast is addressed to."""
+    recipients = Alumni.objects.filter(admin__is_verified=True)
+    if broadcast.audience == 'graduation_year':
+        return recipients.filter(graduation_year_id=broadcast.graduation_year_id)
+    if broadcast.audience == 'degree':
+        return recipients.filter(degree_id=broadcast.degree_id)
+    return recipients
+
+
+def submit_broadcast(sender, title, message, notification_type='system', audience='all', **target):
+    """Record a broadcast and enqueue its fan-out once the transaction commits."""
+    broadcast = NotificationBroadcast.objects.create(
+        sender=sender,
+        title=title,
+        message=message,
+        notification_type=notification_type,
+        audience=audience,
+        graduation_year_id=target.get('graduation_year') or None,
+        degree_id=target.get('degree') or None,
+    )
+    queued = requeue_stale() + [broadcast.pk]
+    transaction.on_commit(lambda: [get_runner().enqueue(broadcast_id) for broadcast_id in queued])
+    return broadcast
+
+
+def _claim(broadcast_id):
+    """Move a pending broadcast to running; False if another worker got it first."""
+    now = timezone.now()
+    return NotificationBroadcast.objects.filter(pk=broadcast_id, status='pending').update(
+        status='running', started_at=now, heartbeat_at=now
+    ) == 1
+
+
+def _deliver_chunk(broadcast, chunk):
+    """Write one chunk of ``(alumni_id, user_id)`` and advance the broadcast past it."""
+    with transaction.atomic():
+        NotificationAlumni.objects.bulk_create(
+            [
+                NotificationAlumni(
+                    alumni_id=alumni_id,
+                    broadcast=broadcast,
+                    title=broadcast.title,
+                    message=broadcast.message,
+                    notification_type=broadcast.notification_type,
+                )
+                for alumni_id, _ in chunk
+            ],
+            ignore_conflicts=True,
+        )
+        NotificationBroadcast.objects.filter(pk=broadcast.pk).update(
+            processed=F('processed') + len(chunk), last_alumni_id=chunk[-1][0], heartbeat_at=timezone.now()
+        )
+    # bulk_create skips the badge signals; drop the recipients' cached counts
+    # and send each one the live event a single notification would.
+    invalidate_users([user_id for _, user_id in chunk])
+    users = dict(chunk)
+    delivered = NotificationAlumni.objects.filter(broadcast=broadcast, alumni_id__in=users).only(
+        'alumni_id', 'notification_type', 'title', 'message', 'link_url'
+    )
+    for notification in delivered:
+        live.publish([users[notification.alumni_id]], notification_event(notification))
+
+
+def run_broadcast(broadcast_id, chunk_size=FANOUT_CHUNK_SIZE):
+    """Fan out one pending broadcast. Returns False if it was not pending."""
+    if not _claim(broadcast_id):
+        return False
+    broadcast = NotificationBroadcast.objects.get(pk=broadcast_id)
+    recipients = audience(broadcast).order_by('pk')
+    try:
+        if broadcast.total is None:
+            broadcast.total = recipients.count()
+            NotificationBroadcast.objects.filter(pk=broadcast.pk).update(total=broadcast.total)
+        cursor = broadcast.last_alumni_id
+        while True:
+            chunk = list(recipients.filter(pk__gt=cursor).values_list('pk', 'admin_id')[:chunk_size])
+            if not chunk:
+                break
+            _deliver_chunk(broadcast, chunk)
+            cursor = chunk[-1][0]
+    except Exception as exc:
+        logger.exception('Notification broadcast %s failed', broadcast.pk)
+        NotificationBroadcast.objects.filter(pk=broadcast.pk).update(
+            status='failed', error=str(exc), finished_at=timezone.now()
+        )
+        return True
+    NotificationBroadcast.objects.filter(pk=broadcast.pk).update(status='completed', finished_at=timezone.now())
+    return True
+
+
+def requeue_failed():
+    """Queue failed broadcasts again; each resumes after its last delivered chunk."""
+    return NotificationBroadcast.objects.filter(status='failed').update(status='pending', error='')
+
+
+def requeue_stale(stale_after=STALE_AFTER):
+    """Queue running broadcasts whose worker stopped sending heartbeats. Returns their ids."""
+    cutoff = timezone.now() - stale_after
+    stale = NotificationBroadcast.objects.filter(
+        Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff), status='running'
+    )
+    broadcast_ids = list(stale.values_list('pk', flat=True))
+    if broadcast_ids:
+        stale.filter(pk__in=broadcast_ids).update(status='pending')
+    return broadcast_ids
+
+
+def run_pending(limit=None):
+    """Fan out queued broadcasts oldest first. Returns the number this worker ran."""
+    ran = 0
+    queued = NotificationBroadcast.objects.filter(status='pending').order_by('created_at')
+    for broadcast_id in queued.values_list('pk', flat=True)[:limit]:
+        ran += run_broadcast(broadcast_id)
+    return ran
+
+
+class DatabaseRunner:
+    """Leave broadcasts queued in the database for the ``run_notification_fanout`` worker."""
+
+    def enqueue(self, broadcast_id):
+        pass
+
+
+class ThreadRunner:
+    """Fan out broadcasts on a background thread inside the web process."""
+
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(max_workers=THREAD_WORKERS, thread_name_prefix='notification-fanout')
+
+    def enqueue(self, broadcast_id):
+        self._executor.submit(self._run, broadcast_id)
+
+    def _run(self, broadcast_id):
+        try:
+            run_broadcast(broadcast_id)
+        finally:
+            close_old_connections()
+
+
+_runner = None
+_runner_lock = threading.Lock()
+
+
+def get_runner():
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            _runner = import_string(getattr(settings, 'NOTIFICATION_FANOUT_RUNNER', DEFAULT_RUNNER))()
+        return _runner
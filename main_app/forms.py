@@ -2,6 +2,7 @@ from django import forms
 from django.db import transaction
 from django.forms.widgets import DateInput, DateTimeInput, TextInput, Select, CheckboxInput
 from django.contrib.auth.forms import UserCreationForm
+from django.urls import reverse_lazy
 from django.utils import timezone
 from crispy_forms.helper import FormHelper
 from crispy_forms.layout import Layout, Submit, Row, Column, Field, Div, HTML
@@ -16,6 +17,67 @@ def format_alumni_recipient_label(alumni):
     return f"{alumni.full_name} — {year_display} • {student_id}"
 
 
+class RemoteSelect(Select):
+    """
+    A select that only renders the chosen option.
+
+    The remaining options are fetched from ``search_url`` as the user types,
+    so rendering the form never iterates the whole recipient queryset.
+    """
+    template_name = 'main_app/widgets/remote_select.html'
+
+    def __init__(self, search_url='', search_box=True, search_placeholder='Search by name, email or COSA ID', attrs=None):
+        super().__init__(attrs)
+        self.search_url = search_url
+        self.search_box = search_box
+        self.search_placeholder = search_placeholder
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context['widget']['search_url'] = str(self.search_url)
+        context['widget']['search_box'] = self.search_box
+        context['widget']['search_placeholder'] = self.search_placeholder
+        return context
+
+    def optgroups(self, name, value, attrs=None):
+        field = self.choices.field
+        selected = [str(v) for v in value if v not in (None, '')]
+        choices = []
+        if field.empty_label is not None:
+            choices.append(('', field.empty_label))
+        if selected:
+            for obj in field.queryset.filter(pk__in=selected):
+                choices.append((str(obj.pk), field.label_from_instance(obj)))
+
+        groups = []
+        for index, (option_value, option_label) in enumerate(choices):
+            option = self.create_option(
+                name, option_value, option_label, option_value in selected or (not selected and option_value == ''),
+                index, attrs=attrs,
+            )
+            groups.append((None, [option], index))
+        return groups
+
+
+class RemoteRecipientField(forms.ModelChoiceField):
+    """Alumni recipient chosen through a search endpoint; validated by primary key."""
+
+    def __init__(self, queryset, search_url, search_box=True, search_placeholder=None, **kwargs):
+        kwargs.setdefault('empty_label', 'Select an alumni recipient')
+        kwargs.setdefault('label', 'Send to Alumni')
+        widget_kwargs = {'search_box': search_box}
+        if search_placeholder:
+            widget_kwargs['search_placeholder'] = search_placeholder
+        super().__init__(
+            queryset,
+            widget=RemoteSelect(search_url, attrs={'class': 'form-select'}, **widget_kwargs),
+            **kwargs
+        )
+
+    def label_from_instance(self, obj):
+        return format_alumni_recipient_label(obj)
+
+
 class FormSettings(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         super(FormSettings, self).__init__(*args, **kwargs)
@@ -346,6 +408,15 @@ class DonationForm(FormSettings):
 
 
 class MessageForm(FormSettings):
+    # The picker's own rule (contactable_recipients) is applied in __init__;
+    # options load from the search endpoint, which matches names and COSA IDs only
+    recipient = RemoteRecipientField(
+        Alumni.objects.none(),
+        search_url=reverse_lazy('alumni_recipient_search'),
+        search_placeholder='Search by name or COSA ID',
+        label='Recipient',
+    )
+
     class Meta:
         model = Message
         fields = ['recipient', 'subject', 'content', 'attachment']
@@ -354,9 +425,11 @@ class MessageForm(FormSettings):
         }
 
     def __init__(self, *args, **kwargs):
+        from .recipients import contactable_recipients
+
         super().__init__(*args, **kwargs)
-        # Filter recipients to only show alumni with contact permission
-        self.fields['recipient'].queryset = Alumni.objects.filter(allow_contact=True)
+        self.fields['recipient'].queryset = contactable_recipients().select_related('admin', 'graduation_year')
+        self.fields['recipient'].widget.attrs['class'] = 'form-select'
         
         self.helper = FormHelper()
         self.helper.layout = Layout(
@@ -393,6 +466,12 @@ class MessageEditForm(FormSettings):
 
 
 class AdminMessageForm(FormSettings):
+    # Verified alumni, searched remotely
+    recipient = RemoteRecipientField(
+        Alumni.objects.filter(admin__is_verified=True).select_related('admin', 'graduation_year'),
+        search_url=reverse_lazy('admin_alumni_search'),
+    )
+
     class Meta:
         model = Message
         fields = ['recipient', 'subject', 'content', 'attachment']
@@ -402,13 +481,7 @@ class AdminMessageForm(FormSettings):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        # Show all verified alumni as potential recipients
-        recipient_field = self.fields['recipient']
-        recipient_field.queryset = Alumni.objects.filter(admin__is_verified=True).select_related('admin', 'graduation_year', 'degree')
-        recipient_field.label = "Send to Alumni"
-        recipient_field.empty_label = "Select an alumni recipient"
-        recipient_field.widget.attrs['class'] = 'form-select'
-        recipient_field.label_from_instance = format_alumni_recipient_label
+        self.fields['recipient'].widget.attrs['class'] = 'form-select'
         
         self.helper = FormHelper()
         self.helper.layout = Layout(
@@ -424,6 +497,13 @@ class AdminMessageForm(FormSettings):
 
 
 class CoordinatorMessageForm(FormSettings):
+    # Verified alumni; the page's recipient filter panel drives the options
+    recipient = RemoteRecipientField(
+        Alumni.objects.filter(admin__is_verified=True).select_related('admin', 'graduation_year'),
+        search_url=reverse_lazy('coordinator_alumni_search'),
+        search_box=False,
+    )
+
     class Meta:
         model = Message
         fields = ['recipient', 'subject', 'content', 'attachment']
@@ -433,13 +513,7 @@ class CoordinatorMessageForm(FormSettings):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        # Show all verified alumni as potential recipients
-        recipient_field = self.fields['recipient']
-        recipient_field.queryset = Alumni.objects.filter(admin__is_verified=True).select_related('admin', 'graduation_year', 'degree')
-        recipient_field.label = "Send to Alumni"
-        recipient_field.empty_label = "Select an alumni recipient"
-        recipient_field.widget.attrs['class'] = 'form-select'
-        recipient_field.label_from_instance = format_alumni_recipient_label
+        self.fields['recipient'].widget.attrs['class'] = 'form-select'
         
         self.helper = FormHelper()
         self.helper.layout = Layout(
@@ -484,6 +558,11 @@ class AlumniSearchForm(forms.Form):
         required=False,
         widget=forms.TextInput(attrs={'placeholder': 'Search by name, company, or skills...'})
     )
+    skill = forms.CharField(
+        max_length=100,
+        required=False,
+        widget=forms.TextInput(attrs={'placeholder': 'Exact skill, e.g. Python'})
+    )
     graduation_year = forms.ChoiceField(
         choices=YEAR_CHOICES,
         required=False
@@ -506,7 +585,7 @@ class AlumniSearchForm(forms.Form):
         for name in select_fields:
             self.fields[name].widget.attrs.setdefault('class', 'form-select')
 
-        for name in ['search']:
+        for name in ['search', 'skill']:
             self.fields[name].widget.attrs.setdefault('class', 'form-control')
 
         for name in ['is_mentor', 'willing_to_hire']:
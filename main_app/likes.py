@@ -0,0 +1,177 @@
+"""
+Write-coalescing buffer for like and comment-like toggles.
+
+A toggle writes one ``LikeToggle`` row instead of racing ``get_or_create``
+on the ``unique_together`` constraint and updating the liked object's
+counter row on every click. A pending toggle always differs from the stored
+state, so toggling again deletes it, and the table's own unique constraint
+keeps one per user and object: a user's buffered change to a count is at
+most +1 or -1. The response carries the new state and the counter column
+plus the buffered toggles, read in one query.
+
+``flush_toggles`` applies buffered toggles to ``Like`` and ``CommentLike``
+in batches, locking each batch with ``SKIP LOCKED`` so concurrent flushers
+take disjoint rows. The ``flush_like_buffer`` worker drains the buffer; a
+toggle also flushes one batch itself when the oldest buffered row is older
+than ``FLUSH_AFTER`` or its object has ``FLUSH_THRESHOLD`` pending, so the
+buffer stays bounded without the worker. Counters only move by the like
+rows that were actually inserted or deleted.
+"""
+
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, IntegerField, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .counters import CONTENT_MODELS, adjust_comment, adjust_target
+from .models import Comment, CommentLike, Like, LikeToggle
+
+COMMENT = 'comment'
+FLUSH_BATCH_SIZE = 500
+FLUSH_THRESHOLD = 100
+FLUSH_AFTER = timedelta(minutes=1)
+
+
+def _likes(target):
+    if target == COMMENT:
+        return CommentLike.objects.all(), 'comment_id'
+    return Like.objects.filter(content_type=target), 'object_id'
+
+
+def _stored(user, target, object_id):
+    likes, field = _likes(target)
+    return likes.filter(user=user, **{field: object_id}).exists()
+
+
+def is_liked(user, target, object_id):
+    """The user's current state, counting a toggle that is not flushed yet."""
+    pending = LikeToggle.objects.filter(user=user, target=target, object_id=object_id)
+    liked = pending.values_list('liked', flat=True).first()
+    if liked is not None:
+        return liked
+    return _stored(user, target, object_id)
+
+
+def _net_delta():
+    return Sum(Case(When(liked=True, then=Value(1)), default=Value(-1)))
+
+
+def pending_delta(target, object_id):
+    """Net change buffered for one object, +1 per like and -1 per unlike."""
+    toggles = LikeToggle.objects.filter(target=target, object_id=object_id)
+    return toggles.aggregate(delta=_net_delta())['delta'] or 0
+
+
+def like_count(target, object_id):
+    """The counter column plus buffered toggles, in one query."""
+    model = Comment if target == COMMENT else CONTENT_MODELS[target]
+    toggles = LikeToggle.objects.filter(target=target, object_id=OuterRef('pk')).order_by().values('object_id')
+    delta = toggles.annotate(delta=_net_delta()).values('delta')
+    row = model.objects.filter(pk=object_id).annotate(
+        pending=Coalesce(Subquery(delta[:1]), Value(0), output_field=IntegerField())
+    ).values_list('likes_count', 'pending').first()
+    return max(sum(row), 0) if row else 0
+
+
+def pending_comment_likes(user):
+    """``{comment_id: liked}`` for the user's buffered comment toggles."""
+    toggles = LikeToggle.objects.filter(user=user, target=COMMENT)
+    return dict(toggles.values_list('object_id', 'liked'))
+
+
+def _flush_due(target, object_id):
+    oldest = LikeToggle.objects.order_by('id').values_list('created_at', flat=True).first()
+    if oldest is not None and oldest <= timezone.now() - FLUSH_AFTER:
+        return True
+    return LikeToggle.objects.filter(target=target, object_id=object_id).count() >= FLUSH_THRESHOLD
+
+
+def record_toggle(user, target, object_id):
+    """Buffer a like toggle and return ``(liked, count)``."""
+    pending = LikeToggle.objects.filter(user=user, target=target, object_id=object_id)
+    toggle = pending.first()
+    # Zero rows deleted means a flush applied the toggle first; the stored
+    # state is then current and the toggle is buffered against it.
+    if toggle is not None and pending.filter(pk=toggle.pk).delete()[0]:
+        liked = not toggle.liked
+    else:
+        liked = not _stored(user, target, object_id)
+        try:
+            with transaction.atomic():
+                LikeToggle.objects.create(user=user, target=target, object_id=object_id, liked=liked)
+        except IntegrityError:
+            # A concurrent toggle by the same user buffered first; keep its state.
+            liked = is_liked(user, target, object_id)
+    if _flush_due(target, object_id):
+        flush_toggles(max_batches=1)
+    return liked, like_count(target, object_id)
+
+
+def _pairs(likes, field, pairs):
+    """The ``(object_id, user_id)`` pairs among ``pairs`` that have a like row."""
+    condition = Q()
+    for object_id, user_id in pairs:
+        condition |= Q(**{field: object_id, 'user_id': user_id})
+    return set(likes.filter(condition).values_list(field, 'user_id')) if pairs else set()
+
+
+def _apply(target, states):
+    """Apply ``{(object_id, user_id): liked}`` for one target."""
+    likes, field = _likes(target)
+    existing = _pairs(likes, field, states)
+
+    wanted = [pair for pair, liked in states.items() if liked and pair not in existing]
+    removed = [pair for pair, liked in states.items() if not liked and pair in existing]
+
+    if wanted:
+        model = likes.model
+        extra = {} if target == COMMENT else {'content_type': target}
+        model.objects.bulk_create(
+            [model(user_id=user_id, **{field: object_id}, **extra) for object_id, user_id in wanted],
+            ignore_conflicts=True,
+        )
+        # bulk_create skips the counter signals and cannot say which rows
+        # conflicted, so count the ones that are there now and were not before.
+        added = defaultdict(int)
+        for object_id, _ in _pairs(likes, field, wanted):
+            added[object_id] += 1
+        for object_id, count in added.items():
+            if target == COMMENT:
+                adjust_comment(object_id, 'likes_count', count)
+            else:
+                adjust_target(target, object_id, 'likes_count', count)
+    if removed:
+        # Deleting through the queryset sends post_delete for each row it
+        # actually removes, which decrements the counter.
+        condition = Q()
+        for object_id, user_id in removed:
+            condition |= Q(**{field: object_id, 'user_id': user_id})
+        likes.filter(condition).delete()
+
+
+def flush_toggles(batch_size=FLUSH_BATCH_SIZE, max_batches=None):
+    """Apply buffered toggles in id order. Returns the number flushed."""
+    flushed = batches = 0
+    while max_batches is None or batches < max_batches:
+        with transaction.atomic():
+            # A user has one toggle per object, so flushers that skip each
+            # other's locked rows never split one user's state between them.
+            batch = list(
+                LikeToggle.objects.select_for_update(skip_locked=True)
+                .order_by('id')
+                .values_list('id', 'target', 'object_id', 'user_id', 'liked')[:batch_size]
+            )
+            if not batch:
+                break
+            states = defaultdict(dict)
+            for _, target, object_id, user_id, liked in batch:
+                states[target][(object_id, user_id)] = liked
+            LikeToggle.objects.filter(id__in=[row[0] for row in batch]).delete()
+            for target, target_states in states.items():
+                _apply(target, target_states)
+        flushed += len(batch)
+        batches += 1
+    return flushed
@@ -0,0 +1,155 @@
+"""
+Per-user live events for the header badges and new notifications.
+
+Code that changes a badge or creates a notification calls ``publish`` (after
+the surrounding transaction commits). The configured broker hands the event
+to every open ``Subscription`` for that user; a ``None`` user broadcasts to
+everyone connected. Subscriptions are plain ``asyncio`` queues, so one ASGI
+worker can hold thousands of idle streams without a thread each.
+
+``LocalBroker`` fans out inside one process. ``RedisBroker`` relays events
+through Redis pub/sub so every worker sees them; select it with the
+``LIVE_EVENTS_BROKER`` setting.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+SUBSCRIPTION_QUEUE_SIZE = 100
+DEFAULT_BROKER = 'main_app.live.LocalBroker'
+
+
+class Subscription:
+    """One open stream's queue of events, bound to the loop that reads it."""
+
+    def __init__(self, broker, user_id):
+        self.broker = broker
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=SUBSCRIPTION_QUEUE_SIZE)
+
+    def put(self, event):
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # The stream's loop has shut down without unsubscribing.
+            self.close()
+
+    def _put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # A stalled client only needs the latest state; drop the oldest.
+            self.queue.get_nowait()
+            self.queue.put_nowait(event)
+
+    async def get(self, timeout=None):
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def get_nowait(self):
+        return self.queue.get_nowait()
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class LocalBroker:
+    """Fan events out to subscriptions in this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = {}
+
+    def subscribe(self, user_id):
+        subscription = Subscription(self, user_id)
+        with self._lock:
+            self._subscriptions.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id, set())
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                self._subscriptions.pop(subscription.user_id, None)
+
+    def deliver(self, user_id, event):
+        with self._lock:
+            if user_id is None:
+                targets = [sub for subs in self._subscriptions.values() for sub in subs]
+            else:
+                targets = list(self._subscriptions.get(user_id, ()))
+        for subscription in targets:
+            subscription.put(event)
+
+    def publish(self, user_id, event):
+        self.deliver(user_id, event)
+
+
+class RedisBroker(LocalBroker):
+    """Relay events through Redis pub/sub so every worker process delivers them."""
+
+    channel = 'live-events'
+
+    def __init__(self):
+        super().__init__()
+        import redis
+
+        self._redis = redis.Redis.from_url(settings.LIVE_EVENTS_REDIS_URL)
+        self._listener = None
+
+    def subscribe(self, user_id):
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(target=self._listen, name='live-events', daemon=True)
+                self._listener.start()
+        return super().subscribe(user_id)
+
+    def publish(self, user_id, event):
+        self._redis.publish(self.channel, json.dumps({'user_id': user_id, 'event': event}))
+
+    def _listen(self):
+        pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self.channel)
+        for message in pubsub.listen():
+            try:
+                payload = json.loads(message['data'])
+                self.deliver(payload['user_id'], payload['event'])
+            except (KeyError, TypeError, ValueError):
+                logger.warning('Ignoring malformed live event: %r', message)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = import_string(getattr(settings, 'LIVE_EVENTS_BROKER', DEFAULT_BROKER))()
+        return _broker
+
+
+def publish(user_ids, event):
+    """Send ``event`` to ``user_ids`` (``None`` for everyone) once the transaction commits."""
+    user_ids = [None] if user_ids is None else [user_id for user_id in user_ids if user_id is not None]
+
+    def send():
+        broker = get_broker()
+        for user_id in user_ids:
+            try:
+                broker.publish(user_id, event)
+            except Exception:
+                # Live updates are best effort; the next page load catches up.
+                logger.exception('Failed to publish live event')
+
+    transaction.on_commit(send)
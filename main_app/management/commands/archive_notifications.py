@@ -0,0 +1,53 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from main_app.retention import (
+    ARCHIVE_BATCH_SIZE,
+    DEFAULT_RETENTION_DAYS,
+    SOURCES,
+    JsonlArchive,
+    archive_read,
+    retention_cutoff,
+    table_sizes,
+)
+
+
+class Command(BaseCommand):
+    help = 'Move read notifications past the retention window out of the notification tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=getattr(settings, 'NOTIFICATION_RETENTION_DAYS', DEFAULT_RETENTION_DAYS),
+            help='Archive read notifications created more than this many days ago',
+        )
+        parser.add_argument('--batch-size', type=int, default=ARCHIVE_BATCH_SIZE, help='Rows moved per transaction')
+        parser.add_argument(
+            '--source', action='append', choices=list(SOURCES),
+            help='Notification table to archive (repeatable; default all)',
+        )
+        parser.add_argument(
+            '--jsonl', metavar='PATH', help='Append to this gzipped JSON Lines file instead of the archive table',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Only report table sizes')
+
+    def handle(self, *args, **options):
+        cutoff = retention_cutoff(options['days'])
+        self.report('Before' if not options['dry_run'] else 'Sizes', cutoff)
+        if options['dry_run']:
+            return
+        sink = JsonlArchive(options['jsonl']) if options['jsonl'] else None
+        for source in options['source'] or SOURCES:
+            moved = archive_read(source, cutoff, batch_size=options['batch_size'], sink=sink)
+            self.stdout.write(f'Archived {moved} read {source} notifications.')
+        self.report('After', cutoff)
+        self.stdout.write(self.style.SUCCESS('Notification tables are within the retention window.'))
+
+    def report(self, heading, cutoff):
+        self.stdout.write(f'{heading} (archiving read notifications created before {cutoff:%Y-%m-%d %H:%M}):')
+        for size in table_sizes(cutoff):
+            line = f"  {size['table']}: {size['rows']} rows"
+            if size['unread'] is not None:
+                line += f", {size['unread']} unread, {size['archivable']} to archive"
+            if size['bytes'] is not None:
+                line += f", {size['bytes'] / 1024:.1f} KiB"
+            self.stdout.write(line)
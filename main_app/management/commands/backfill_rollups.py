@@ -0,0 +1,25 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from main_app.rollups import METRICS, backfill
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily analytics rollups from the raw tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--metric', action='append', choices=sorted(METRICS), help='Only rebuild these metrics')
+        parser.add_argument('--days', type=int, help='Only rebuild the trailing number of days')
+
+    def handle(self, *args, **options):
+        since = None
+        if options['days']:
+            since = timezone.localdate() - timedelta(days=options['days'] - 1)
+        metrics = options['metric'] or list(METRICS)
+        self.stdout.write(f"Rebuilding daily rollups{f' since {since}' if since else ''}...")
+        for metric in metrics:
+            written = backfill(metric, since=since)
+            self.stdout.write(f'  {metric}: {written} rows')
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {len(metrics)} metrics.'))
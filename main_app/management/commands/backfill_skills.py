@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from main_app.models import Skill
+from main_app.skills import backfill_skills
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the normalized skill links from each alumni profile'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--prune', action='store_true',
+            help='Delete skills that are no longer listed on any profile',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('Linking alumni skills...')
+        total = backfill_skills(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Linked skills for {total} alumni profiles.'))
+
+        if options['prune']:
+            deleted, _ = Skill.objects.filter(alumni_links__isnull=True).delete()
+            self.stdout.write(self.style.SUCCESS(f'Removed {deleted} unused skills.'))
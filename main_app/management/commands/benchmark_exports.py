@@ -0,0 +1,72 @@
+import time
+import tracemalloc
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from main_app.excel_utils import build_alumni_workbook, save_to_tempfile
+from main_app.exports import alumni_export_queryset
+from main_app.models import Alumni
+from main_app.streaming_exports import ENCODERS, export_rows
+
+
+class Command(BaseCommand):
+    help = 'Compare the XLSX alumni export with the streaming CSV and JSON Lines exports'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=20000, help='Temporary alumni to export')
+        parser.add_argument('--memory', action='store_true', help='Also trace peak Python memory (much slower)')
+
+    def handle(self, *args, **options):
+        run_id = uuid.uuid4().hex[:8]
+        params = {'search': f'export-bench-{run_id}'}
+        # Everything is created inside a transaction that is rolled back at the end.
+        with transaction.atomic():
+            self._create_alumni(run_id, options['rows'])
+            self._measure('xlsx', options, lambda: self._xlsx(params))
+            for fmt, encode in ENCODERS.items():
+                self._measure(fmt, options, lambda encode=encode: self._stream(encode, params))
+            transaction.set_rollback(True)
+
+    def _create_alumni(self, run_id, rows):
+        User = get_user_model()
+        # bulk_create skips the profile signals, so the alumni rows are added directly.
+        users = User.objects.bulk_create(
+            [
+                User(email=f'export-bench-{run_id}-{index}@example.invalid', first_name='Bench', last_name=str(index))
+                for index in range(rows)
+            ],
+            batch_size=1000,
+        )
+        if users[0].pk is None:
+            users = User.objects.filter(email__startswith=f'export-bench-{run_id}-').order_by('pk')
+        Alumni.objects.bulk_create(
+            [
+                Alumni(admin=user, student_id=f'B{run_id}{index:07d}', job_title='Engineer', current_city='Kampala')
+                for index, user in enumerate(users)
+            ],
+            batch_size=1000,
+        )
+
+    def _xlsx(self, params):
+        _, workbook = build_alumni_workbook(alumni_export_queryset(params), 'all')
+        with save_to_tempfile(workbook) as output:
+            return len(output.read())
+
+    def _stream(self, encode, params):
+        names, rows = export_rows('alumni', params)
+        return sum(len(chunk.encode()) for chunk in encode(names, rows))
+
+    def _measure(self, label, options, export):
+        if options['memory']:
+            tracemalloc.start()
+        started = time.perf_counter()
+        size = export()
+        elapsed = time.perf_counter() - started
+        line = f'{label}: {options["rows"]} rows in {elapsed:.2f}s ({options["rows"] / elapsed:.0f} rows/s), {size / 1e6:.1f} MB'
+        if options['memory']:
+            line += f', peak {tracemalloc.get_traced_memory()[1] / 1e6:.1f} MB'
+            tracemalloc.stop()
+        self.stdout.write(line)
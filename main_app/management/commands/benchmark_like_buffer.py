@@ -0,0 +1,104 @@
+import threading
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection, connections
+
+from main_app.likes import COMMENT, flush_toggles, record_toggle
+from main_app.models import Comment, CommentLike
+
+
+def _direct_toggle(user, comment_id):
+    """The pre-buffer toggle: get_or_create, optional delete, counter read."""
+    like, created = CommentLike.objects.get_or_create(user=user, comment_id=comment_id)
+    if not created:
+        like.delete()
+    Comment.objects.filter(pk=comment_id).values_list('likes_count', flat=True).first()
+
+
+class Command(BaseCommand):
+    help = 'Measure like toggle throughput under concurrency and check the resulting likes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=40)
+        parser.add_argument('--toggles', type=int, default=10, help='Toggles per user')
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--direct', action='store_true', help='Also run the unbuffered toggle path')
+
+    def handle(self, *args, **options):
+        run_id = uuid.uuid4().hex[:8]
+        User = get_user_model()
+        users = [
+            User.objects.create_user(email=f'like-bench-{run_id}-{index}@example.invalid', password=None)
+            for index in range(options['users'])
+        ]
+        try:
+            self._run('buffered', users, options, self._buffered)
+            if options['direct']:
+                self._run('direct', users, options, _direct_toggle)
+        finally:
+            # Cascades to the benchmark comments, likes and pending toggles.
+            User.objects.filter(pk__in=[user.pk for user in users]).delete()
+
+    def _buffered(self, user, comment_id):
+        record_toggle(user, COMMENT, comment_id)
+
+    def _run(self, label, users, options, toggle):
+        comment = Comment.objects.create(user=users[0], content_type='news', object_id=0, content='Like benchmark')
+        # Odd-indexed users toggle once more, so half of them end up liking.
+        plan = {user.pk: options['toggles'] + index % 2 for index, user in enumerate(users)}
+        applied = {user.pk: 0 for user in users}
+        errors = []
+        row_writes = []
+
+        def count_row_writes(execute, sql, params, many, context):
+            # Writes to the liked comment's row are what contend under load.
+            if sql.startswith(f'UPDATE "{Comment._meta.db_table}"'):
+                row_writes.append(sql)
+            return execute(sql, params, many, context)
+
+        def worker(assigned):
+            try:
+                with connection.execute_wrapper(count_row_writes):
+                    self._toggle_all(assigned, plan, applied, errors, toggle, comment.pk)
+            finally:
+                connections.close_all()
+
+        threads = [
+            threading.Thread(target=worker, args=(users[offset::options['threads']],))
+            for offset in range(options['threads'])
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        with connection.execute_wrapper(count_row_writes):
+            flush_toggles()
+
+        expected = {pk for pk, count in applied.items() if count % 2}
+        stored = set(CommentLike.objects.filter(comment=comment).values_list('user_id', flat=True))
+        comment.refresh_from_db()
+        total = sum(applied.values())
+        self.stdout.write(
+            f'{label}: {total} toggles in {elapsed:.2f}s ({total / elapsed:.0f}/s), '
+            f'{len(row_writes)} counter row writes, {len(errors)} errors'
+        )
+        if stored == expected and comment.likes_count == len(stored):
+            self.stdout.write(self.style.SUCCESS(f'{label}: {len(stored)} likes stored, counter matches'))
+        else:
+            self.stdout.write(self.style.ERROR(
+                f'{label}: expected {len(expected)} likes, stored {len(stored)}, counter {comment.likes_count}'
+            ))
+
+    def _toggle_all(self, assigned, plan, applied, errors, toggle, comment_id):
+        for user in assigned:
+            for _ in range(plan[user.pk]):
+                try:
+                    toggle(user, comment_id)
+                    applied[user.pk] += 1
+                except DatabaseError as exc:
+                    errors.append(exc)
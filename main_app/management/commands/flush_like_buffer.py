@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from main_app.likes import FLUSH_BATCH_SIZE, flush_toggles
+
+
+class Command(BaseCommand):
+    help = 'Apply buffered like and comment-like toggles'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=FLUSH_BATCH_SIZE)
+        parser.add_argument(
+            '--interval', type=float,
+            help='Keep running, flushing the buffer every this many seconds',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('Flushing the like buffer...')
+        while True:
+            total = flush_toggles(batch_size=options['batch_size'])
+            if options['interval'] is None:
+                break
+            if total:
+                self.stdout.write(f'Applied {total} buffered toggles.')
+            time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS(f'Applied {total} buffered toggles.'))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from main_app.conversations import rebuild_conversations
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the messaging inbox conversations from messages and replies'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        self.stdout.write('Rebuilding conversations...')
+        total = rebuild_conversations(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {total} conversations.'))
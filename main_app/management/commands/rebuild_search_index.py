@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from main_app.search import rebuild_index, search_backend
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the alumni directory full-text search index'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'Rebuilding alumni search index ({search_backend()} backend)...')
+        total = rebuild_index(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {total} alumni profiles.'))
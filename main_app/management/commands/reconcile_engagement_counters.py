@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from main_app.counters import reconcile_counters
+
+
+class Command(BaseCommand):
+    help = 'Recompute like, comment and reply counters and repair any drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        self.stdout.write('Reconciling engagement counters...')
+        repaired = reconcile_counters(batch_size=options['batch_size'])
+        for label, count in repaired.items():
+            self.stdout.write(f'  {label}: {count} repaired')
+        self.stdout.write(self.style.SUCCESS(f'Repaired {sum(repaired.values())} counters.'))
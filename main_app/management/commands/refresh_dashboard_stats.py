@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from main_app.dashboard import SECTIONS, refresh
+
+
+class Command(BaseCommand):
+    help = 'Recompute the cached dashboard statistics snapshot'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--section', action='append', choices=sorted(SECTIONS), help='Only refresh these sections')
+
+    def handle(self, *args, **options):
+        self.stdout.write('Refreshing dashboard statistics...')
+        snapshot = refresh(options['section'])
+        refreshed = options['section'] or list(SECTIONS)
+        for name in refreshed:
+            values = ', '.join(f'{key}={value}' for key, value in snapshot['sections'][name]['values'].items())
+            self.stdout.write(f'  {name}: {values}')
+        self.stdout.write(self.style.SUCCESS(f'Refreshed {len(refreshed)} sections.'))
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from main_app.exports import purge_expired, requeue_stale, run_pending
+
+
+class Command(BaseCommand):
+    help = 'Build queued spreadsheet export jobs and delete expired ones'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run the queued jobs once and exit')
+        parser.add_argument('--interval', type=float, default=2.0, help='Seconds between queue polls')
+
+    def handle(self, *args, **options):
+        self.stdout.write('Waiting for export jobs...' if not options['once'] else 'Running queued export jobs...')
+        while True:
+            purged = purge_expired()
+            stale = requeue_stale()
+            if stale:
+                self.stdout.write(f'Requeued {len(stale)} stalled export jobs.')
+            ran = run_pending()
+            if ran or purged:
+                self.stdout.write(f'Built {ran} export jobs, deleted {purged} expired.')
+            if options['once']:
+                break
+            if not ran:
+                time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS('Export queue is empty.'))
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from main_app.fanout import requeue_failed, requeue_stale, run_pending
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued coordinator notification broadcasts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run the queued broadcasts once and exit')
+        parser.add_argument('--interval', type=float, default=2.0, help='Seconds between queue polls')
+        parser.add_argument(
+            '--retry-failed', action='store_true',
+            help='Requeue failed broadcasts first; they resume after the last delivered chunk',
+        )
+
+    def handle(self, *args, **options):
+        if options['retry_failed']:
+            requeued = requeue_failed()
+            self.stdout.write(f'Requeued {requeued} failed broadcasts.')
+        self.stdout.write('Waiting for broadcasts...' if not options['once'] else 'Running queued broadcasts...')
+        while True:
+            stale = requeue_stale()
+            if stale:
+                self.stdout.write(f'Requeued {len(stale)} stalled broadcasts.')
+            ran = run_pending()
+            if ran:
+                self.stdout.write(f'Delivered {ran} broadcasts.')
+            if options['once']:
+                break
+            if not ran:
+                time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS('Broadcast queue is empty.'))
@@ -37,6 +37,8 @@ class LoginCheckMiddleWare(MiddlewareMixin):
                 'job_detail',
                 'event_detail',
                 'news_detail',
+                'comment_page',
+                'comment_replies',
                 'showFirebaseJS',
                 'check_email_availability',
             }
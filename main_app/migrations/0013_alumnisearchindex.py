@@ -0,0 +1,123 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+FTS_TABLE = 'main_app_alumnisearchindex_fts'
+CONTENT_TABLE = 'main_app_alumnisearchindex'
+
+SQLITE_FORWARD = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        name, company, skills, industry,
+        content='{CONTENT_TABLE}', content_rowid='alumni_id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {CONTENT_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name, company, skills, industry)
+        VALUES (new.alumni_id, new.name, new.company, new.skills, new.industry);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {CONTENT_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, company, skills, industry)
+        VALUES ('delete', old.alumni_id, old.name, old.company, old.skills, old.industry);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE ON {CONTENT_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, company, skills, industry)
+        VALUES ('delete', old.alumni_id, old.name, old.company, old.skills, old.industry);
+        INSERT INTO {FTS_TABLE}(rowid, name, company, skills, industry)
+        VALUES (new.alumni_id, new.name, new.company, new.skills, new.industry);
+    END
+    """,
+]
+
+SQLITE_REVERSE = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+MYSQL_FORWARD = [
+    f"ALTER TABLE {CONTENT_TABLE} ADD FULLTEXT INDEX main_app_alumnisearchindex_ft (name, company, skills, industry)",
+]
+
+MYSQL_REVERSE = [
+    f"ALTER TABLE {CONTENT_TABLE} DROP INDEX main_app_alumnisearchindex_ft",
+]
+
+
+def _run(schema_editor, statements):
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def create_fulltext_structures(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        _run(schema_editor, SQLITE_FORWARD)
+    elif vendor == 'mysql':
+        _run(schema_editor, MYSQL_FORWARD)
+
+
+def drop_fulltext_structures(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        _run(schema_editor, SQLITE_REVERSE)
+    elif vendor == 'mysql':
+        _run(schema_editor, MYSQL_REVERSE)
+
+
+def backfill_search_index(apps, schema_editor):
+    Alumni = apps.get_model('main_app', 'Alumni')
+    AlumniSearchIndex = apps.get_model('main_app', 'AlumniSearchIndex')
+    alias = schema_editor.connection.alias
+
+    batch = []
+    queryset = Alumni.objects.using(alias).select_related('admin', 'current_company').order_by('pk')
+    for alumni in queryset.iterator(chunk_size=1000):
+        batch.append(AlumniSearchIndex(
+            alumni_id=alumni.pk,
+            name=f"{alumni.admin.first_name} {alumni.admin.last_name}".strip(),
+            company=alumni.current_company.name if alumni.current_company else '',
+            skills=alumni.skills or '',
+            industry=alumni.industry or '',
+        ))
+        if len(batch) >= 1000:
+            AlumniSearchIndex.objects.using(alias).bulk_create(batch)
+            batch = []
+    if batch:
+        AlumniSearchIndex.objects.using(alias).bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0012_follow_friendrequest_friendship_notification'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AlumniSearchIndex',
+            fields=[
+                ('alumni', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_index', serialize=False, to='main_app.alumni')),
+                ('name', models.CharField(blank=True, max_length=300)),
+                ('company', models.CharField(blank=True, max_length=200)),
+                ('skills', models.TextField(blank=True)),
+                ('industry', models.CharField(blank=True, max_length=100)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Alumni Search Index',
+                'verbose_name_plural': 'Alumni Search Index',
+            },
+        ),
+        migrations.RunPython(create_fulltext_structures, drop_fulltext_structures),
+        migrations.RunPython(backfill_search_index, migrations.RunPython.noop),
+    ]
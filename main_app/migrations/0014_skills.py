@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:12
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_skills(apps, schema_editor):
+    Alumni = apps.get_model('main_app', 'Alumni')
+    Skill = apps.get_model('main_app', 'Skill')
+    AlumniSkill = apps.get_model('main_app', 'AlumniSkill')
+
+    skills = {}
+    links = []
+    for alumni_id, text in Alumni.objects.exclude(skills='').values_list('pk', 'skills').iterator():
+        seen = set()
+        for part in text.split(','):
+            name = re.sub(r'\s+', ' ', part).strip()[:100]
+            normalized = name.lower()
+            if not name or normalized in seen:
+                continue
+            seen.add(normalized)
+            if normalized not in skills:
+                skills[normalized] = Skill.objects.create(name=name, normalized_name=normalized)
+            links.append(AlumniSkill(alumni_id=alumni_id, skill=skills[normalized], position=len(seen) - 1))
+    AlumniSkill.objects.bulk_create(links, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0013_alumnisearchindex'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Skill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('normalized_name', models.CharField(max_length=100, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['normalized_name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='AlumniSkill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveSmallIntegerField(default=0)),
+                ('alumni', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='skill_links', to='main_app.alumni')),
+                ('skill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='alumni_links', to='main_app.skill')),
+            ],
+            options={
+                'ordering': ['alumni', 'position'],
+                'indexes': [models.Index(fields=['skill', 'alumni'], name='main_app_al_skill_i_7767ea_idx')],
+                'unique_together': {('alumni', 'skill')},
+            },
+        ),
+        migrations.RunPython(backfill_skills, migrations.RunPython.noop),
+    ]
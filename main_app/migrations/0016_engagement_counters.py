@@ -0,0 +1,83 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:21
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def _count(queryset, group_field):
+    counts = queryset.filter(**{group_field: OuterRef('pk')}).order_by().values(group_field)
+    return Coalesce(
+        Subquery(counts.annotate(total=Count('pk')).values('total')[:1]),
+        Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def backfill_counters(apps, schema_editor):
+    Like = apps.get_model('main_app', 'Like')
+    Comment = apps.get_model('main_app', 'Comment')
+    CommentLike = apps.get_model('main_app', 'CommentLike')
+    approved = Comment.objects.filter(is_approved=True)
+
+    for content_type, model_name in (('news', 'News'), ('job', 'JobPosting'), ('event', 'Event')):
+        model = apps.get_model('main_app', model_name)
+        model.objects.update(
+            likes_count=_count(Like.objects.filter(content_type=content_type), 'object_id'),
+            comments_count=_count(approved.filter(content_type=content_type), 'object_id'),
+        )
+    Comment.objects.update(
+        likes_count=_count(CommentLike.objects.all(), 'comment'),
+        replies_count=_count(approved, 'parent'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0015_recipient_prefix_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='replies_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='jobposting',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='jobposting',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='news',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='news',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
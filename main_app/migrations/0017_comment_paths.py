@@ -0,0 +1,66 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:24
+
+from django.db import migrations, models
+
+PATH_SEGMENT_WIDTH = 10
+MAX_DEPTH = 20
+
+
+def backfill_paths(apps, schema_editor):
+    Comment = apps.get_model('main_app', 'Comment')
+    parents = dict(Comment.objects.values_list('pk', 'parent_id'))
+
+    placed = {}
+
+    def place(pk):
+        # Iterative walk up to the nearest placed ancestor, then back down.
+        chain = []
+        current = pk
+        while current is not None and current not in placed:
+            chain.append(current)
+            current = parents.get(current)
+        base = placed.get(current)
+        for node in reversed(chain):
+            if base is None:
+                base = (str(node).zfill(PATH_SEGMENT_WIDTH), 0, None)
+            else:
+                base_path, base_depth, base_parent = base
+                if base_depth + 1 >= MAX_DEPTH:
+                    grandparent_path = base_path.rsplit('/', 1)[0]
+                    base = (f"{grandparent_path}/{str(node).zfill(PATH_SEGMENT_WIDTH)}", base_depth, base_parent)
+                else:
+                    base = (f"{base_path}/{str(node).zfill(PATH_SEGMENT_WIDTH)}", base_depth + 1, parents[node])
+            placed[node] = base
+
+    batch = []
+    for comment in Comment.objects.only('pk', 'parent_id', 'path', 'depth').iterator():
+        place(comment.pk)
+        comment.path, comment.depth, parent_id = placed[comment.pk]
+        if comment.depth:
+            comment.parent_id = parent_id
+        batch.append(comment)
+        if len(batch) >= 500:
+            Comment.objects.bulk_update(batch, ['path', 'depth', 'parent'])
+            batch = []
+    if batch:
+        Comment.objects.bulk_update(batch, ['path', 'depth', 'parent'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0016_engagement_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['content_type', 'object_id', 'path'], name='main_app_co_content_8eb58c_idx'),
+        ),
+        migrations.RunPython(backfill_paths, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:32
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0018_comment_thread_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LikeToggle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('target', models.CharField(choices=[('news', 'News'), ('job', 'Job'), ('event', 'Event'), ('comment', 'Comment')], max_length=10)),
+                ('object_id', models.PositiveIntegerField()),
+                ('liked', models.BooleanField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Like Toggle',
+                'verbose_name_plural': 'Like Toggles',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['target', 'object_id'], name='main_app_li_target_fa3e99_idx'), models.Index(fields=['user', 'target', 'object_id'], name='main_app_li_user_id_a7c864_idx')],
+            },
+        ),
+    ]
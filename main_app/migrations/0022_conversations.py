@@ -0,0 +1,76 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+SENDER_PROFILES = {
+    'alumni': 'sender_alumni',
+    'admin': 'sender_admin',
+    'coordinator': 'sender_coordinator',
+}
+
+
+def _snippet(content):
+    text = ' '.join((content or '').split())
+    return text if len(text) <= 160 else text[:159] + '…'
+
+
+def backfill_conversations(apps, schema_editor):
+    Message = apps.get_model('main_app', 'Message')
+    MessageReply = apps.get_model('main_app', 'MessageReply')
+    Conversation = apps.get_model('main_app', 'Conversation')
+
+    latest = {}
+    for reply in MessageReply.objects.order_by('created_at').values('message_id', 'created_at', 'content').iterator():
+        latest[reply['message_id']] = reply
+
+    rows = []
+    for message in Message.objects.values(
+        'pk', 'sender_type', 'recipient__admin_id', 'subject', 'content', 'created_at', 'status',
+        *(f'{profile}__admin_id' for profile in SENDER_PROFILES.values()),
+    ).iterator():
+        sender_id = message.get(f"{SENDER_PROFILES.get(message['sender_type'])}__admin_id")
+        if sender_id is None:
+            continue
+        last = latest.get(message['pk'], message)
+        rows.append(Conversation(
+            message_id=message['pk'],
+            sender_id=sender_id,
+            recipient_id=message['recipient__admin_id'],
+            sender_type=message['sender_type'],
+            subject=message['subject'],
+            last_message_at=last['created_at'],
+            last_snippet=_snippet(last['content']),
+            recipient_unread=0 if message['status'] == 'read' else 1,
+        ))
+    Conversation.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0021_export_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Conversation',
+            fields=[
+                ('message', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='conversation', serialize=False, to='main_app.message')),
+                ('sender_type', models.CharField(choices=[('alumni', 'Alumni'), ('admin', 'Admin'), ('coordinator', 'Coordinator')], max_length=20)),
+                ('subject', models.CharField(max_length=200)),
+                ('last_message_at', models.DateTimeField()),
+                ('last_snippet', models.CharField(blank=True, max_length=160)),
+                ('sender_unread', models.PositiveIntegerField(default=0)),
+                ('recipient_unread', models.PositiveIntegerField(default=0)),
+                ('recipient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='received_conversations', to=settings.AUTH_USER_MODEL)),
+                ('sender', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='started_conversations', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-last_message_at'],
+                'indexes': [models.Index(fields=['sender', '-last_message_at'], name='conversation_sender_idx'), models.Index(fields=['recipient', '-last_message_at'], name='conversation_recipient_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_conversations, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0022_conversations'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='alumni',
+            index=models.Index(fields=['privacy_level'], name='main_app_al_privacy_ccfa8d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['content_type', 'object_id', 'is_approved', 'parent'], name='main_app_co_content_ad13fa_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['status', 'start_date'], name='main_app_ev_status_9beea4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobposting',
+            index=models.Index(fields=['is_active', 'created_at'], name='main_app_jo_is_acti_ea5a33_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='like',
+            index=models.Index(fields=['content_type', 'object_id'], name='main_app_li_content_5697b1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['recipient', 'status'], name='main_app_me_recipie_1ddfc6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['recipient', 'created_at'], name='main_app_me_recipie_523f0f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['sender_type', 'sender_alumni', 'created_at'], name='main_app_me_sender__06bbff_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='news',
+            index=models.Index(fields=['is_published', 'publish_date'], name='main_app_ne_is_publ_b493e3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notificationalumni',
+            index=models.Index(fields=['alumni', 'is_read', 'created_at'], name='main_app_no_alumni__f26dbc_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:35
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0024_notification_broadcasts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedNotification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('alumni', 'Alumni Notification'), ('coordinator', 'Coordinator Notification'), ('social', 'Social Notification')], max_length=20)),
+                ('source_id', models.PositiveIntegerField()),
+                ('notification_type', models.CharField(blank=True, max_length=20)),
+                ('title', models.CharField(blank=True, max_length=200)),
+                ('message', models.TextField(blank=True)),
+                ('link_url', models.URLField(blank=True)),
+                ('created_at', models.DateTimeField()),
+                ('read_at', models.DateTimeField(blank=True, null=True)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('recipient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_notifications', to=settings.AUTH_USER_MODEL)),
+                ('sender', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Archived Notification',
+                'verbose_name_plural': 'Archived Notifications',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['recipient', 'created_at'], name='main_app_ar_recipie_365a62_idx')],
+                'unique_together': {('source', 'source_id')},
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-17 09:12
+
+from django.db import migrations
+
+
+def collapse_toggles(apps, schema_editor):
+    """Keep one toggle per user and object: the last, and only if it changes the stored state."""
+    LikeToggle = apps.get_model('main_app', 'LikeToggle')
+    Like = apps.get_model('main_app', 'Like')
+    CommentLike = apps.get_model('main_app', 'CommentLike')
+
+    latest = {}
+    for pk, user_id, target, object_id, liked in LikeToggle.objects.order_by('id').values_list(
+        'pk', 'user_id', 'target', 'object_id', 'liked'
+    ):
+        latest[(user_id, target, object_id)] = (pk, liked)
+
+    keep = []
+    for (user_id, target, object_id), (pk, liked) in latest.items():
+        if target == 'comment':
+            stored = CommentLike.objects.filter(user_id=user_id, comment_id=object_id).exists()
+        else:
+            stored = Like.objects.filter(user_id=user_id, content_type=target, object_id=object_id).exists()
+        if liked != stored:
+            keep.append(pk)
+    LikeToggle.objects.exclude(pk__in=keep).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0027_exportjob_heartbeat_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(collapse_toggles, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='liketoggle',
+            name='main_app_li_user_id_a7c864_idx',
+        ),
+        migrations.AlterUniqueTogether(
+            name='liketoggle',
+            unique_together={('user', 'target', 'object_id')},
+        ),
+    ]
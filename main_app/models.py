@@ -2,7 +2,8 @@ from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import UserManager
 from django.dispatch import receiver
 from django.db.models.signals import post_save
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Lower
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.utils import timezone
@@ -132,6 +133,13 @@ class CustomUser(AbstractUser):
     class Meta:
         verbose_name = "User"
         verbose_name_plural = "Users"
+        indexes = [
+            # Back case-insensitive prefix lookups in the recipient typeahead.
+            models.Index(Lower('first_name'), name='user_first_name_lower_idx'),
+            models.Index(Lower('last_name'), name='user_last_name_lower_idx'),
+            models.Index(Lower('email'), name='user_email_lower_idx'),
+            models.Index(fields=['date_joined']),
+        ]
 
 
 class Admin(models.Model):
@@ -335,12 +343,11 @@ class Alumni(models.Model):
     
     def generate_student_id(self):
         """Generate a unique student ID based on the class level and sequential number"""
-        if not self.graduation_year:
-            return f"COSAUNK{timezone.now().year}{str(self.pk or '').zfill(3)}"
-        
-        level_code = self.graduation_year.short_code
-        prefix = f"COSA{level_code}"
-        
+        if self.graduation_year:
+            prefix = f"COSA{self.graduation_year.short_code}"
+        else:
+            prefix = f"COSAUNK{timezone.now().year}"
+
         existing_alumni = Alumni.objects.filter(
             graduation_year=self.graduation_year,
             student_id__startswith=prefix
@@ -377,6 +384,57 @@ class Alumni(models.Model):
         ordering = ['graduation_year__display_order', 'admin__last_name']
         verbose_name = "Alumni"
         verbose_name_plural = "Alumni"
+        indexes = [models.Index(fields=['privacy_level'])]
+
+
+class AlumniSearchIndex(models.Model):
+    """Denormalized search document for an alumni profile.
+
+    Rows are kept in sync by ``main_app.search``. On SQLite an FTS5 table
+    mirrors this table through triggers; on MySQL a FULLTEXT index covers
+    the text columns directly.
+    """
+    alumni = models.OneToOneField(Alumni, on_delete=models.CASCADE, primary_key=True, related_name='search_index')
+    name = models.CharField(max_length=300, blank=True)
+    company = models.CharField(max_length=200, blank=True)
+    skills = models.TextField(blank=True)
+    industry = models.CharField(max_length=100, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Search index for alumni #{self.alumni_id}"
+
+    class Meta:
+        verbose_name = "Alumni Search Index"
+        verbose_name_plural = "Alumni Search Index"
+
+
+class Skill(models.Model):
+    """A distinct skill listed on one or more alumni profiles."""
+    name = models.CharField(max_length=100)
+    normalized_name = models.CharField(max_length=100, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
+
+    class Meta:
+        ordering = ['normalized_name']
+
+
+class AlumniSkill(models.Model):
+    """Links an alumni profile to a skill; maintained by ``main_app.skills``."""
+    alumni = models.ForeignKey(Alumni, on_delete=models.CASCADE, related_name='skill_links')
+    skill = models.ForeignKey(Skill, on_delete=models.CASCADE, related_name='alumni_links')
+    position = models.PositiveSmallIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.alumni} - {self.skill}"
+
+    class Meta:
+        ordering = ['alumni', 'position']
+        unique_together = ['alumni', 'skill']
+        indexes = [models.Index(fields=['skill', 'alumni'])]
 
 
 class Event(models.Model):
@@ -426,6 +484,10 @@ class Event(models.Model):
     organizer = models.ForeignKey(AlumniCoordinator, on_delete=models.CASCADE)
     target_graduation_years = models.ManyToManyField(GraduationYear, blank=True)
     
+    # Engagement counters, kept in sync by main_app.counters
+    likes_count = models.PositiveIntegerField(default=0, editable=False)
+    comments_count = models.PositiveIntegerField(default=0, editable=False)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -447,6 +509,10 @@ class Event(models.Model):
         ordering = ['-start_date']
         verbose_name = "Event"
         verbose_name_plural = "Events"
+        indexes = [
+            models.Index(fields=['created_at']),
+            models.Index(fields=['status', 'start_date']),
+        ]
 
 
 class EventRegistration(models.Model):
@@ -472,6 +538,7 @@ class EventRegistration(models.Model):
         ordering = ['-registration_date']
         verbose_name = "Event Registration"
         verbose_name_plural = "Event Registrations"
+        indexes = [models.Index(fields=['registration_date'])]
 
 
 class JobPosting(models.Model):
@@ -516,6 +583,10 @@ class JobPosting(models.Model):
     is_active = models.BooleanField(default=True)
     is_featured = models.BooleanField(default=False)
     
+    # Engagement counters, kept in sync by main_app.counters
+    likes_count = models.PositiveIntegerField(default=0, editable=False)
+    comments_count = models.PositiveIntegerField(default=0, editable=False)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -532,6 +603,10 @@ class JobPosting(models.Model):
         ordering = ['-created_at']
         verbose_name = "Job Posting"
         verbose_name_plural = "Job Postings"
+        indexes = [
+            models.Index(fields=['created_at']),
+            models.Index(fields=['is_active', 'created_at']),
+        ]
 
 
 class JobApplication(models.Model):
@@ -561,6 +636,7 @@ class JobApplication(models.Model):
         ordering = ['-application_date']
         verbose_name = "Job Application"
         verbose_name_plural = "Job Applications"
+        indexes = [models.Index(fields=['application_date'])]
 
 
 class Donation(models.Model):
@@ -609,6 +685,7 @@ class Donation(models.Model):
         ordering = ['-created_at']
         verbose_name = "Donation"
         verbose_name_plural = "Donations"
+        indexes = [models.Index(fields=['payment_status', 'created_at'])]
 
 
 class MentorshipProgram(models.Model):
@@ -676,6 +753,10 @@ class News(models.Model):
     slug = models.SlugField(unique=True, blank=True)
     meta_description = models.CharField(max_length=160, blank=True)
     
+    # Engagement counters, kept in sync by main_app.counters
+    likes_count = models.PositiveIntegerField(default=0, editable=False)
+    comments_count = models.PositiveIntegerField(default=0, editable=False)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -686,6 +767,7 @@ class News(models.Model):
         ordering = ['-created_at']
         verbose_name = "News Article"
         verbose_name_plural = "News Articles"
+        indexes = [models.Index(fields=['is_published', 'publish_date'])]
 
 
 class Message(models.Model):
@@ -777,6 +859,11 @@ class Message(models.Model):
         ordering = ['-created_at']
         verbose_name = "Message"
         verbose_name_plural = "Messages"
+        indexes = [
+            models.Index(fields=['recipient', 'status']),
+            models.Index(fields=['recipient', 'created_at']),
+            models.Index(fields=['sender_type', 'sender_alumni', 'created_at']),
+        ]
 
 
 class MessageReply(models.Model):
@@ -845,6 +932,31 @@ class MessageReply(models.Model):
         return False
 
 
+class Conversation(models.Model):
+    """Inbox row for a message thread, kept current as replies are written."""
+    SNIPPET_LENGTH = 160
+
+    message = models.OneToOneField(Message, on_delete=models.CASCADE, primary_key=True, related_name='conversation')
+    sender = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='started_conversations')
+    recipient = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='received_conversations')
+    sender_type = models.CharField(max_length=20, choices=Message.SENDER_TYPES)
+    subject = models.CharField(max_length=200)
+    last_message_at = models.DateTimeField()
+    last_snippet = models.CharField(max_length=SNIPPET_LENGTH, blank=True)
+    sender_unread = models.PositiveIntegerField(default=0)
+    recipient_unread = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-last_message_at']
+        indexes = [
+            models.Index(fields=['sender', '-last_message_at'], name='conversation_sender_idx'),
+            models.Index(fields=['recipient', '-last_message_at'], name='conversation_recipient_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} ({self.last_message_at:%Y-%m-%d %H:%M})"
+
+
 class AlumniGroup(models.Model):
     GROUP_TYPES = [
         ('graduation_year', 'Completion Year'),
@@ -922,6 +1034,10 @@ class NotificationAlumni(models.Model):
     message = models.TextField()
     notification_type = models.CharField(max_length=20, choices=NOTIFICATION_TYPES, default='system')
     is_read = models.BooleanField(default=False)
+    # Set when delivered as part of a coordinator broadcast
+    broadcast = models.ForeignKey(
+        'NotificationBroadcast', on_delete=models.SET_NULL, null=True, blank=True, related_name='notifications'
+    )
     
     # Optional links
     link_url = models.URLField(blank=True)
@@ -936,6 +1052,9 @@ class NotificationAlumni(models.Model):
         ordering = ['-created_at']
         verbose_name = "Alumni Notification"
         verbose_name_plural = "Alumni Notifications"
+        # One notification per alumnus per broadcast, so a retried fan-out cannot duplicate
+        unique_together = ['broadcast', 'alumni']
+        indexes = [models.Index(fields=['alumni', 'is_read', 'created_at'])]
 
 
 class NotificationCoordinator(models.Model):
@@ -1005,6 +1124,7 @@ class Like(models.Model):
         ordering = ['-created_at']
         verbose_name = "Like"
         verbose_name_plural = "Likes"
+        indexes = [models.Index(fields=['content_type', 'object_id'])]
     
     def __str__(self):
         return f"{self.user.get_full_name()} liked {self.content_type} #{self.object_id}"
@@ -1025,45 +1145,99 @@ class Comment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
-    # For nested comments (replies)
+    # For nested comments (replies). ``path`` is the materialized path of
+    # zero-padded ids from the thread root, so ordering by it yields a thread
+    # in display order and a subtree is one contiguous range.
     parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='replies')
     depth = models.PositiveIntegerField(default=0)
+    path = models.CharField(max_length=255, blank=True, editable=False)
+    
+    # Counters kept in sync by main_app.counters
+    likes_count = models.PositiveIntegerField(default=0, editable=False)
+    replies_count = models.PositiveIntegerField(default=0, editable=False)
+    
+    PATH_SEGMENT_WIDTH = 10
+    MAX_DEPTH = 20  # keeps ``path`` within 255 characters
     
     class Meta:
         ordering = ['-created_at']
         verbose_name = "Comment"
         verbose_name_plural = "Comments"
+        indexes = [
+            models.Index(fields=['content_type', 'object_id', 'path']),
+            models.Index(fields=['content_type', 'object_id', 'depth']),
+            models.Index(fields=['content_type', 'object_id', 'is_approved', 'parent']),
+        ]
     
     def __str__(self):
         return f"Comment by {self.user.get_full_name()} on {self.content_type} #{self.object_id}"
     
+    @classmethod
+    def path_segment(cls, pk):
+        return str(pk).zfill(cls.PATH_SEGMENT_WIDTH)
+    
     @property
     def reply_count(self):
-        return self.replies.filter(is_approved=True).count()
+        return self.replies_count
     
     @property
     def like_count(self):
-        return CommentLike.objects.filter(comment=self).count()
+        return self.likes_count
     
     def get_replies(self):
+        # ``_thread_replies`` is preloaded by ``main_app.engagement`` when a
+        # whole thread is rendered at once.
+        if hasattr(self, '_thread_replies'):
+            return self._thread_replies
         return self.replies.filter(is_approved=True).order_by('created_at')
     
+    def get_descendants(self):
+        """Every reply below this comment, in thread order, as one range query."""
+        # '0' sorts directly after '/', so this range is exactly the subtree.
+        return Comment.objects.filter(
+            content_type=self.content_type,
+            object_id=self.object_id,
+            path__gt=f"{self.path}/",
+            path__lt=f"{self.path}0",
+        ).order_by('path')
+    
     def get_all_nested_replies(self):
-        """Get all nested replies recursively"""
-        replies = self.get_replies()
+        """Get all approved nested replies in thread order, skipping hidden branches"""
         all_replies = []
-        for reply in replies:
+        hidden_prefixes = []
+        for reply in self.get_descendants().select_related('user'):
+            if any(reply.path.startswith(prefix) for prefix in hidden_prefixes):
+                continue
+            if not reply.is_approved:
+                hidden_prefixes.append(f"{reply.path}/")
+                continue
             all_replies.append(reply)
-            all_replies.extend(reply.get_all_nested_replies())
         return all_replies
     
     def save(self, *args, **kwargs):
-        """Override save to automatically calculate depth"""
-        if self.parent:
-            self.depth = self.parent.depth + 1
-        else:
-            self.depth = 0
-        super().save(*args, **kwargs)
+        """Override save to place new comments in their thread's materialized path"""
+        if not self._state.adding:
+            super().save(*args, **kwargs)
+            return
+        
+        base_path = ''
+        self.depth = 0
+        if self.parent_id:
+            parent = self.parent
+            if parent.depth + 1 >= self.MAX_DEPTH:
+                # Attach over-deep replies to the grandparent instead.
+                self.parent_id = parent.parent_id
+                base_path = parent.path.rsplit('/', 1)[0]
+                self.depth = parent.depth
+            else:
+                base_path = parent.path
+                self.depth = parent.depth + 1
+        # The path needs the new pk; a row left without it would drop out of its thread.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            segment = self.path_segment(self.pk)
+            self.path = f"{base_path}/{segment}" if base_path else segment
+            Comment.objects.filter(pk=self.pk).update(path=self.path)
 
 
 class CommentLike(models.Model):
@@ -1081,6 +1255,31 @@ class CommentLike(models.Model):
         return f"{self.user.get_full_name()} liked comment by {self.comment.user.get_full_name()}"
 
 
+class LikeToggle(models.Model):
+    """A buffered like or unlike, applied to ``Like``/``CommentLike`` by ``main_app.likes``"""
+    TARGETS = Like.CONTENT_TYPES + [('comment', 'Comment')]
+    
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
+    target = models.CharField(max_length=10, choices=TARGETS)
+    object_id = models.PositiveIntegerField()
+    liked = models.BooleanField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['id']
+        verbose_name = "Like Toggle"
+        verbose_name_plural = "Like Toggles"
+        # A second toggle cancels the first, so each user has at most one per object
+        unique_together = ['user', 'target', 'object_id']
+        indexes = [
+            models.Index(fields=['target', 'object_id']),
+        ]
+    
+    def __str__(self):
+        action = 'like' if self.liked else 'unlike'
+        return f"Pending {action} of {self.target} #{self.object_id} by {self.user.get_full_name()}"
+
+
 # =========================
 # Social Graph & Notifications
 # =========================
@@ -1195,6 +1394,187 @@ class Notification(models.Model):
     def __str__(self):
         return f"Notify {getattr(self.recipient, 'email', self.recipient_id)}: {self.notification_type} by {getattr(self.sender, 'email', self.sender_id)}"
 
+# =========================
+# Analytics Rollups
+# =========================
+
+class DailyRollup(models.Model):
+    """Per-day totals of new rows, maintained by ``main_app.rollups``"""
+    METRICS = [
+        ('alumni', 'New Alumni'),
+        ('jobs', 'New Job Postings'),
+        ('applications', 'Job Applications'),
+        ('events', 'New Events'),
+        ('registrations', 'Event Registrations'),
+        ('donations', 'Completed Donations'),
+    ]
+    
+    metric = models.CharField(max_length=20, choices=METRICS)
+    day = models.DateField()
+    # Type breakdown (job, event or donation type); blank when not split
+    bucket = models.CharField(max_length=20, blank=True, default='')
+    count = models.PositiveIntegerField(default=0)
+    amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    
+    class Meta:
+        unique_together = ['metric', 'day', 'bucket']
+        ordering = ['metric', 'day', 'bucket']
+        verbose_name = "Daily Rollup"
+        verbose_name_plural = "Daily Rollups"
+    
+    def __str__(self):
+        bucket = f" ({self.bucket})" if self.bucket else ''
+        return f"{self.get_metric_display()}{bucket} on {self.day}: {self.count}"
+
+
+# =========================
+# Export Jobs
+# =========================
+
+class ExportJob(models.Model):
+    """A spreadsheet export built in the background by ``main_app.exports``"""
+    KINDS = [
+        ('alumni', 'Alumni Members'),
+        ('class', 'Class Members'),
+        ('statistics', 'Alumni Statistics'),
+    ]
+    
+    STATUS = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    
+    requested_by = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, blank=True)
+    kind = models.CharField(max_length=20, choices=KINDS)
+    params = models.JSONField(default=dict, blank=True)
+    # Hash of kind, params and data version; identical requests share a job
+    fingerprint = models.CharField(max_length=64)
+    status = models.CharField(max_length=20, choices=STATUS, default='pending')
+    processed = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(null=True, blank=True)
+    file = models.FileField(upload_to='exports/', blank=True)
+    filename = models.CharField(max_length=255, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Touched with every progress update; a running job that stops touching it is requeued
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField()
+    
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Export Job"
+        verbose_name_plural = "Export Jobs"
+        indexes = [
+            models.Index(fields=['fingerprint', 'expires_at']),
+            models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['expires_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_kind_display()} export #{self.pk} ({self.status})"
+    
+    @property
+    def percent(self):
+        if self.status == 'completed':
+            return 100
+        if not self.total:
+            return 0
+        return min(int(self.processed * 100 / self.total), 99)
+
+
+# =========================
+# Notification Broadcasts
+# =========================
+
+class NotificationBroadcast(models.Model):
+    """A coordinator notification fanned out to its audience by ``main_app.fanout``"""
+    AUDIENCES = [
+        ('all', 'All Alumni'),
+        ('graduation_year', 'Completion Year'),
+        ('degree', 'Class'),
+    ]
+    
+    STATUS = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    
+    sender = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, blank=True)
+    title = models.CharField(max_length=200)
+    message = models.TextField()
+    notification_type = models.CharField(max_length=20, choices=NotificationAlumni.NOTIFICATION_TYPES, default='system')
+    audience = models.CharField(max_length=20, choices=AUDIENCES, default='all')
+    graduation_year = models.ForeignKey(GraduationYear, on_delete=models.SET_NULL, null=True, blank=True)
+    degree = models.ForeignKey(Degree, on_delete=models.SET_NULL, null=True, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS, default='pending')
+    processed = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(null=True, blank=True)
+    # Highest alumni id delivered so far; a retried run resumes after it
+    last_alumni_id = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Touched after every chunk; a running broadcast that stops touching it is requeued
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Notification Broadcast"
+        verbose_name_plural = "Notification Broadcasts"
+        indexes = [models.Index(fields=['status', 'created_at'])]
+    
+    def __str__(self):
+        return f"{self.title} to {self.get_audience_display()} ({self.status})"
+    
+    @property
+    def percent(self):
+        if self.status == 'completed':
+            return 100
+        if not self.total:
+            return 0
+        return min(int(self.processed * 100 / self.total), 99)
+
+
+class ArchivedNotification(models.Model):
+    """A read notification moved out of its hot table by ``main_app.retention``"""
+    SOURCES = [
+        ('alumni', 'Alumni Notification'),
+        ('coordinator', 'Coordinator Notification'),
+        ('social', 'Social Notification'),
+    ]
+    
+    source = models.CharField(max_length=20, choices=SOURCES)
+    # Primary key the row had in its source table
+    source_id = models.PositiveIntegerField()
+    recipient = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='archived_notifications')
+    sender = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    notification_type = models.CharField(max_length=20, blank=True)
+    title = models.CharField(max_length=200, blank=True)
+    message = models.TextField(blank=True)
+    link_url = models.URLField(blank=True)
+    created_at = models.DateTimeField()
+    read_at = models.DateTimeField(null=True, blank=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Archived Notification"
+        verbose_name_plural = "Archived Notifications"
+        # A repeated archive run cannot copy the same row twice
+        unique_together = ['source', 'source_id']
+        indexes = [models.Index(fields=['recipient', 'created_at'])]
+    
+    def __str__(self):
+        return f"Archived {self.source} notification {self.source_id}"
+
+
 # UPDATED Signal handlers for user profile creation
 @receiver(post_save, sender=CustomUser)
 def create_user_profile(sender, instance, created, **kwargs):
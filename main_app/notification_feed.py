@@ -0,0 +1,204 @@
+"""
+One notification feed for alumni.
+
+An alumnus gets ``NotificationAlumni`` rows (events, jobs, broadcasts...) and
+social ``Notification`` rows (follows, friend requests). ``feed_page`` reads
+both with a single ``UNION ALL`` ordered by ``(created_at, source, id)``
+newest first, and seeks past the last item with a keyset cursor instead of
+an offset. The seek condition is pushed into each branch, where ``source`` is
+a constant, so each side only filters on its own ``created_at`` and ``id``.
+
+``feed_since`` returns what arrived after a cursor, for long-poll clients
+that were not connected when it was published.
+
+``mark_feed_read`` takes the cursors of the first and last items shown, so
+the client marks exactly that range with one ``UPDATE`` per table.
+"""
+
+from datetime import datetime, timezone as dt_timezone
+
+from django.db.models import CharField, F, IntegerField, Q, Value
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Notification, NotificationAlumni
+from .pagination import CursorPage, decode_cursor, encode_cursor
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+FEED_START = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+SOCIAL_TYPES = dict(Notification.NOTIFICATION_TYPES)
+
+
+def read_limit(params):
+    try:
+        limit = int(params.get('limit', DEFAULT_LIMIT))
+    except (TypeError, ValueError):
+        return DEFAULT_LIMIT
+    return min(max(limit, 1), MAX_LIMIT)
+
+
+def read_position(token):
+    """``(created_at, source, id)`` encoded in a feed cursor, or None if malformed."""
+    values, direction = decode_cursor(token)
+    if values is None or direction != 'next' or len(values) != 3:
+        return None
+    created, source, pk = values
+    created = parse_datetime(created) if isinstance(created, str) else None
+    if created is None or not isinstance(source, str) or not isinstance(pk, int):
+        return None
+    return created, source, pk
+
+
+def _older_than(source, position):
+    """Rows of ``source`` that come after ``position`` in the newest-first feed."""
+    created, cursor_source, pk = position
+    if source < cursor_source:
+        return Q(created_at__lte=created)
+    if source > cursor_source:
+        return Q(created_at__lt=created)
+    return Q(created_at__lt=created) | Q(created_at=created, pk__lt=pk)
+
+
+def _newer_than(source, position):
+    """Rows of ``source`` that come before ``position`` in the newest-first feed."""
+    created, cursor_source, pk = position
+    if source < cursor_source:
+        return Q(created_at__gt=created)
+    if source > cursor_source:
+        return Q(created_at__gte=created)
+    return Q(created_at__gt=created) | Q(created_at=created, pk__gt=pk)
+
+
+def _sources(user):
+    """Each feed source with ``user``'s rows in it."""
+    return {
+        'alumni': NotificationAlumni.objects.filter(alumni__admin=user),
+        'social': Notification.objects.filter(recipient=user),
+    }
+
+
+def _columns(source):
+    """The same named columns from either table, so the branches line up in the UNION."""
+    text = CharField()
+    if source == 'alumni':
+        return {
+            'source': Value(source, output_field=text),
+            'item_id': F('id'),
+            'kind': F('notification_type'),
+            'heading': F('title'),
+            'body': F('message'),
+            'link': F('link_url'),
+            'read': F('is_read'),
+            'created': F('created_at'),
+            'from_id': Value(None, output_field=IntegerField()),
+            'from_first_name': Value('', output_field=text),
+            'from_last_name': Value('', output_field=text),
+            'from_email': Value('', output_field=text),
+        }
+    return {
+        'source': Value(source, output_field=text),
+        'item_id': F('id'),
+        'kind': F('notification_type'),
+        'heading': Value('', output_field=text),
+        'body': F('message'),
+        'link': Value('', output_field=text),
+        'read': F('is_read'),
+        'created': F('created_at'),
+        'from_id': F('sender_id'),
+        'from_first_name': F('sender__first_name'),
+        'from_last_name': F('sender__last_name'),
+        'from_email': F('sender__email'),
+    }
+
+
+def _position(row):
+    return [row['created'].isoformat(), row['source'], row['item_id']]
+
+
+def feed_item(row):
+    """JSON shape of one feed row."""
+    sender = None
+    if row['from_id'] is not None:
+        name = f"{row['from_first_name']} {row['from_last_name']}".strip()
+        sender = {'id': row['from_id'], 'name': name or row['from_email'], 'email': row['from_email']}
+    return {
+        'id': row['item_id'],
+        'source': row['source'],
+        'type': row['kind'],
+        'title': row['heading'] or SOCIAL_TYPES.get(row['kind'], ''),
+        'message': row['body'],
+        'url': row['link'],
+        'sender': sender,
+        'is_read': bool(row['read']),
+        'created_at': row['created'].isoformat(),
+        'cursor': encode_cursor(_position(row), 'next'),
+    }
+
+
+def _feed_rows(user, limit, condition=None, unread_only=False, oldest_first=False):
+    """Up to ``limit`` newest-first (or oldest-first) rows of both tables, each filtered by ``condition(source)``."""
+    branches = []
+    for source, queryset in _sources(user).items():
+        if unread_only:
+            queryset = queryset.filter(is_read=False)
+        if condition is not None:
+            queryset = queryset.filter(condition(source))
+        branches.append(queryset.order_by().values(**_columns(source)))
+    feed = branches[0].union(*branches[1:], all=True)
+    ordering = ('created', 'source', 'item_id') if oldest_first else ('-created', '-source', '-item_id')
+    return list(feed.order_by(*ordering)[:limit])
+
+
+def feed_page(user, cursor=None, limit=DEFAULT_LIMIT, unread_only=False):
+    """One newest-first page of ``user``'s notifications from both tables, in one query."""
+    position = read_position(cursor)
+    condition = None if position is None else (lambda source: _older_than(source, position))
+    rows = _feed_rows(user, limit + 1, condition, unread_only)
+    next_cursor = encode_cursor(_position(rows[limit - 1]), 'next') if len(rows) > limit else None
+    return CursorPage([feed_item(row) for row in rows[:limit]], next_cursor)
+
+
+def feed_since(user, cursor, limit=DEFAULT_LIMIT):
+    """
+    ``user``'s notifications newer than ``cursor``, oldest first, and the cursor to resume from.
+
+    At most ``limit`` are returned and the cursor moves to the last of them,
+    so a longer backlog is drained over several calls. Without a valid cursor nothing is returned, only where the feed ends now.
+    An empty feed starts from the beginning of time, so its first arrival
+    still counts as new.
+    """
+    position = read_position(cursor)
+    if position is None:
+        rows = _feed_rows(user, 1)
+        start = _position(rows[0]) if rows else [FEED_START.isoformat(), '', 0]
+        return [], encode_cursor(start, 'next')
+    rows = _feed_rows(user, limit, lambda source: _newer_than(source, position), oldest_first=True)
+    if not rows:
+        return [], cursor
+    return [feed_item(row) for row in rows], encode_cursor(_position(rows[-1]), 'next')
+
+
+def mark_feed_read(user, first, last):
+    """
+    Mark ``user``'s unread notifications read from ``first`` down to ``last``.
+
+    Both are item cursors of what the client has shown, and both ends are
+    included, so notifications that arrived after the page was fetched stay
+    unread. Returns the number marked.
+    """
+    upper, lower = read_position(first), read_position(last)
+    if upper is None or lower is None:
+        raise ValueError('mark_feed_read needs the cursors of the first and last items shown')
+    now = timezone.now()
+    marked = 0
+    for source, queryset in _sources(user).items():
+        shown = _older_than(source, upper)
+        if source == upper[1]:
+            shown |= Q(pk=upper[2])
+        queryset = queryset.filter(shown, is_read=False).exclude(_older_than(source, lower))
+        # update() skips auto_now, so the social row's read time is set here.
+        fields = {'read_at': now} if source == 'alumni' else {'updated_at': now}
+        marked += queryset.update(is_read=True, **fields)
+    return marked
@@ -0,0 +1,185 @@
+"""
+Keyset (cursor) pagination for listing endpoints.
+
+OFFSET pagination rescans every skipped row, so deep pages get slower the
+further a user scrolls. ``KeysetPaginator`` instead seeks past the last row
+it returned using the ordering keys, and hands back opaque cursors that the
+client sends with the next request.
+"""
+
+import base64
+import binascii
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db.models import F, IntegerField, Q, Value
+from django.db.models.functions import Coalesce
+
+COUNT_CACHE_TIMEOUT = 60
+
+
+class CursorPage:
+    """A page of results plus the cursors that lead to its neighbours."""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def encode_cursor(values, direction):
+    payload = json.dumps({'v': values, 'd': direction}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Return ``(values, direction)``; malformed cursors restart at the top."""
+    if not token:
+        return None, 'next'
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values, direction = payload['v'], payload['d']
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        return None, 'next'
+    if not isinstance(values, list) or direction not in ('next', 'prev'):
+        return None, 'next'
+    return values, direction
+
+
+class KeysetPaginator:
+    """
+    Paginate a queryset by seeking on unique-together ``keys``.
+
+    Keys sort ascending unless prefixed with ``-``, as in ``order_by``.
+    Every key must be readable as an attribute of the returned objects, so
+    related fields should be annotated onto the queryset first. Cursor values
+    are converted to each key's field type, and a cursor that does not fit
+    restarts at the first page. The keys replace the queryset's ordering, so
+    querysets ranked by an expression the keys leave out (such as
+    ``search_rank``) should be paged by number instead.
+    """
+
+    def __init__(self, queryset, keys, per_page):
+        self.queryset = queryset
+        self.keys = list(keys)
+        self.names = [key.lstrip('-') for key in self.keys]
+        self.per_page = per_page
+
+    def _seek(self, values, forward):
+        condition = Q()
+        for index, key in enumerate(self.keys):
+            lookup = 'lt' if key.startswith('-') == forward else 'gt'
+            clause = Q(**{f'{self.names[index]}__{lookup}': values[index]})
+            for previous_name, previous_value in zip(self.names[:index], values[:index]):
+                clause &= Q(**{previous_name: previous_value})
+            condition |= clause
+        return condition
+
+    def _reversed_keys(self):
+        return [key[1:] if key.startswith('-') else f'-{key}' for key in self.keys]
+
+    def _key_values(self, obj):
+        return [getattr(obj, name) for name in self.names]
+
+    def _key_field(self, name):
+        annotation = self.queryset.query.annotations.get(name)
+        if annotation is not None:
+            return annotation.output_field
+        opts = self.queryset.model._meta
+        return opts.pk if name == 'pk' else opts.get_field(name)
+
+    def _coerce(self, values):
+        """Cursor values as their keys' Python types, or None if any does not fit."""
+        if len(values) != len(self.keys):
+            return None
+        coerced = []
+        for name, value in zip(self.names, values):
+            if value is None or isinstance(value, (dict, list)):
+                return None
+            try:
+                coerced.append(self._key_field(name).to_python(value))
+            except (ValidationError, TypeError, ValueError):
+                return None
+        return coerced
+
+    def get_page(self, cursor=None):
+        values, direction = decode_cursor(cursor)
+        if values is not None:
+            values = self._coerce(values)
+        if values is None:
+            direction = 'next'
+
+        queryset = self.queryset
+        if values is None:
+            queryset = queryset.order_by(*self.keys)
+        elif direction == 'prev':
+            queryset = queryset.filter(self._seek(values, forward=False)).order_by(*self._reversed_keys())
+        else:
+            queryset = queryset.filter(self._seek(values, forward=True)).order_by(*self.keys)
+
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+
+        if direction == 'prev':
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, values is not None
+
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            next_cursor = encode_cursor(self._key_values(rows[-1]), 'next')
+        if rows and has_previous:
+            previous_cursor = encode_cursor(self._key_values(rows[0]), 'prev')
+        return CursorPage(rows, next_cursor, previous_cursor)
+
+
+def alumni_directory_keyset(queryset):
+    """Annotate the Alumni Meta ordering as seekable keys plus the primary key."""
+    queryset = queryset.annotate(
+        # Typed as a signed integer so the -1 sentinel for "no class level"
+        # is not optimised away by PositiveIntegerField range checks.
+        directory_year_order=Coalesce(
+            'graduation_year__display_order', Value(-1), output_field=IntegerField()
+        ),
+        directory_last_name=F('admin__last_name'),
+    )
+    return queryset, ['directory_year_order', 'directory_last_name', 'id']
+
+
+def wants_cursor(request):
+    return 'cursor' in request.GET or request.GET.get('paginate') == 'cursor'
+
+
+def filter_signature(params, exclude=('page', 'cursor', 'paginate')):
+    """Stable hash of the request parameters that define a filter set."""
+    items = sorted((key, sorted(values)) for key, values in params.lists() if key not in exclude)
+    return hashlib.sha1(json.dumps(items).encode()).hexdigest()
+
+
+def cached_count(queryset, scope, params, timeout=COUNT_CACHE_TIMEOUT):
+    """Count ``queryset`` once per filter set and reuse it across cursor fetches."""
+    key = f'count:{scope}:{filter_signature(params)}'
+    total = cache.get(key)
+    if total is None:
+        total = queryset.count()
+        cache.set(key, total, timeout)
+    return total
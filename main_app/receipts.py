@@ -0,0 +1,39 @@
+"""
+Delivery and read receipts for direct messages.
+
+Opening the inbox moves every ``sent`` message of the alumnus to
+``delivered`` in one conditional ``UPDATE``, and opening a thread moves its
+message to ``read`` the same way. Neither saves the whole row or fires the
+model signals. The inbox sweep is skipped entirely while the cached
+``unread_messages`` badge count (which counts exactly those ``sent`` rows) is
+zero, so reloading a read inbox writes nothing, and the badge key is only
+dropped when a receipt actually changed it.
+"""
+
+from django.utils import timezone
+
+from .badges import invalidate_users, user_counts
+from .models import Message
+
+
+def deliver_pending(user, alumni):
+    """Mark the alumnus's ``sent`` messages delivered. Returns the number updated."""
+    if not user_counts(user).get('unread_messages'):
+        return 0
+    delivered = Message.objects.filter(recipient=alumni, status='sent').update(status='delivered')
+    if delivered:
+        invalidate_users([user.pk])
+    return delivered
+
+
+def record_read(message):
+    """Mark ``message`` read unless it already is. Returns whether it changed."""
+    if message.status == 'read':
+        return False
+    now = timezone.now()
+    updated = Message.objects.filter(pk=message.pk).exclude(status='read').update(status='read', read_at=now)
+    was_sent = message.status == 'sent'
+    message.status, message.read_at = 'read', now
+    if updated and was_sent:
+        invalidate_users([message.recipient.admin_id])
+    return bool(updated)
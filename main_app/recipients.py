@@ -0,0 +1,132 @@
+"""
+Bounded typeahead search over alumni message recipients.
+
+Each search token must be a prefix of the first name, last name, email or
+COSA ID; searches made by alumni leave out the email, so members cannot probe
+each other's addresses. Prefixes are matched as ranges over indexed columns (lowercased
+expression indexes for the user fields, the unique ``student_id`` index for
+IDs), so a keystroke never scans text with ``LIKE '%...%'``.
+"""
+
+from django.db.models import F, IntegerField, Q, Value
+from django.db.models.functions import Coalesce, Lower
+from django.http import QueryDict
+
+from .forms import format_alumni_recipient_label
+from .models import Alumni, CustomUser
+from .pagination import KeysetPaginator, cached_count
+from .search import prefix_range, tokenize
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 50
+RECIPIENT_FILTERS = ('search', 'student_id', 'graduation_year', 'degree')
+
+
+def _users_with_prefix(token, match_email=True):
+    users = CustomUser.objects.annotate(
+        first_name_lower=Lower('first_name'),
+        last_name_lower=Lower('last_name'),
+    )
+    condition = prefix_range('first_name_lower', token) | prefix_range('last_name_lower', token)
+    if match_email:
+        users = users.annotate(email_lower=Lower('email'))
+        condition |= prefix_range('email_lower', token)
+    return users.filter(condition).values('pk')
+
+
+def read_filters(params):
+    return {name: params.get(name, '').strip() for name in RECIPIENT_FILTERS}
+
+
+def verified_recipients():
+    return Alumni.objects.filter(admin__is_verified=True)
+
+
+def contactable_recipients():
+    """Alumni other members may find in the picker: verified, open to contact and not private."""
+    return verified_recipients().filter(allow_contact=True).exclude(privacy_level='private')
+
+
+def filter_recipients(queryset, filters, match_email=True):
+    """Apply the recipient picker filters to an Alumni queryset."""
+    for token in tokenize(filters.get('search')):
+        queryset = queryset.filter(
+            Q(admin_id__in=_users_with_prefix(token, match_email)) |
+            prefix_range('student_id', token.upper())
+        )
+
+    student_id = filters.get('student_id')
+    if student_id:
+        queryset = queryset.filter(prefix_range('student_id', student_id.upper()))
+
+    if filters.get('graduation_year'):
+        queryset = queryset.filter(graduation_year_id=filters['graduation_year'])
+
+    if filters.get('degree'):
+        queryset = queryset.filter(degree_id=filters['degree'])
+
+    return queryset
+
+
+def recipient_keyset(queryset):
+    """Annotate the recipient ordering (class level, surname, first name) as seekable keys."""
+    queryset = queryset.annotate(
+        recipient_year_order=Coalesce(
+            'graduation_year__display_order', Value(-1), output_field=IntegerField()
+        ),
+        recipient_last_name=F('admin__last_name'),
+        recipient_first_name=F('admin__first_name'),
+    )
+    return queryset, ['recipient_year_order', 'recipient_last_name', 'recipient_first_name', 'id']
+
+
+def read_limit(params):
+    try:
+        limit = int(params.get('limit', DEFAULT_LIMIT))
+    except (TypeError, ValueError):
+        return DEFAULT_LIMIT
+    return min(max(limit, 1), MAX_LIMIT)
+
+
+def recipient_counts(queryset, params, scope='recipients', base=None):
+    """Cached ``(filtered, total)`` counts; ``base`` defaults to verified alumni."""
+    signature_params = QueryDict(mutable=True)
+    for name, value in read_filters(params).items():
+        if value:
+            signature_params[name] = value
+    filtered = cached_count(queryset, scope, signature_params)
+    base = verified_recipients() if base is None else base
+    total = cached_count(base, scope, QueryDict())
+    return filtered, total
+
+
+def search_recipients(params, scope='recipients', base=None, match_email=True):
+    """
+    Return ``(page, filtered_count, total_count)`` for a typeahead request.
+
+    ``params`` carries the filters plus ``limit`` and an opaque ``cursor``
+    from the previous page. ``base`` defaults to verified alumni; pass a
+    different ``scope`` with it so cached counts do not collide. Pass
+    ``match_email=False`` for callers who must not search by email.
+    """
+    base = verified_recipients() if base is None else base
+    filters = read_filters(params)
+    queryset = filter_recipients(base, filters, match_email)
+    keyed, keys = recipient_keyset(queryset.select_related('admin', 'graduation_year'))
+    page = KeysetPaginator(keyed, keys, read_limit(params)).get_page(params.get('cursor'))
+    filtered_count, total_count = recipient_counts(queryset, params, scope, base)
+    return page, filtered_count, total_count
+
+
+def recipient_search_response(params, scope='recipients', base=None, match_email=True):
+    """JSON payload shared by the recipient search endpoints."""
+    page, filtered_count, total_count = search_recipients(params, scope, base, match_email)
+    return {
+        'results': [
+            {'id': alumni.id, 'label': format_alumni_recipient_label(alumni)}
+            for alumni in page
+        ],
+        'next_cursor': page.next_cursor,
+        'filtered_count': filtered_count,
+        'total_count': total_count,
+    }
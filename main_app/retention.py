@@ -0,0 +1,180 @@
+"""
+Retention for the notification tables.
+
+``NotificationAlumni``, ``NotificationCoordinator`` and the social
+``Notification`` table only ever grow, while every screen reads the recent
+and unread rows. ``archive_read`` moves read notifications older than the
+retention window out of a hot table in primary-key batches: each batch is
+copied into ``ArchivedNotification`` (or appended to a gzipped JSON Lines
+file) and deleted from its source in one transaction, so an interrupted run
+just carries on with the next batch. Unread notifications are never touched.
+
+``table_sizes`` reports row counts, how many rows are due for archiving and,
+where the database exposes it, the bytes each table uses.
+"""
+
+import gzip
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .models import ArchivedNotification, Notification, NotificationAlumni, NotificationCoordinator
+
+ARCHIVE_BATCH_SIZE = 1000
+DEFAULT_RETENTION_DAYS = 90
+
+
+def _alumni_record(row):
+    return {
+        'source_id': row['pk'],
+        'recipient_id': row['alumni__admin_id'],
+        'notification_type': row['notification_type'],
+        'title': row['title'],
+        'message': row['message'],
+        'link_url': row['link_url'],
+        'created_at': row['created_at'],
+        'read_at': row['read_at'],
+    }
+
+
+def _coordinator_record(row):
+    return {
+        'source_id': row['pk'],
+        'recipient_id': row['coordinator__admin_id'],
+        'title': row['title'],
+        'message': row['message'],
+        'created_at': row['created_at'],
+        'read_at': row['read_at'],
+    }
+
+
+def _social_record(row):
+    return {
+        'source_id': row['pk'],
+        'recipient_id': row['recipient_id'],
+        'sender_id': row['sender_id'],
+        'notification_type': row['notification_type'],
+        'message': row['message'],
+        'created_at': row['created_at'],
+        # Social notifications have no read timestamp; the last update is when they were read.
+        'read_at': row['updated_at'],
+    }
+
+
+SOURCES = {
+    'alumni': (
+        NotificationAlumni,
+        ('pk', 'alumni__admin_id', 'notification_type', 'title', 'message', 'link_url', 'created_at', 'read_at'),
+        _alumni_record,
+    ),
+    'coordinator': (
+        NotificationCoordinator,
+        ('pk', 'coordinator__admin_id', 'title', 'message', 'created_at', 'read_at'),
+        _coordinator_record,
+    ),
+    'social': (
+        Notification,
+        ('pk', 'recipient_id', 'sender_id', 'notification_type', 'message', 'created_at', 'updated_at'),
+        _social_record,
+    ),
+}
+
+
+def retention_cutoff(days=None):
+    """Notifications created before this are due for archiving."""
+    if days is None:
+        days = getattr(settings, 'NOTIFICATION_RETENTION_DAYS', DEFAULT_RETENTION_DAYS)
+    return timezone.now() - timedelta(days=days)
+
+
+def archivable(source, cutoff):
+    """Read notifications of ``source`` created before ``cutoff``."""
+    model = SOURCES[source][0]
+    return model.objects.filter(is_read=True, created_at__lt=cutoff)
+
+
+def save_to_table(source, records):
+    """Default sink: copy ``records`` into ``ArchivedNotification``."""
+    ArchivedNotification.objects.bulk_create(
+        [ArchivedNotification(source=source, **record) for record in records], ignore_conflicts=True
+    )
+
+
+class JsonlArchive:
+    """Sink appending records to a gzipped JSON Lines file instead of the archive table."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def __call__(self, source, records):
+        with gzip.open(self.path, 'at', encoding='utf-8') as handle:
+            for record in records:
+                handle.write(json.dumps({'source': source, **record}, default=str) + '\n')
+
+
+def archive_read(source, cutoff, batch_size=ARCHIVE_BATCH_SIZE, sink=None):
+    """Move read ``source`` notifications older than ``cutoff`` into ``sink``. Returns the number moved."""
+    sink = sink or save_to_table
+    model, fields, to_record = SOURCES[source]
+    due = archivable(source, cutoff).order_by('pk')
+    moved = 0
+    while True:
+        rows = list(due.values(*fields)[:batch_size])
+        if not rows:
+            break
+        with transaction.atomic():
+            sink(source, [to_record(row) for row in rows])
+            model.objects.filter(pk__in=[row['pk'] for row in rows]).delete()
+        moved += len(rows)
+    return moved
+
+
+def _table_bytes(model):
+    """Bytes used by ``model``'s table and indexes, or None if the database cannot tell."""
+    connection = connections[model.objects.db]
+    table = model._meta.db_table
+    try:
+        with connection.cursor() as cursor:
+            if connection.vendor == 'mysql':
+                cursor.execute(
+                    'SELECT data_length + index_length FROM information_schema.tables '
+                    'WHERE table_schema = DATABASE() AND table_name = %s',
+                    [table],
+                )
+            elif connection.vendor == 'sqlite':
+                # dbstat is only there when SQLite was built with it.
+                cursor.execute(
+                    'SELECT SUM(pgsize) FROM dbstat WHERE name = %s OR name IN '
+                    "(SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = %s)",
+                    [table, table],
+                )
+            else:
+                return None
+            row = cursor.fetchone()
+    except Exception:
+        return None
+    return row[0] if row else None
+
+
+def table_sizes(cutoff):
+    """Rows, unread rows, rows due for archiving and bytes for each notification table."""
+    sizes = []
+    for source, (model, _, _) in SOURCES.items():
+        sizes.append({
+            'table': model._meta.db_table,
+            'rows': model.objects.count(),
+            'unread': model.objects.filter(is_read=False).count(),
+            'archivable': archivable(source, cutoff).count(),
+            'bytes': _table_bytes(model),
+        })
+    sizes.append({
+        'table': ArchivedNotification._meta.db_table,
+        'rows': ArchivedNotification.objects.count(),
+        'unread': None,
+        'archivable': None,
+        'bytes': _table_bytes(ArchivedNotification),
+    })
+    return sizes
@@ -0,0 +1,191 @@
+"""
+Daily rollup tables behind the ``system_analytics`` charts.
+
+Each metric counts the rows created per calendar day (in ``TIME_ZONE``),
+split by type where the page breaks it down, into ``DailyRollup``. Saving or
+deleting a source row re-tallies just that row's day through the date
+indexes, so the rollups stay current without rescanning history, and
+``backfill_rollups`` rebuilds any range from the raw tables. Monthly and
+weekly series are summed from the rollups and keyed by the full period start
+date, so the same month of different years never shares a bucket.
+"""
+
+from collections import defaultdict, namedtuple
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import connections, transaction
+from django.db.models import Count, F, Min, Sum
+from django.db.models.functions import TruncDate, TruncMonth, TruncWeek
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from .models import Alumni, DailyRollup, Donation, Event, EventRegistration, JobApplication, JobPosting
+
+Metric = namedtuple('Metric', ['queryset', 'date_field', 'bucket_field', 'amount_field'])
+
+METRICS = {
+    'alumni': Metric(Alumni.objects.all(), 'admin__date_joined', None, None),
+    'jobs': Metric(JobPosting.objects.all(), 'created_at', 'job_type', None),
+    'applications': Metric(JobApplication.objects.all(), 'application_date', None, None),
+    'events': Metric(Event.objects.all(), 'created_at', 'event_type', None),
+    'registrations': Metric(EventRegistration.objects.all(), 'registration_date', 'event__event_type', None),
+    'donations': Metric(
+        Donation.objects.filter(payment_status='completed'), 'created_at', 'donation_type', 'amount'
+    ),
+}
+
+SENDER_METRICS = {spec.queryset.model: metric for metric, spec in METRICS.items()}
+# Alumni rows are re-saved on every login, and application and registration
+# status changes do not touch their day's count or type.
+FROZEN_ON_UPDATE = {'alumni', 'applications', 'registrations'}
+
+BACKFILL_CHUNK_DAYS = 92
+PERIODS = {'month': TruncMonth, 'week': TruncWeek}
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _tally(metric, start, end):
+    """``DailyRollup`` rows for ``metric`` over the days in [start, end)."""
+    spec = METRICS[metric]
+    rows = spec.queryset.filter(**{
+        f'{spec.date_field}__gte': _day_start(start),
+        f'{spec.date_field}__lt': _day_start(end),
+    }).annotate(rollup_day=TruncDate(spec.date_field))
+    fields = ['rollup_day'] + ([spec.bucket_field] if spec.bucket_field else [])
+    aggregates = {'rollup_count': Count('pk')}
+    if spec.amount_field:
+        aggregates['rollup_amount'] = Sum(spec.amount_field)
+    return [
+        DailyRollup(
+            metric=metric,
+            day=row['rollup_day'],
+            bucket=row.get(spec.bucket_field) or '',
+            count=row['rollup_count'],
+            amount=row.get('rollup_amount') or 0,
+        )
+        for row in rows.order_by().values(*fields).annotate(**aggregates)
+    ]
+
+
+def _upsert_options():
+    """``bulk_create`` arguments that overwrite an existing rollup row."""
+    options = {'update_conflicts': True, 'update_fields': ['count', 'amount']}
+    # MySQL upserts with ON DUPLICATE KEY, which takes no conflict target and
+    # rejects unique_fields.
+    if connections[DailyRollup.objects.db].features.supports_update_conflicts_with_target:
+        options['unique_fields'] = ['metric', 'day', 'bucket']
+    return options
+
+
+def rollup_days(metric, start, end):
+    """Replace the rollups of ``metric`` for the days in [start, end). Returns the rows written."""
+    rollups = _tally(metric, start, end)
+    kept = defaultdict(list)
+    for rollup in rollups:
+        kept[rollup.day].append(rollup.bucket)
+    with transaction.atomic():
+        # Upsert rather than delete and insert, so two writers re-tallying
+        # the same day cannot collide on the unique key.
+        if rollups:
+            DailyRollup.objects.bulk_create(rollups, **_upsert_options())
+        stale = DailyRollup.objects.filter(metric=metric, day__gte=start, day__lt=end)
+        for day, buckets in kept.items():
+            stale = stale.exclude(day=day, bucket__in=buckets)
+        stale.delete()
+    return len(rollups)
+
+
+def backfill(metric, since=None):
+    """Rebuild ``metric`` from ``since`` (default: its first row) through today."""
+    spec = METRICS[metric]
+    end = timezone.localdate() + timedelta(days=1)
+    if since is None:
+        first = spec.queryset.aggregate(first=Min(spec.date_field))['first']
+        if first is None:
+            DailyRollup.objects.filter(metric=metric).delete()
+            return 0
+        since = timezone.localtime(first).date()
+        DailyRollup.objects.filter(metric=metric, day__lt=since).delete()
+    written = 0
+    start = since
+    while start < end:
+        chunk_end = min(start + timedelta(days=BACKFILL_CHUNK_DAYS), end)
+        written += rollup_days(metric, start, chunk_end)
+        start = chunk_end
+    return written
+
+
+def _period_starts(period, periods, today=None):
+    today = today or timezone.localdate()
+    if period == 'week':
+        current = today - timedelta(days=today.weekday())
+        return [current - timedelta(weeks=offset) for offset in range(periods - 1, -1, -1)]
+    starts = []
+    year, month = today.year, today.month
+    for _ in range(periods):
+        starts.append(today.replace(year=year, month=month, day=1))
+        year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+    return starts[::-1]
+
+
+def series(metric, period='month', periods=12, today=None):
+    """
+    ``[{'period': date, 'count': int, 'total': Decimal}]`` for the last
+    ``periods`` months or weeks, oldest first, with empty periods as zero.
+    """
+    starts = _period_starts(period, periods, today)
+    rows = DailyRollup.objects.filter(metric=metric, day__gte=starts[0]).annotate(
+        period=PERIODS[period]('day')
+    ).order_by().values('period').annotate(count=Sum('count'), total=Sum('amount'))
+    found = {row['period']: row for row in rows}
+    return [
+        {
+            'period': start,
+            'count': found[start]['count'] if start in found else 0,
+            'total': found[start]['total'] if start in found else Decimal(0),
+        }
+        for start in starts
+    ]
+
+
+def totals(metric):
+    """All-time ``{'count', 'total'}`` for ``metric``."""
+    row = DailyRollup.objects.filter(metric=metric).aggregate(count=Sum('count'), total=Sum('amount'))
+    return {'count': row['count'] or 0, 'total': row['total'] or Decimal(0)}
+
+
+def totals_by_type(metric, name):
+    """All-time ``count`` and ``total`` per bucket, with the bucket under ``name``."""
+    return list(
+        DailyRollup.objects.filter(metric=metric).values(**{name: F('bucket')}).annotate(
+            count=Sum('count'), total=Sum('amount')
+        ).order_by('-count', name)
+    )
+
+
+def _resolve(instance, path):
+    for attr in path.split('__'):
+        instance = getattr(instance, attr, None)
+        if instance is None:
+            return None
+    return instance
+
+
+def retally_instance(sender, instance, created=False, **kwargs):
+    metric = SENDER_METRICS[sender]
+    if metric in FROZEN_ON_UPDATE and kwargs.get('signal') is post_save and not created:
+        return
+    stamp = _resolve(instance, METRICS[metric].date_field)
+    if stamp is None:
+        return
+    day = timezone.localtime(stamp).date()
+    rollup_days(metric, day, day + timedelta(days=1))
+
+
+for _model in SENDER_METRICS:
+    post_save.connect(retally_instance, sender=_model, dispatch_uid=f'rollups-save-{_model.__name__}')
+    post_delete.connect(retally_instance, sender=_model, dispatch_uid=f'rollups-delete-{_model.__name__}')
@@ -0,0 +1,175 @@
+"""
+Full-text search for the alumni directory.
+
+The searchable text of every profile is denormalized into
+``AlumniSearchIndex``. On SQLite an FTS5 table mirrors that table through
+triggers, on MySQL a FULLTEXT index covers it directly, and any other backend
+falls back to ``icontains`` lookups on the single index table.
+"""
+
+import re
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Q, Value
+from django.db.models.signals import post_save, pre_delete
+from django.dispatch import receiver
+
+from .models import Alumni, AlumniSearchIndex, Company, CustomUser
+
+FTS_TABLE = 'main_app_alumnisearchindex_fts'
+SEARCH_COLUMNS = ('name', 'company', 'skills', 'industry')
+MAX_SEARCH_TOKENS = 8
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+_fts_tables = {}
+
+
+def tokenize(term):
+    """Split a free-text search term into lowercase word tokens."""
+    if not term:
+        return []
+    return _TOKEN_RE.findall(str(term).lower())[:MAX_SEARCH_TOKENS]
+
+
+def prefix_range(lookup, prefix):
+    """
+    Match values of ``lookup`` that start with ``prefix``.
+
+    Expressed as a range rather than ``LIKE 'prefix%'`` so that SQLite can
+    answer it from an ordinary (case-sensitive) index.
+    """
+    return Q(**{f'{lookup}__gte': prefix, f'{lookup}__lt': prefix + '\uffff'})
+
+
+def search_backend(using=DEFAULT_DB_ALIAS):
+    """Return the search strategy available on the given database."""
+    connection = connections[using]
+    if connection.vendor == 'sqlite':
+        if using not in _fts_tables:
+            _fts_tables[using] = FTS_TABLE in connection.introspection.table_names()
+        return 'fts5' if _fts_tables[using] else 'basic'
+    if connection.vendor == 'mysql':
+        return 'fulltext'
+    return 'basic'
+
+
+def search_alumni(queryset, term):
+    """
+    Restrict an Alumni queryset to profiles matching ``term``.
+
+    Every token must match the start of a word in the name, company, skills
+    or industry. Matches are annotated with ``search_rank`` where lower
+    values are better, so callers can ``order_by('search_rank')``.
+    """
+    tokens = tokenize(term)
+    if not tokens:
+        return queryset
+
+    backend = search_backend(queryset.db)
+    quote = connections[queryset.db].ops.quote_name
+    alumni_pk = f"{quote(Alumni._meta.db_table)}.{quote(Alumni._meta.pk.column)}"
+
+    if backend == 'fts5':
+        match = ' '.join(f'"{token}"*' for token in tokens)
+        return queryset.extra(
+            select={'search_rank': f'{FTS_TABLE}.rank'},
+            tables=[FTS_TABLE],
+            where=[f'{FTS_TABLE}.rowid = {alumni_pk}', f'{FTS_TABLE} MATCH %s'],
+            params=[match],
+        )
+
+    if backend == 'fulltext':
+        index_table = quote(AlumniSearchIndex._meta.db_table)
+        columns = ', '.join(f'{index_table}.{quote(column)}' for column in SEARCH_COLUMNS)
+        against = f'MATCH({columns}) AGAINST (%s IN BOOLEAN MODE)'
+        match = ' '.join(f'+{token}*' for token in tokens)
+        return queryset.extra(
+            select={'search_rank': f'-{against}'},
+            select_params=[match],
+            tables=[AlumniSearchIndex._meta.db_table],
+            where=[f'{index_table}.{quote("alumni_id")} = {alumni_pk}', against],
+            params=[match],
+        )
+
+    condition = Q()
+    for token in tokens:
+        token_match = Q()
+        for column in SEARCH_COLUMNS:
+            token_match |= Q(**{f'{column}__icontains': token})
+        condition &= token_match
+    matching_ids = AlumniSearchIndex.objects.filter(condition).values('alumni_id')
+    return queryset.filter(pk__in=matching_ids).annotate(search_rank=Value(0))
+
+
+def build_document(alumni):
+    """Return the searchable field values for an alumni profile."""
+    user = alumni.admin
+    company = alumni.current_company
+    return {
+        'name': f"{user.first_name} {user.last_name}".strip(),
+        'company': company.name if company else '',
+        'skills': alumni.skills or '',
+        'industry': alumni.industry or '',
+    }
+
+
+def index_alumni(alumni):
+    """Create or refresh the search document for one alumni profile."""
+    AlumniSearchIndex.objects.update_or_create(
+        alumni_id=alumni.pk,
+        defaults=build_document(alumni),
+    )
+
+
+def rebuild_index(batch_size=1000):
+    """Regenerate every search document. Returns the number indexed."""
+    AlumniSearchIndex.objects.all().delete()
+
+    total = 0
+    batch = []
+    queryset = Alumni.objects.select_related('admin', 'current_company').order_by('pk')
+    for alumni in queryset.iterator(chunk_size=batch_size):
+        batch.append(AlumniSearchIndex(alumni_id=alumni.pk, **build_document(alumni)))
+        if len(batch) >= batch_size:
+            AlumniSearchIndex.objects.bulk_create(batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        AlumniSearchIndex.objects.bulk_create(batch)
+        total += len(batch)
+
+    if search_backend() == 'fts5':
+        with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+    return total
+
+
+@receiver(post_save, sender=Alumni)
+def sync_alumni_document(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    index_alumni(instance)
+
+
+@receiver(post_save, sender=CustomUser)
+def sync_user_name(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    # Logins only touch last_login; only name changes reach the index.
+    if raw or created or (update_fields is not None and not {'first_name', 'last_name'} & set(update_fields)):
+        return
+    AlumniSearchIndex.objects.filter(alumni__admin=instance).update(
+        name=f"{instance.first_name} {instance.last_name}".strip()
+    )
+
+
+@receiver(post_save, sender=Company)
+def sync_company_name(sender, instance, created, raw=False, **kwargs):
+    if raw or created:
+        return
+    AlumniSearchIndex.objects.filter(alumni__current_company=instance).update(company=instance.name)
+
+
+@receiver(pre_delete, sender=Company)
+def clear_company_name(sender, instance, **kwargs):
+    # current_company is SET_NULL, a bulk UPDATE that sends no Alumni post_save.
+    AlumniSearchIndex.objects.filter(alumni__current_company=instance).update(company='')
@@ -0,0 +1,121 @@
+"""
+Normalized skills for alumni profiles.
+
+``Alumni.skills`` stays the comma-separated text that profiles are edited
+through; every save mirrors it into ``Skill`` rows and ``AlumniSkill`` links
+so skill filters and autocomplete are index lookups instead of text scans.
+"""
+
+import re
+
+from django.db.models import Count, Prefetch
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import Alumni, AlumniSkill, Skill
+from .search import prefix_range
+
+MAX_SKILL_LENGTH = 100
+AUTOCOMPLETE_LIMIT = 10
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_skill(name):
+    """Canonical form used to decide whether two skill names are the same."""
+    return _WHITESPACE_RE.sub(' ', str(name)).strip().lower()[:MAX_SKILL_LENGTH]
+
+
+def parse_skills(text):
+    """Split comma-separated skills into display names, dropping duplicates."""
+    names = {}
+    for part in (text or '').split(','):
+        name = _WHITESPACE_RE.sub(' ', part).strip()[:MAX_SKILL_LENGTH]
+        if name:
+            names.setdefault(normalize_skill(name), name)
+    return names
+
+
+def get_or_create_skills(names):
+    """Map normalized names to ``Skill`` rows, creating missing ones in bulk."""
+    skills = {skill.normalized_name: skill for skill in Skill.objects.filter(normalized_name__in=list(names))}
+    missing = [
+        Skill(name=name, normalized_name=normalized)
+        for normalized, name in names.items() if normalized not in skills
+    ]
+    if missing:
+        Skill.objects.bulk_create(missing, ignore_conflicts=True)
+        skills.update(
+            (skill.normalized_name, skill)
+            for skill in Skill.objects.filter(normalized_name__in=[skill.normalized_name for skill in missing])
+        )
+    return skills
+
+
+def sync_alumni_skills(alumni):
+    """Make the skill links of ``alumni`` match its ``skills`` text."""
+    names = parse_skills(alumni.skills)
+    wanted = {}
+    if names:
+        skills = get_or_create_skills(names)
+        wanted = {skills[normalized].pk: position for position, normalized in enumerate(names)}
+
+    current = dict(AlumniSkill.objects.filter(alumni=alumni).values_list('skill_id', 'position'))
+    if current == wanted:
+        return
+
+    stale = [skill_id for skill_id in current if skill_id not in wanted]
+    if stale:
+        AlumniSkill.objects.filter(alumni=alumni, skill_id__in=stale).delete()
+    for skill_id, position in wanted.items():
+        if skill_id in current and current[skill_id] != position:
+            AlumniSkill.objects.filter(alumni=alumni, skill_id=skill_id).update(position=position)
+    # A concurrent save of the same profile may have linked some already.
+    AlumniSkill.objects.bulk_create([
+        AlumniSkill(alumni=alumni, skill_id=skill_id, position=position)
+        for skill_id, position in wanted.items() if skill_id not in current
+    ], ignore_conflicts=True)
+
+
+def backfill_skills(batch_size=500):
+    """Rebuild the skill links of every profile. Returns the number of profiles linked."""
+    total = 0
+    queryset = Alumni.objects.exclude(skills='').only('pk', 'skills').order_by('pk')
+    for alumni in queryset.iterator(chunk_size=batch_size):
+        sync_alumni_skills(alumni)
+        total += 1
+    AlumniSkill.objects.filter(alumni__skills='').delete()
+    return total
+
+
+def filter_by_skill(queryset, name):
+    """Restrict an Alumni queryset to profiles listing the exact skill ``name``."""
+    normalized = normalize_skill(name)
+    if not normalized:
+        return queryset
+    return queryset.filter(
+        pk__in=AlumniSkill.objects.filter(skill__normalized_name=normalized).values('alumni_id')
+    )
+
+
+def prefetch_skills(queryset):
+    """Load the ordered skill links of every profile in ``queryset`` in one query."""
+    return queryset.prefetch_related(
+        Prefetch('skill_links', queryset=AlumniSkill.objects.select_related('skill').order_by('position'))
+    )
+
+
+def autocomplete_skills(prefix, limit=AUTOCOMPLETE_LIMIT):
+    """Skills starting with ``prefix``, most widely listed first."""
+    normalized = normalize_skill(prefix)
+    if not normalized:
+        return []
+    skills = Skill.objects.filter(prefix_range('normalized_name', normalized)).annotate(alumni_count=Count('alumni_links')).order_by('-alumni_count', 'normalized_name')
+    return list(skills[:limit])
+
+
+@receiver(post_save, sender=Alumni)
+def sync_skills_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    sync_alumni_skills(instance)
@@ -0,0 +1,171 @@
+"""
+CSV and JSON-Lines exports streamed straight from the database.
+
+Each dataset is a queryset plus a list of ``(column, lookup)`` pairs. Rows
+come from ``values_list(...).iterator()``, so no model instances are built,
+and they are encoded in batches as the response is consumed; memory stays
+flat however many rows the export holds. Every dataset accepts the
+manage-alumni filters (``search``, ``graduation_year``, ``degree``), applied
+to the alumnus the row belongs to.
+"""
+
+import csv
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from itertools import islice
+
+from django.http import StreamingHttpResponse
+
+from .exports import alumni_filters
+from .models import Alumni, Donation, EventRegistration, JobApplication
+
+ITERATOR_CHUNK_SIZE = 2000
+# Rows encoded per chunk handed to the server
+WRITE_BATCH_SIZE = 500
+
+DATASETS = {
+    'alumni': {
+        'queryset': Alumni.objects.all(),
+        'alumni': '',
+        'columns': [
+            ('student_id', 'student_id'),
+            ('first_name', 'admin__first_name'),
+            ('last_name', 'admin__last_name'),
+            ('email', 'admin__email'),
+            ('phone', 'admin__phone_number'),
+            ('completion_year', 'graduation_year__year'),
+            ('level', 'degree__name'),
+            ('department', 'degree__department__name'),
+            ('job_title', 'job_title'),
+            ('company', 'current_company__name'),
+            ('employment_status', 'employment_status'),
+            ('city', 'current_city'),
+            ('country', 'current_country'),
+            ('linkedin_profile', 'linkedin_profile'),
+            ('registered_at', 'admin__date_joined'),
+            ('is_active', 'admin__is_active'),
+        ],
+    },
+    'registrations': {
+        'queryset': EventRegistration.objects.all(),
+        'alumni': 'alumni__',
+        'columns': [
+            ('id', 'id'),
+            ('event_id', 'event_id'),
+            ('event', 'event__title'),
+            ('event_start', 'event__start_date'),
+            ('student_id', 'alumni__student_id'),
+            ('email', 'alumni__admin__email'),
+            ('status', 'status'),
+            ('paid', 'payment_status'),
+            ('registered_at', 'registration_date'),
+        ],
+    },
+    'applications': {
+        'queryset': JobApplication.objects.all(),
+        'alumni': 'applicant__',
+        'columns': [
+            ('id', 'id'),
+            ('job_id', 'job_id'),
+            ('job', 'job__title'),
+            ('company', 'job__company__name'),
+            ('student_id', 'applicant__student_id'),
+            ('email', 'applicant__admin__email'),
+            ('status', 'status'),
+            ('applied_at', 'application_date'),
+        ],
+    },
+    'donations': {
+        'queryset': Donation.objects.all(),
+        'alumni': 'donor__',
+        'columns': [
+            ('id', 'id'),
+            ('student_id', 'donor__student_id'),
+            ('email', 'donor__admin__email'),
+            ('anonymous', 'is_anonymous'),
+            ('amount', 'amount'),
+            ('currency', 'currency'),
+            ('donation_type', 'donation_type'),
+            ('payment_status', 'payment_status'),
+            ('payment_method', 'payment_method'),
+            ('campaign', 'campaign'),
+            ('created_at', 'created_at'),
+        ],
+    },
+}
+
+FORMATS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'jsonl': ('application/x-ndjson; charset=utf-8', 'jsonl'),
+}
+
+
+def _plain(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def export_rows(dataset, params=None):
+    """Column names and a lazy iterator of value tuples for ``dataset``."""
+    spec = DATASETS[dataset]
+    queryset = spec['queryset'].filter(alumni_filters(params or {}, spec['alumni'])).order_by('pk')
+    names = [name for name, _ in spec['columns']]
+    lookups = [lookup for _, lookup in spec['columns']]
+    return names, queryset.values_list(*lookups).iterator(chunk_size=ITERATOR_CHUNK_SIZE)
+
+
+class _Lines:
+    """Write target for ``csv.writer`` that collects the encoded lines."""
+
+    def __init__(self):
+        self.lines = []
+
+    def write(self, line):
+        self.lines.append(line)
+
+
+def _batches(rows):
+    while True:
+        batch = list(islice(rows, WRITE_BATCH_SIZE))
+        if not batch:
+            return
+        yield batch
+
+
+def stream_csv(names, rows):
+    buffer = _Lines()
+    writer = csv.writer(buffer)
+    writer.writerow(names)
+    yield ''.join(buffer.lines)
+    for batch in _batches(rows):
+        buffer.lines = []
+        writer.writerows([_plain(value) for value in row] for row in batch)
+        yield ''.join(buffer.lines)
+
+
+def stream_jsonl(names, rows):
+    for batch in _batches(rows):
+        yield ''.join(
+            json.dumps(dict(zip(names, (_plain(value) for value in row))), ensure_ascii=False) + '\n'
+            for row in batch
+        )
+
+
+ENCODERS = {
+    'csv': stream_csv,
+    'jsonl': stream_jsonl,
+}
+
+
+def streaming_export_response(dataset, fmt, params=None, filename=None):
+    """``StreamingHttpResponse`` of ``dataset`` encoded as ``fmt`` (csv or jsonl)."""
+    content_type, extension = FORMATS[fmt]
+    names, rows = export_rows(dataset, params)
+    response = StreamingHttpResponse(ENCODERS[fmt](names, rows), content_type=content_type)
+    filename = filename or f'cosa_{dataset}.{extension}'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
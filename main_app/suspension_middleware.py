@@ -45,6 +45,10 @@ class SuspensionMiddleware(MiddlewareMixin):
         'coordinator_export_alumni_excel',
         'coordinator_export_alumni_by_year_excel',
         'coordinator_export_alumni_statistics_excel',
+        'export_job_detail',
+        'export_job_status',
+        'export_job_download',
+        'export_data',
         'alumni_profile',
         'alumni_edit_profile',
         'alumni_messages_inbox',
@@ -1,12 +1,67 @@
+import asyncio
+import gzip
+import json
+import os
+import re
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from io import BytesIO, StringIO
+from unittest import mock
+
+from asgiref.sync import async_to_sync, sync_to_async
+
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import AnonymousUser
-from django.test import RequestFactory, TestCase
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DatabaseError, connection, connections
+from django.db.backends.sqlite3.operations import DatabaseOperations as SQLiteOperations
+from django.db.models import QuerySet
+from django.db.models.expressions import Exists, ExpressionWrapper
+from django.db.models.lookups import Lookup
+from django.db.models.signals import post_save
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
+from openpyxl import load_workbook
 
 from .EmailBackend import EmailBackend
+from .alumni_stats import alumni_breakdowns
+from .excel_utils import build_alumni_workbook, build_class_workbook, build_statistics_workbook, save_to_tempfile
 from .middleware import LoginCheckMiddleWare
-from .models import Follow, FriendRequest, Friendship, Notification
+from .badges import BADGE_CACHE_TIMEOUT, LOCAL_BADGE_CACHE_TIMEOUT, badge_cache_timeout
+from .context_processors import header_counts
+from .conversations import inbox
+from .counters import reconcile_counters
+from . import dashboard, exports, fanout, likes, retention, rollups
+from .engagement import REPLY_PREVIEW_SIZE, load_comment_page, load_replies
+from .facets import SNAPSHOT_CACHE_KEY, directory_facets
+from .forms import CoordinatorMessageForm, MessageForm
+from .likes import flush_toggles, is_liked, record_toggle
+from . import live
+from .live import LocalBroker
+from .notification_feed import feed_page, feed_since
+from .models import Alumni, AlumniSearchIndex, AlumniSkill, ArchivedNotification, Comment, CommentLike, Company, Conversation, DailyRollup, Degree, Department, Donation, Event, ExportJob, Follow, FriendRequest, Friendship, GraduationYear, JobPosting, Like, LikeToggle, Message, MessageReply, News, Notification, NotificationAlumni, NotificationBroadcast, NotificationCoordinator, Skill, save_user_profile
+from .recipients import search_recipients
+from .pagination import KeysetPaginator, alumni_directory_keyset, decode_cursor, encode_cursor
+from .search import rebuild_index, search_alumni, sync_user_name
+from .skills import backfill_skills, filter_by_skill
+from .views import LIVE_WSGI_POLL_INTERVAL
+
+
+def _make_alumni(email, first_name='', last_name='', **fields):
+    """A verified alumnus whose profile has ``fields`` set."""
+    user = get_user_model().objects.create_user(
+        email=email, password='x', first_name=first_name, last_name=last_name, is_verified=True
+    )
+    alumni = user.alumni
+    for key, value in fields.items():
+        setattr(alumni, key, value)
+    alumni.save()
+    return alumni
 
 
 class EmailBackendTests(TestCase):
@@ -124,3 +179,1523 @@ class SocialViewsTests(TestCase):
         res = self.client.post(mark_url)
         self.assertEqual(res.status_code, 200)
         self.assertTrue(Notification.objects.get(id=nid).is_read)
+
+
+class AlumniSearchTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name='Acme Analytics')
+        self.ada = _make_alumni('ada@example.com', 'Ada', 'Lovelace', skills='Python, Statistics')
+        self.grace = _make_alumni('grace@example.com', 'Grace', 'Hopper', skills='COBOL', industry='Defence')
+        self.ada.current_company = self.company
+        self.ada.save()
+
+    def _search(self, term):
+        return list(search_alumni(Alumni.objects.all(), term).order_by('search_rank'))
+
+    def test_prefix_matches_across_fields(self):
+        self.assertEqual(self._search('lov'), [self.ada])
+        self.assertEqual(self._search('pyth'), [self.ada])
+        self.assertEqual(self._search('acme'), [self.ada])
+        self.assertEqual(self._search('defen'), [self.grace])
+        self.assertEqual(self._search('ada statis'), [self.ada])
+        self.assertEqual(self._search('ada cobol'), [])
+
+    def test_index_follows_user_and_company_changes(self):
+        self.grace.admin.last_name = 'Brewster'
+        self.grace.admin.save()
+        self.company.name = 'Initech'
+        self.company.save()
+        self.assertEqual(self._search('brew'), [self.grace])
+        self.assertEqual(self._search('hopper'), [])
+        self.assertEqual(self._search('initech'), [self.ada])
+
+    def test_deleted_company_leaves_the_index(self):
+        self.company.delete()
+        self.assertEqual(self._search('acme'), [])
+        self.assertEqual(self._search('ada'), [self.ada])
+
+    def test_logins_do_not_rewrite_the_index(self):
+        with CaptureQueriesContext(connection) as queries:
+            sync_user_name(get_user_model(), self.ada.admin, created=False, update_fields=frozenset({'last_login'}))
+        self.assertEqual(len(queries), 0)
+
+    def test_rebuild_index_restores_documents(self):
+        AlumniSearchIndex.objects.all().delete()
+        self.assertEqual(self._search('ada'), [])
+        self.assertEqual(rebuild_index(), 2)
+        self.assertEqual(self._search('ada'), [self.ada])
+
+    def test_directory_data_uses_search(self):
+        self.client.force_login(self.grace.admin)
+        res = self.client.get(reverse('public_alumni_directory_data'), {'search': 'lovel'})
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json()['total_count'], 1)
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.User = get_user_model()
+        self.viewer = self.User.objects.create_user(email='viewer@example.com', password='x', is_verified=True)
+        for index in range(5):
+            self.User.objects.create_user(
+                email=f'member{index}@example.com', password='x',
+                first_name='Member', last_name=f'Surname{index}', is_verified=True,
+            )
+
+    def _fetch(self, **params):
+        res = self.client.get(reverse('alumni_directory_data'), {'paginate': 'cursor', **params})
+        self.assertEqual(res.status_code, 200)
+        return res.json()
+
+    def test_cursor_walks_every_row_once(self):
+        self.client.force_login(self.viewer)
+        queryset, keys = alumni_directory_keyset(Alumni.objects.exclude(admin=self.viewer))
+        paginator = KeysetPaginator(queryset, keys, per_page=2)
+
+        seen = []
+        page = paginator.get_page()
+        while True:
+            seen.extend(alumni.admin.last_name for alumni in page)
+            if not page.has_next:
+                break
+            page = paginator.get_page(page.next_cursor)
+        self.assertEqual(seen, [f'Surname{index}' for index in range(5)])
+
+        previous = paginator.get_page(page.previous_cursor)
+        self.assertEqual([alumni.admin.last_name for alumni in previous], ['Surname2', 'Surname3'])
+
+    @override_settings(ALUMNI_PER_PAGE=2)
+    def test_directory_endpoint_returns_cursors_and_caches_count(self):
+        self.client.force_login(self.viewer.alumni.admin)
+        first = self._fetch()
+        self.assertEqual(first['total_count'], 5)
+        self.assertIsNotNone(first['next_cursor'])
+        self.assertIsNone(first['previous_cursor'])
+
+        with CaptureQueriesContext(connection) as queries:
+            second = self._fetch(cursor=first['next_cursor'])
+        self.assertEqual(second['total_count'], 5)
+        self.assertFalse(any('FROM "main_app_alumni"' in q['sql'] and 'COUNT(' in q['sql'] for q in queries))
+
+    def test_malformed_cursor_restarts_from_first_page(self):
+        self.assertEqual(decode_cursor('not-a-cursor'), (None, 'next'))
+
+    @override_settings(ALUMNI_PER_PAGE=2)
+    def test_tampered_cursor_values_restart_from_first_page(self):
+        self.client.force_login(self.viewer)
+        first = self._fetch()
+        for values in (['abc', 'x', 'y'], [{'a': 1}, 'x', 1], [0, 'Surname1', None]):
+            data = self._fetch(cursor=encode_cursor(values, 'next'))
+            self.assertEqual((data['html'], data['next_cursor']), (first['html'], first['next_cursor']))
+
+        comments = KeysetPaginator(Comment.objects.all(), ['-id'], per_page=2)
+        self.assertEqual(list(comments.get_page(encode_cursor(['abc'], 'next'))), [])
+
+    def test_ranked_search_pages_by_number(self):
+        self.client.force_login(self.viewer)
+        data = self._fetch(search='surname')
+        self.assertNotIn('next_cursor', data)
+        self.assertEqual(data['page_number'], 1)
+
+
+class DirectoryFacetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.User = get_user_model()
+        self.y2010 = GraduationYear.objects.create(year='2010')
+        self.y2011 = GraduationYear.objects.create(year='2011')
+        self.viewer = _make_alumni('viewer@example.com', graduation_year=self.y2010)
+        _make_alumni('a@example.com', graduation_year=self.y2010, is_mentor=True)
+        _make_alumni('b@example.com', graduation_year=self.y2010, willing_to_hire=True)
+        _make_alumni('c@example.com', graduation_year=self.y2011, is_mentor=True, skills='Python')
+        _make_alumni('d@example.com', graduation_year=self.y2011, privacy_level='private')
+
+    def _fetch(self, **params):
+        self.client.force_login(self.viewer.admin)
+        res = self.client.get(reverse('alumni_directory_data'), params)
+        self.assertEqual(res.status_code, 200)
+        return res.json()['facets']
+
+    def test_unfiltered_facets_exclude_viewer_and_private_profiles(self):
+        facets = self._fetch()
+        self.assertEqual(facets['graduation_year'], [
+            {'value': '2010', 'count': 2},
+            {'value': '2011', 'count': 1},
+        ])
+        self.assertEqual(facets['is_mentor'], 2)
+        self.assertEqual(facets['willing_to_hire'], 1)
+
+    def test_facets_apply_other_filters_but_not_their_own(self):
+        facets = self._fetch(graduation_year='2010', is_mentor='on')
+        self.assertEqual(facets['graduation_year'], [
+            {'value': '2010', 'count': 1},
+            {'value': '2011', 'count': 1},
+        ])
+        self.assertEqual(facets['is_mentor'], 1)
+        self.assertEqual(facets['willing_to_hire'], 0)
+
+    def test_searched_facets_use_one_grouped_query(self):
+        queryset = search_alumni(Alumni.objects.all(), 'python')
+        with self.assertNumQueries(1):
+            facets = directory_facets(queryset, {}, searched=True)
+        self.assertEqual(facets['graduation_year'], [{'value': '2011', 'count': 1}])
+
+    def test_snapshot_is_invalidated_by_alumni_changes(self):
+        self._fetch()
+        self.assertIsNotNone(cache.get(SNAPSHOT_CACHE_KEY))
+        Alumni.objects.get(admin__email='d@example.com').delete()
+        self.assertIsNone(cache.get(SNAPSHOT_CACHE_KEY))
+
+        self._fetch()
+        mentor = Alumni.objects.get(admin__email='b@example.com')
+        mentor.is_mentor = True
+        mentor.save()
+        self.assertEqual(self._fetch()['is_mentor'], 3)
+
+    def test_snapshot_is_invalidated_by_verification(self):
+        pending = self.User.objects.create_user(email='e@example.com', password='x')
+        pending.alumni.is_mentor = True
+        pending.alumni.save()
+        self.assertEqual(self._fetch()['is_mentor'], 2)
+
+        # Only the account row changes, without the profile re-save side effect.
+        post_save.disconnect(save_user_profile, sender=get_user_model())
+        self.addCleanup(post_save.connect, save_user_profile, sender=get_user_model())
+        pending.is_verified = True
+        pending.save(update_fields=['is_verified'])
+        self.assertEqual(self._fetch()['is_mentor'], 3)
+
+
+class SkillIndexTests(TestCase):
+    def setUp(self):
+        self.ada = _make_alumni('ada@example.com', skills='Python, Data  Analysis, python')
+        self.grace = _make_alumni('grace@example.com', skills='Pyramid Scheming, COBOL')
+
+    def _skills(self, alumni):
+        return [link.skill.name for link in alumni.skill_links.select_related('skill').order_by('position')]
+
+    def test_profile_save_maintains_links(self):
+        self.assertEqual(self._skills(self.ada), ['Python', 'Data Analysis'])
+        self.ada.skills = 'Data analysis, Statistics'
+        self.ada.save()
+        self.assertEqual(self._skills(self.ada), ['Data Analysis', 'Statistics'])
+        self.assertEqual(Skill.objects.filter(normalized_name='python').count(), 1)
+
+    def test_concurrent_saves_link_each_skill_once(self):
+        bulk_create = AlumniSkill.objects.bulk_create
+        python = Skill.objects.get(normalized_name='python')
+
+        def racing_bulk_create(objs, **kwargs):
+            # The same profile's other save links Python in between.
+            AlumniSkill.objects.create(alumni=self.grace, skill=python, position=0)
+            return bulk_create(objs, **kwargs)
+
+        self.grace.skills = 'Python'
+        with mock.patch.object(AlumniSkill.objects, 'bulk_create', racing_bulk_create):
+            self.grace.save()
+        self.assertEqual(self._skills(self.grace), ['Python'])
+
+    def test_exact_skill_filter(self):
+        self.assertEqual(list(filter_by_skill(Alumni.objects.all(), ' PYTHON ')), [self.ada])
+        self.assertEqual(list(filter_by_skill(Alumni.objects.all(), 'pyth')), [])
+
+    def test_backfill_restores_links(self):
+        self.ada.skill_links.all().delete()
+        self.assertEqual(backfill_skills(), 2)
+        self.assertEqual(self._skills(self.ada), ['Python', 'Data Analysis'])
+
+    def test_autocomplete_endpoint_matches_prefix(self):
+        _make_alumni('linus@example.com', skills='Python')
+        self.client.force_login(self.grace.admin)
+        res = self.client.get(reverse('skill_autocomplete'), {'q': 'py'})
+        self.assertEqual(res.status_code, 200)
+        results = res.json()['results']
+        self.assertEqual([item['name'] for item in results], ['Python', 'Pyramid Scheming'])
+        self.assertEqual(results[0]['alumni_count'], 2)
+
+    def test_directory_filters_by_skill(self):
+        self.client.force_login(self.grace.admin)
+        res = self.client.get(reverse('alumni_directory_data'), {'skill': 'data analysis'})
+        self.assertEqual(res.json()['total_count'], 1)
+        self.assertContains(res, 'Data Analysis')
+
+
+class RecipientTypeaheadTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.User = get_user_model()
+        self.coordinator = self.User.objects.create_user(
+            email='coordinator@example.com', password='x', user_type='2', is_verified=True
+        )
+        for first_name, last_name in [('Amara', 'Okello'), ('Amos', 'Kato'), ('Brian', 'Amanya'), ('Clare', 'Nakato')]:
+            self.User.objects.create_user(
+                email=f'{first_name.lower()}@example.com', password='x',
+                first_name=first_name, last_name=last_name, is_verified=True,
+            )
+        self.User.objects.create_user(email='amelia@example.com', password='x', first_name='Amelia')
+
+    def _fetch(self, **params):
+        self.client.force_login(self.coordinator)
+        res = self.client.get(reverse('coordinator_alumni_search'), params)
+        self.assertEqual(res.status_code, 200)
+        return res.json()
+
+    def _names(self, data):
+        return sorted(result['label'].split(' — ')[0] for result in data['results'])
+
+    def test_prefix_matches_names_email_and_student_id(self):
+        self.assertEqual(self._names(self._fetch(search='am')), ['Amara Okello', 'Amos Kato', 'Brian Amanya'])
+        self.assertEqual(self._names(self._fetch(search='clare@')), ['Clare Nakato'])
+        self.assertEqual(self._names(self._fetch(search='ama oke')), ['Amara Okello'])
+        self.assertEqual(self._fetch(search='kel')['results'], [])
+
+        student_id = Alumni.objects.get(admin__first_name='Amos').student_id
+        self.assertEqual(self._names(self._fetch(student_id=student_id.lower())), ['Amos Kato'])
+
+    def test_limit_and_cursor_walk_all_matches(self):
+        first = self._fetch(limit=3)
+        self.assertEqual(len(first['results']), 3)
+        self.assertEqual((first['filtered_count'], first['total_count']), (4, 4))
+        second = self._fetch(limit=3, cursor=first['next_cursor'])
+        self.assertEqual(len(second['results']), 1)
+        self.assertIsNone(second['next_cursor'])
+
+    def test_counts_are_cached_between_requests(self):
+        request = RequestFactory().get('/', {'search': 'am', 'limit': 2})
+        search_recipients(request.GET)
+        with CaptureQueriesContext(connection) as queries:
+            page, filtered_count, total_count = search_recipients(request.GET)
+        self.assertEqual((len(page), filtered_count, total_count), (2, 3, 4))
+        self.assertEqual(len(queries), 1)
+
+
+class RemoteRecipientFieldTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.User = get_user_model()
+        self.coordinator = self.User.objects.create_user(
+            email='coordinator@example.com', password='x', user_type='2', is_verified=True
+        )
+        self.alumni = [
+            self.User.objects.create_user(
+                email=f'member{index}@example.com', password='x',
+                first_name='Member', last_name=f'Surname{index}', is_verified=True,
+            ).alumni
+            for index in range(4)
+        ]
+
+    def test_form_renders_only_selected_recipient(self):
+        chosen = self.alumni[2]
+        html = str(CoordinatorMessageForm(initial={'recipient': chosen})['recipient'])
+        self.assertEqual(html.count('<option'), 2)
+        self.assertIn(f'value="{chosen.pk}" selected', html)
+        self.assertIn('data-search-url="/coordinator/messages/alumni-search/"', html)
+
+    def test_submitted_recipient_is_validated_by_primary_key(self):
+        data = {'recipient': self.alumni[1].pk, 'subject': 'Hello', 'content': 'Hi there'}
+        form = CoordinatorMessageForm(data)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(form.is_valid(), form.errors)
+        # The field lookup and the model's foreign-key check, both by primary key.
+        self.assertLessEqual(len(queries), 2)
+        for query in queries:
+            self.assertIn(f'"main_app_alumni"."id" = {self.alumni[1].pk}', query['sql'])
+        self.assertEqual(form.cleaned_data['recipient'], self.alumni[1])
+
+        self.alumni[3].allow_contact = False
+        self.alumni[3].save()
+        form = MessageForm({**data, 'recipient': self.alumni[3].pk})
+        self.assertFalse(form.is_valid())
+        self.assertIn('recipient', form.errors)
+
+    def test_coordinator_can_send_through_remote_field(self):
+        self.client.force_login(self.coordinator)
+        page = self.client.get(reverse('coordinator_send_message'))
+        self.assertEqual(page.status_code, 200)
+        self.assertNotContains(page, 'Surname0')
+
+        res = self.client.post(reverse('coordinator_send_message'), {
+            'recipient': self.alumni[0].pk, 'subject': 'Hello', 'content': 'Hi there',
+        })
+        self.assertRedirects(res, reverse('coordinator_messages_inbox'), fetch_redirect_response=False)
+        self.assertTrue(Message.objects.filter(recipient=self.alumni[0], sender_type='coordinator').exists())
+
+    def test_alumni_recipient_search_is_paginated(self):
+        self.client.force_login(self.alumni[0].admin)
+        data = self.client.get(reverse('alumni_recipient_search'), {'search': 'surn', 'limit': 3}).json()
+        self.assertEqual(len(data['results']), 3)
+        self.assertEqual(data['filtered_count'], 4)
+        self.assertIsNotNone(data['next_cursor'])
+
+    def test_alumni_recipient_search_hides_emails_and_private_profiles(self):
+        Alumni.objects.filter(pk=self.alumni[2].pk).update(privacy_level='private')
+        self.User.objects.filter(pk=self.alumni[3].admin_id).update(is_verified=False)
+        self.client.force_login(self.alumni[0].admin)
+        url = reverse('alumni_recipient_search')
+        self.assertEqual(self.client.get(url, {'search': 'member1@'}).json()['results'], [])
+        data = self.client.get(url, {'search': 'surn'}).json()
+        self.assertEqual([item['id'] for item in data['results']], [self.alumni[0].pk, self.alumni[1].pk])
+        self.assertEqual(set(data['results'][0]), {'id', 'label'})
+
+        self.client.force_login(self.coordinator)
+        data = self.client.get(reverse('coordinator_alumni_search'), {'search': 'member1@'}).json()
+        self.assertEqual([item['id'] for item in data['results']], [self.alumni[1].pk])
+
+    def test_message_form_accepts_only_what_the_picker_shows(self):
+        Alumni.objects.filter(pk=self.alumni[2].pk).update(privacy_level='private')
+        self.User.objects.filter(pk=self.alumni[3].admin_id).update(is_verified=False)
+        data = {'subject': 'Hello', 'content': 'Hi there'}
+        self.assertTrue(MessageForm({**data, 'recipient': self.alumni[1].pk}).is_valid())
+        for hidden in self.alumni[2:]:
+            self.assertIn('recipient', MessageForm({**data, 'recipient': hidden.pk}).errors)
+        self.assertIn('placeholder="Search by name or COSA ID"', str(MessageForm()['recipient']))
+
+
+class CommentThreadMixin:
+    def setUp(self):
+        cache.clear()
+        self.User = get_user_model()
+        coordinator = self.User.objects.create_user(
+            email='coordinator@example.com', password='x', user_type='2', is_verified=True
+        )
+        self.viewer = self.User.objects.create_user(email='viewer@example.com', password='x', is_verified=True)
+        self.article = News.objects.create(
+            title='Reunion', content='Details', slug='reunion',
+            author=coordinator.alumnicoordinator, is_published=True,
+        )
+
+    def _add_thread(self, liked_by=None):
+        comment = Comment.objects.create(user=self.viewer, content_type='news', object_id=self.article.id, content='Top')
+        reply = Comment.objects.create(
+            user=self.viewer, content_type='news', object_id=self.article.id, content='Reply', parent=comment
+        )
+        nested = Comment.objects.create(
+            user=self.viewer, content_type='news', object_id=self.article.id, content='Nested', parent=reply
+        )
+        if liked_by:
+            CommentLike.objects.create(user=liked_by, comment=nested)
+        return comment, reply, nested
+
+
+class CommentEngagementTests(CommentThreadMixin, TestCase):
+    def test_detail_page_queries_do_not_grow_with_comments(self):
+        self.client.force_login(self.viewer)
+        url = reverse('news_detail', args=[self.article.slug])
+
+        self._add_thread(liked_by=self.viewer)
+        self.client.get(url)  # warm the header badge cache
+        with CaptureQueriesContext(connection) as small:
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+        for _ in range(5):
+            self._add_thread(liked_by=self.viewer)
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get(url)
+        self.assertEqual(len(large), len(small))
+        self.assertEqual(response.context['total_comments'], 18)
+
+
+class EngagementCounterTests(CommentThreadMixin, TestCase):
+    def test_counters_follow_likes_comments_and_approval(self):
+        comment, reply, nested = self._add_thread(liked_by=self.viewer)
+        Like.objects.create(user=self.viewer, content_type='news', object_id=self.article.id)
+        self.article.refresh_from_db()
+        self.assertEqual((self.article.likes_count, self.article.comments_count), (1, 3))
+        reply.refresh_from_db()
+        nested.refresh_from_db()
+        self.assertEqual((reply.replies_count, nested.likes_count), (1, 1))
+
+        nested.is_approved = False
+        nested.save()
+        reply.refresh_from_db()
+        self.assertEqual(reply.replies_count, 0)
+
+        comment.delete()
+        Like.objects.all().delete()
+        self.article.refresh_from_db()
+        self.assertEqual((self.article.likes_count, self.article.comments_count), (0, 0))
+
+    def test_toggle_endpoints_read_counters(self):
+        comment, _, _ = self._add_thread()
+        self.client.force_login(self.viewer)
+        res = self.client.post(reverse('toggle_like'), {'content_type': 'news', 'object_id': self.article.id})
+        self.assertEqual(res.json(), {'liked': True, 'total_likes': 1})
+        res = self.client.post(reverse('toggle_comment_like'), {'comment_id': comment.id})
+        self.assertEqual(res.json(), {'liked': True, 'total_likes': 1})
+        res = self.client.post(reverse('toggle_like'), {'content_type': 'news', 'object_id': self.article.id})
+        self.assertEqual(res.json(), {'liked': False, 'total_likes': 0})
+
+    def test_reconcile_repairs_drift(self):
+        comment, _, _ = self._add_thread(liked_by=self.viewer)
+        News.objects.update(likes_count=7, comments_count=0)
+        Comment.objects.update(replies_count=5)
+        repaired = reconcile_counters()
+        self.assertEqual(repaired['News Articles likes'], 1)
+        self.assertEqual(repaired['Comment replies'], 3)
+        self.article.refresh_from_db()
+        comment.refresh_from_db()
+        self.assertEqual((self.article.likes_count, self.article.comments_count), (0, 3))
+        self.assertEqual(comment.replies_count, 1)
+        self.assertEqual(sum(reconcile_counters().values()), 0)
+
+
+class CommentPathTests(CommentThreadMixin, TestCase):
+    def test_paths_order_threads_and_subtrees(self):
+        comment, reply, nested = self._add_thread()
+        second = Comment.objects.create(
+            user=self.viewer, content_type='news', object_id=self.article.id, content='Second', parent=comment
+        )
+        self.assertEqual(nested.path, '/'.join(Comment.path_segment(pk) for pk in (comment.pk, reply.pk, nested.pk)))
+        self.assertEqual(nested.depth, 2)
+        with self.assertNumQueries(1):
+            self.assertEqual(comment.get_all_nested_replies(), [reply, nested, second])
+        self.assertEqual(list(reply.get_descendants()), [nested])
+
+    def test_hidden_branches_are_skipped(self):
+        comment, reply, nested = self._add_thread()
+        reply.is_approved = False
+        reply.save()
+        self.assertEqual(comment.get_all_nested_replies(), [])
+        self.assertEqual(load_replies(comment)[0], [])
+
+    def test_load_replies_pages_through_subtree(self):
+        comment, reply, nested = self._add_thread(liked_by=self.viewer)
+        second = Comment.objects.create(
+            user=self.viewer, content_type='news', object_id=self.article.id, content='Second', parent=comment
+        )
+        page, next_path = load_replies(comment, self.viewer, limit=2)
+        self.assertEqual(page, [reply, nested])
+        self.assertTrue(page[1].user_liked)
+        page, next_path = load_replies(comment, self.viewer, after_path=next_path, limit=2)
+        self.assertEqual((page, next_path), ([second], None))
+
+    def test_replies_beyond_max_depth_attach_to_grandparent(self):
+        parent = None
+        for _ in range(Comment.MAX_DEPTH + 1):
+            parent = Comment.objects.create(
+                user=self.viewer, content_type='news', object_id=self.article.id, content='Deep', parent=parent
+            )
+        self.assertEqual(parent.depth, Comment.MAX_DEPTH - 1)
+        self.assertLessEqual(len(parent.path), 255)
+        self.assertEqual(parent.parent.depth, Comment.MAX_DEPTH - 2)
+
+    def test_failed_path_update_leaves_no_row(self):
+        with mock.patch.object(QuerySet, 'update', side_effect=DatabaseError), self.assertRaises(DatabaseError):
+            Comment.objects.create(user=self.viewer, content_type='news', object_id=self.article.id, content='Lost')
+        self.assertFalse(Comment.objects.filter(content='Lost').exists())
+
+
+class CommentPageTests(CommentThreadMixin, TestCase):
+    def _add_comments(self, count):
+        return [
+            Comment.objects.create(user=self.viewer, content_type='news', object_id=self.article.id, content=f'#{i}')
+            for i in range(count)
+        ]
+
+    def test_pages_are_newest_first_with_reply_previews(self):
+        comment, reply, nested = self._add_thread(liked_by=self.viewer)
+        extra = Comment.objects.create(
+            user=self.viewer, content_type='news', object_id=self.article.id, content='Extra', parent=comment
+        )
+        newer = self._add_comments(2)
+
+        with self.assertNumQueries(5):
+            page = load_comment_page('news', self.article.id, self.viewer, per_page=2)
+            self.assertEqual(list(page), newer[::-1])
+        page = load_comment_page('news', self.article.id, self.viewer, cursor=page.next_cursor, per_page=2)
+        self.assertEqual((list(page), page.next_cursor), ([comment], None))
+
+        top = page.object_list[0]
+        self.assertEqual(top.get_replies(), [reply, nested][:REPLY_PREVIEW_SIZE])
+        self.assertTrue(top.get_replies()[1].user_liked)
+        self.assertEqual(top.more_replies_after, nested.path)
+        self.assertEqual(load_replies(top, after_path=top.more_replies_after)[0], [extra])
+
+    def test_detail_page_renders_first_page_only(self):
+        self._add_comments(15)
+        response = self.client.get(reverse('news_detail', args=[self.article.slug]))
+        self.assertEqual(len(response.context['comments']), 10)
+        self.assertContains(response, 'engagement-load-more')
+
+        res = self.client.get(reverse('comment_page'), {
+            'content_type': 'news', 'object_id': self.article.id, 'cursor': response.context['comments_cursor'],
+        })
+        data = res.json()
+        self.assertIsNone(data['next_cursor'])
+        self.assertEqual(data['comments_html'].count('class="comment-thread comment-item"'), 5)
+
+    def test_replies_endpoint_expands_threads(self):
+        comment, reply, nested = self._add_thread()
+        res = self.client.get(reverse('comment_replies', args=[comment.id]), {'after': reply.path})
+        data = res.json()
+        self.assertIsNone(data['next_after'])
+        self.assertIn(f'data-comment-id="{nested.id}"', data['replies_html'])
+        self.assertNotIn(f'data-comment-id="{reply.id}"', data['replies_html'])
+
+    def test_unpublished_content_hides_its_comments(self):
+        comment, reply, _ = self._add_thread()
+        News.objects.filter(pk=self.article.pk).update(is_published=False)
+        res = self.client.get(reverse('comment_page'), {'content_type': 'news', 'object_id': self.article.id})
+        self.assertEqual(res.status_code, 404)
+        res = self.client.get(reverse('comment_replies', args=[comment.id]), {'after': reply.path})
+        self.assertEqual(res.status_code, 404)
+
+
+class LikeBufferTests(CommentThreadMixin, TestCase):
+    def test_toggles_are_buffered_then_flushed_as_final_states(self):
+        other = self.User.objects.create_user(email='other@example.com', password='x', is_verified=True)
+        self.assertEqual(record_toggle(self.viewer, 'news', self.article.id), (True, 1))
+        self.assertEqual(record_toggle(other, 'news', self.article.id), (True, 2))
+        self.assertEqual(record_toggle(self.viewer, 'news', self.article.id), (False, 1))
+        self.assertFalse(Like.objects.exists())
+        self.assertTrue(is_liked(other, 'news', self.article.id))
+
+        self.assertEqual(flush_toggles(), 1)
+        self.assertEqual(list(Like.objects.values_list('user_id', flat=True)), [other.id])
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.likes_count, 1)
+        self.assertFalse(LikeToggle.objects.exists())
+
+        record_toggle(other, 'news', self.article.id)
+        flush_toggles()
+        self.article.refresh_from_db()
+        self.assertEqual((self.article.likes_count, Like.objects.count()), (0, 0))
+
+    def test_repeat_toggles_cancel_instead_of_stacking(self):
+        for expected in [(True, 1), (False, 0), (True, 1)]:
+            self.assertEqual(record_toggle(self.viewer, 'news', self.article.id), expected)
+        self.assertEqual(LikeToggle.objects.count(), 1)
+
+    def test_concurrent_toggles_of_one_user_count_once(self):
+        stored = likes._stored
+
+        def racing_stored(user, target, object_id):
+            # The same user's other request buffers its like in between.
+            LikeToggle.objects.create(user=user, target=target, object_id=object_id, liked=True)
+            return stored(user, target, object_id)
+
+        with mock.patch.object(likes, '_stored', racing_stored):
+            self.assertEqual(record_toggle(self.viewer, 'news', self.article.id), (True, 1))
+        self.assertEqual(LikeToggle.objects.count(), 1)
+
+    def test_toggles_flush_a_stale_buffer(self):
+        record_toggle(self.viewer, 'news', self.article.id)
+        LikeToggle.objects.update(created_at=timezone.now() - likes.FLUSH_AFTER)
+        other = self.User.objects.create_user(email='other@example.com', password='x', is_verified=True)
+        self.assertEqual(record_toggle(other, 'news', self.article.id), (True, 2))
+        self.assertFalse(LikeToggle.objects.exists())
+        self.assertEqual(Like.objects.count(), 2)
+
+    def test_counters_only_move_by_inserted_likes(self):
+        record_toggle(self.viewer, 'news', self.article.id)
+        # Every row conflicts, as when another writer inserted the same likes.
+        with mock.patch.object(Like.objects, 'bulk_create', return_value=[]):
+            self.assertEqual(flush_toggles(), 1)
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.likes_count, 0)
+
+    def test_pending_comment_likes_show_before_flush(self):
+        comment, _, _ = self._add_thread()
+        for _ in range(3):
+            record_toggle(self.viewer, 'comment', comment.id)
+        self.assertTrue(load_comment_page('news', self.article.id, self.viewer).object_list[0].user_liked)
+
+        out = StringIO()
+        call_command('flush_like_buffer', stdout=out)
+        self.assertIn('Applied 1 buffered toggles', out.getvalue())
+        comment.refresh_from_db()
+        self.assertEqual((comment.likes_count, CommentLike.objects.count()), (1, 1))
+
+
+class HeaderBadgeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.admin = User.objects.create_user(email='admin@example.com', password='x', user_type='1', is_verified=True)
+        self.alumnus = User.objects.create_user(email='alumnus@example.com', password='x', is_verified=True)
+        self.pending = User.objects.create_user(email='pending@example.com', password='x')
+        self.factory = RequestFactory()
+
+    def _badges(self, user, key):
+        request = self.factory.get('/')
+        request.user = user
+        return header_counts(request)[key]
+
+    def test_counts_are_cached_until_a_feeding_row_changes(self):
+        self.assertEqual(self._badges(self.admin, 'admin_badges')['alumni'], 1)
+        self.assertEqual(self._badges(self.alumnus, 'alumni_badges')['alerts'], 0)
+        with self.assertNumQueries(0):
+            self._badges(self.admin, 'admin_badges')
+            self._badges(self.alumnus, 'alumni_badges')
+
+        NotificationAlumni.objects.create(alumni=self.alumnus.alumni, title='Hi', message='Welcome')
+        self.assertEqual(self._badges(self.alumnus, 'alumni_badges')['alerts'], 1)
+
+        self.pending.is_verified = True
+        self.pending.save()
+        self.assertEqual(self._badges(self.admin, 'admin_badges')['alumni'], 0)
+
+    def test_logins_keep_the_shared_counts_cached(self):
+        self._badges(self.admin, 'admin_badges')
+        self.client.login(email='admin@example.com', password='x')
+        with self.assertNumQueries(0):
+            self._badges(self.admin, 'admin_badges')
+
+    def test_process_local_cache_keeps_counts_briefly(self):
+        self.assertEqual(badge_cache_timeout(), LOCAL_BADGE_CACHE_TIMEOUT)
+        shared = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://cache:6379/1'}}
+        with override_settings(CACHES=shared):
+            self.assertEqual(badge_cache_timeout(), BADGE_CACHE_TIMEOUT)
+
+
+class ConversationTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.admin = User.objects.create_user(
+            email='admin@example.com', password='x', user_type='1', is_verified=True, first_name='Ada'
+        )
+        self.alumnus = User.objects.create_user(email='alumnus@example.com', password='x', is_verified=True)
+        self.first = self._send('First thread', 'Welcome back to COSA')
+        self.second = self._send('Second thread', 'Reunion plans')
+
+    def _send(self, subject, content):
+        return Message.objects.create(
+            sender_type='admin', sender_admin=self.admin.admin, recipient=self.alumnus.alumni,
+            subject=subject, content=content,
+        )
+
+    def _reply(self, message, content, **sender):
+        return MessageReply.objects.create(message=message, content=content, **sender)
+
+    def test_replies_move_threads_to_the_top_and_count_as_unread(self):
+        self.assertEqual([c.subject for c in inbox(self.alumnus, 'recipient')], ['Second thread', 'First thread'])
+
+        self._reply(self.first, 'Thanks, glad to be here', sender_type='alumni', sender_alumni=self.alumnus.alumni)
+        conversation = Conversation.objects.get(pk=self.first.pk)
+        self.assertEqual((conversation.sender_unread, conversation.recipient_unread), (1, 1))
+        self.assertEqual(conversation.last_snippet, 'Thanks, glad to be here')
+        self.assertEqual([c.subject for c in inbox(self.admin, 'sender')], ['First thread', 'Second thread'])
+
+        self._reply(self.first, 'See you soon', sender_type='admin', sender_admin=self.admin.admin)
+        conversation.refresh_from_db()
+        self.assertEqual((conversation.sender_unread, conversation.recipient_unread), (1, 2))
+
+    def test_inbox_is_one_query(self):
+        with self.assertNumQueries(1):
+            rows = [(c.sender.get_full_name(), c.last_snippet) for c in inbox(self.alumnus, 'recipient')]
+        self.assertEqual(rows[0], ('Ada', 'Reunion plans'))
+
+    def test_viewing_a_thread_clears_only_the_viewers_unread_count(self):
+        self._reply(self.first, 'Any news?', sender_type='alumni', sender_alumni=self.alumnus.alumni)
+        self.client.force_login(self.alumnus)
+        self.assertContains(self.client.get(reverse('messages_inbox')), 'Reunion plans')
+        self.client.get(reverse('view_message', args=[self.first.id]))
+        conversation = Conversation.objects.get(pk=self.first.pk)
+        self.assertEqual((conversation.sender_unread, conversation.recipient_unread), (1, 0))
+
+        self.client.force_login(self.admin)
+        self.assertContains(self.client.get(reverse('admin_messages_inbox')), '1 new reply')
+        self.client.get(reverse('admin_view_message', args=[self.first.id]))
+        self.assertEqual(Conversation.objects.get(pk=self.first.pk).sender_unread, 0)
+
+    def test_deleting_a_reply_and_rebuilding_restore_the_latest_entry(self):
+        reply = self._reply(self.first, 'Oops', sender_type='alumni', sender_alumni=self.alumnus.alumni)
+        reply.delete()
+        conversation = Conversation.objects.get(pk=self.first.pk)
+        self.assertEqual((conversation.last_message_at, conversation.last_snippet), (self.first.created_at, 'Welcome back to COSA'))
+
+        self._reply(self.second, 'Count me in', sender_type='alumni', sender_alumni=self.alumnus.alumni)
+        before = list(Conversation.objects.values_list('pk', 'last_snippet', 'last_message_at'))
+        out = StringIO()
+        call_command('rebuild_conversations', stdout=out)
+        self.assertIn('Rebuilt 2 conversations', out.getvalue())
+        self.assertEqual(list(Conversation.objects.values_list('pk', 'last_snippet', 'last_message_at')), before)
+
+
+class ReceiptTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        admin = User.objects.create_user(email='admin@example.com', password='x', user_type='1', is_verified=True)
+        self.alumnus = User.objects.create_user(email='alumnus@example.com', password='x', is_verified=True)
+        self.message = Message.objects.create(
+            sender_type='admin', sender_admin=admin.admin, recipient=self.alumnus.alumni, subject='Hi', content='Hello'
+        )
+        self.client.force_login(self.alumnus)
+
+    def _message_updates(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        return [q['sql'] for q in queries if q['sql'].startswith('UPDATE "main_app_message"')]
+
+    def test_inbox_delivers_once_then_skips_the_update(self):
+        self.assertEqual(len(self._message_updates(reverse('messages_inbox'))), 1)
+        self.message.refresh_from_db()
+        self.assertEqual(self.message.status, 'delivered')
+        self.assertEqual(self._message_updates(reverse('messages_inbox')), [])
+
+    def test_reading_is_a_conditional_update(self):
+        url = reverse('view_message', args=[self.message.id])
+        self.assertEqual(len(self._message_updates(url)), 1)
+        self.message.refresh_from_db()
+        self.assertEqual(self.message.status, 'read')
+        self.assertIsNotNone(self.message.read_at)
+        self.assertEqual(self._message_updates(url), [])
+        self.assertEqual(self.client.get(reverse('messages_inbox')).context['alumni_badges']['messages'], 0)
+
+
+class MySQLStyleBooleans(SQLiteOperations):
+    """
+    Compare booleans explicitly, as Django does on MySQL.
+
+    On SQLite Django writes ``filter(flag=True)`` as a bare ``WHERE "flag"``,
+    and the planner cannot use a composite index such as
+    ``(is_active, created_at)`` from that term, so plans would not match
+    production's.
+    """
+
+    def conditional_expression_supported_in_where_clause(self, expression):
+        if isinstance(expression, (Exists, Lookup)):
+            return True
+        if isinstance(expression, ExpressionWrapper) and expression.conditional:
+            return self.conditional_expression_supported_in_where_clause(expression.expression)
+        if getattr(expression, 'conditional', False):
+            return False
+        return super().conditional_expression_supported_in_where_clause(expression)
+
+
+class QueryPlanTests(TestCase):
+    """Hot views must reach the messaging, notification and content tables through indexes."""
+
+    maxDiff = None
+
+    WATCHED_TABLES = {
+        'main_app_alumni', 'main_app_comment', 'main_app_conversation', 'main_app_event', 'main_app_jobposting',
+        'main_app_like', 'main_app_message', 'main_app_news', 'main_app_notificationalumni',
+    }
+    FULL_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)(?: AS (\w+))?$')
+    ALIAS = re.compile(r'"(\w+)" (\w+)')
+
+    def setUp(self):
+        cache.clear()
+        operations = mock.patch.object(connections['default'], 'ops', MySQLStyleBooleans(connections['default']))
+        operations.start()
+        self.addCleanup(operations.stop)
+        User = get_user_model()
+        self.admin = User.objects.create_user(
+            email='admin@example.com', password='x', user_type='1', is_verified=True
+        )
+        self.coordinator = User.objects.create_user(
+            email='coordinator@example.com', password='x', user_type='2', is_verified=True
+        )
+        coordinator = self.coordinator.alumnicoordinator
+        self.alumnus = User.objects.create_user(email='alumnus@example.com', password='x', is_verified=True)
+        alumni = self.alumnus.alumni
+        now = timezone.now()
+        self.job = JobPosting.objects.create(
+            title='Analyst', company=Company.objects.create(name='Acme'), description='Numbers', job_type='full_time',
+            location='Kampala', posted_by=alumni, application_deadline=now + timedelta(days=30),
+        )
+        self.event = Event.objects.create(
+            title='Reunion', description='Dinner', event_type='reunion', organizer=coordinator,
+            start_date=now + timedelta(days=7), end_date=now + timedelta(days=8),
+        )
+        self.article = News.objects.create(
+            title='Launch', content='News', slug='launch', author=coordinator, is_published=True, publish_date=now,
+        )
+        Comment.objects.create(user=self.alumnus, content_type='news', object_id=self.article.id, content='Nice')
+        Like.objects.create(user=self.alumnus, content_type='news', object_id=self.article.id)
+        NotificationAlumni.objects.create(alumni=alumni, title='Hi', message='Welcome')
+        Message.objects.create(
+            sender_type='admin', sender_admin=self.admin.admin, recipient=alumni, subject='Hello', content='Welcome'
+        )
+
+    def _full_scans(self, queries):
+        scans = []
+        with connection.cursor() as cursor:
+            for query in queries:
+                sql = query['sql']
+                if not sql.startswith(('SELECT', 'UPDATE', 'DELETE')):
+                    continue
+                aliases = {alias: table for table, alias in self.ALIAS.findall(sql)}
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                for row in cursor.fetchall():
+                    match = self.FULL_SCAN.match(row[-1])
+                    if not match:
+                        continue
+                    table = aliases.get(match.group(1), match.group(1))
+                    if table in self.WATCHED_TABLES:
+                        scans.append(f'{table}: {sql}')
+        return scans
+
+    def assertIndexedViews(self, names):
+        for name in names:
+            url = reverse(name[0], args=name[1]) if isinstance(name, tuple) else reverse(name)
+            # The first request fills the cached dashboard and badge counts,
+            # which are whole-table aggregates rebuilt only when data changes.
+            self.assertEqual(self.client.get(url).status_code, 200)
+            with self.subTest(view=url), CaptureQueriesContext(connection) as queries:
+                self.client.get(url)
+                self.assertEqual(self._full_scans(queries), [])
+
+    def test_unindexed_filters_are_reported(self):
+        with CaptureQueriesContext(connection) as queries:
+            list(News.objects.filter(category='general'))
+        self.assertEqual(len(self._full_scans(queries)), 1)
+
+    def test_public_views(self):
+        self.assertIndexedViews([
+            'public_job_board', 'public_events', 'public_news',
+            ('news_detail', [self.article.slug]), ('job_detail', [self.job.id]), ('event_detail', [self.event.id]),
+        ])
+
+    def test_alumni_views(self):
+        self.client.force_login(self.alumnus)
+        self.assertIndexedViews([
+            'alumni_home', 'alumni_directory', 'job_board', 'events',
+            'messages_inbox', 'messages_sent', 'notifications',
+        ])
+
+    def test_admin_views(self):
+        self.client.force_login(self.admin)
+        self.assertIndexedViews(['admin_home', 'admin_messages_inbox'])
+
+    def test_coordinator_views(self):
+        self.client.force_login(self.coordinator)
+        self.assertIndexedViews(['coordinator_home', 'coordinator_messages_inbox'])
+
+
+class NotificationFanoutTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.coordinator = User.objects.create_user(
+            email='coordinator@example.com', password='x', user_type='2', is_verified=True
+        )
+        self.alumni = [
+            User.objects.create_user(email=f'member{index}@example.com', password='x', is_verified=True).alumni
+            for index in range(5)
+        ]
+        User.objects.create_user(email='pending@example.com', password='x')
+        self.client.force_login(self.coordinator)
+
+    def _broadcast(self, **fields):
+        return fanout.submit_broadcast(self.coordinator, title='Reunion', message='Save the date', **fields)
+
+    def test_sending_only_queues_the_broadcast(self):
+        response = self.client.post(reverse('send_notification'), {
+            'title': 'Reunion', 'message': 'Save the date', 'target_audience': 'all',
+        })
+        self.assertRedirects(response, reverse('send_notification'))
+        broadcast = NotificationBroadcast.objects.get()
+        self.assertEqual((broadcast.status, broadcast.sender), ('pending', self.coordinator))
+        self.assertFalse(NotificationAlumni.objects.exists())
+
+        status = self.client.get(reverse('broadcast_status', args=[broadcast.id])).json()
+        self.assertEqual((status['status'], status['percent']), ('pending', 0))
+
+    def test_level_audience_from_the_form_targets_the_degree(self):
+        department = Department.objects.create(name='Sciences', code='SCI')
+        degree = Degree.objects.create(name='Sciences', degree_type='S6', department=department)
+        Alumni.objects.filter(pk=self.alumni[0].pk).update(degree=degree)
+        self.client.post(reverse('send_notification'), {
+            'title': 'Class news', 'message': 'Hello', 'target_audience': 'level', 'level': degree.id,
+        })
+        broadcast = NotificationBroadcast.objects.get()
+        self.assertEqual((broadcast.audience, broadcast.degree), ('degree', degree))
+        fanout.run_broadcast(broadcast.id)
+        self.assertEqual(list(NotificationAlumni.objects.values_list('alumni', flat=True)), [self.alumni[0].pk])
+
+    def test_chunks_report_progress_and_reach_verified_alumni(self):
+        broadcast = self._broadcast()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(fanout.run_broadcast(broadcast.id, chunk_size=2))
+        inserts = [q for q in queries if 'INTO "main_app_notificationalumni"' in q['sql']]
+        self.assertEqual(len(inserts), 3)
+        broadcast.refresh_from_db()
+        self.assertEqual((broadcast.status, broadcast.processed, broadcast.total), ('completed', 5, 5))
+        self.assertEqual(broadcast.last_alumni_id, self.alumni[-1].pk)
+        self.assertEqual(
+            sorted(broadcast.notifications.values_list('alumni', flat=True)), [alumni.pk for alumni in self.alumni]
+        )
+        self.assertFalse(fanout.run_broadcast(broadcast.id))
+
+    def test_each_recipient_gets_a_live_notification_event(self):
+        broadcast = self._broadcast()
+        with mock.patch.object(live, 'publish') as publish:
+            fanout.run_broadcast(broadcast.id, chunk_size=2)
+        events = {
+            user_ids[0]: event for (user_ids, event), _ in publish.call_args_list if event['type'] == 'notification'
+        }
+        self.assertEqual(sorted(events), sorted(alumni.admin_id for alumni in self.alumni))
+        event = events[self.alumni[0].admin_id]
+        self.assertEqual((event['title'], event['message']), ('Reunion', 'Save the date'))
+        self.assertEqual(event['id'], NotificationAlumni.objects.get(alumni=self.alumni[0]).pk)
+
+    def test_retried_broadcasts_do_not_notify_twice(self):
+        broadcast = self._broadcast()
+        fanout.run_broadcast(broadcast.id, chunk_size=2)
+        # As if the worker had died before recording any progress
+        NotificationBroadcast.objects.filter(pk=broadcast.pk).update(status='failed', processed=0, last_alumni_id=0)
+
+        out = StringIO()
+        call_command('run_notification_fanout', '--once', '--retry-failed', stdout=out)
+        self.assertIn('Requeued 1 failed broadcasts', out.getvalue())
+        broadcast.refresh_from_db()
+        self.assertEqual(broadcast.status, 'completed')
+        self.assertEqual(NotificationAlumni.objects.count(), 5)
+
+    def test_stalled_running_broadcasts_are_reclaimed(self):
+        broadcast = self._broadcast()
+        fanout.run_broadcast(broadcast.id, chunk_size=2)
+        # As if the worker had been killed after the first chunk
+        NotificationBroadcast.objects.filter(pk=broadcast.pk).update(
+            status='running', processed=2, last_alumni_id=self.alumni[1].pk,
+            heartbeat_at=timezone.now() - timedelta(minutes=5),
+        )
+        self.assertEqual(fanout.requeue_stale(), [])
+
+        NotificationBroadcast.objects.filter(pk=broadcast.pk).update(
+            heartbeat_at=timezone.now() - fanout.STALE_AFTER - timedelta(seconds=1)
+        )
+        out = StringIO()
+        call_command('run_notification_fanout', '--once', stdout=out)
+        self.assertIn('Requeued 1 stalled broadcasts', out.getvalue())
+        broadcast.refresh_from_db()
+        self.assertEqual((broadcast.status, broadcast.processed), ('completed', 5))
+        self.assertEqual(NotificationAlumni.objects.count(), 5)
+
+
+class NotificationRetentionTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(email='member@example.com', password='x', is_verified=True)
+        self.friend = User.objects.create_user(email='friend@example.com', password='x', is_verified=True)
+        self.coordinator = User.objects.create_user(
+            email='coordinator@example.com', password='x', user_type='2', is_verified=True
+        )
+        old = timezone.now() - timedelta(days=200)
+        self.stale = [
+            NotificationAlumni.objects.create(alumni=self.user.alumni, title=f'Old {index}', message='m', is_read=True)
+            for index in range(3)
+        ]
+        self.old_unread = NotificationAlumni.objects.create(alumni=self.user.alumni, title='Unread', message='m')
+        self.recent = NotificationAlumni.objects.create(alumni=self.user.alumni, title='New', message='m', is_read=True)
+        NotificationCoordinator.objects.create(coordinator=self.coordinator.alumnicoordinator, title='Old', message='m', is_read=True)
+        Notification.objects.create(recipient=self.user, sender=self.friend, notification_type='follow', is_read=True)
+        NotificationAlumni.objects.exclude(pk=self.recent.pk).update(created_at=old)
+        NotificationCoordinator.objects.update(created_at=old)
+        Notification.objects.update(created_at=old)
+
+    def test_only_old_read_notifications_are_archived_in_batches(self):
+        with CaptureQueriesContext(connection) as queries:
+            moved = retention.archive_read('alumni', retention.retention_cutoff(90), batch_size=2)
+        self.assertEqual(moved, 3)
+        deletes = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('DELETE')]
+        self.assertEqual(len(deletes), 2)
+        # Read rows feed no badge, so the delete signals look nothing up per row.
+        self.assertFalse([q for q in queries.captured_queries if 'FROM "main_app_alumni"' in q['sql']])
+        self.assertCountEqual(NotificationAlumni.objects.values_list('pk', flat=True), [self.old_unread.pk, self.recent.pk])
+        archived = ArchivedNotification.objects.filter(source='alumni')
+        self.assertCountEqual(archived.values_list('source_id', flat=True), [n.pk for n in self.stale])
+        self.assertEqual({a.recipient_id for a in archived}, {self.user.pk})
+
+    def test_command_archives_every_table_and_reports_sizes(self):
+        out = StringIO()
+        call_command('archive_notifications', '--days', '90', stdout=out)
+        self.assertEqual(
+            sorted(ArchivedNotification.objects.values_list('source', flat=True)),
+            ['alumni', 'alumni', 'alumni', 'coordinator', 'social'],
+        )
+        social = ArchivedNotification.objects.get(source='social')
+        self.assertEqual((social.recipient, social.sender, social.notification_type), (self.user, self.friend, 'follow'))
+        self.assertFalse(NotificationCoordinator.objects.exists())
+        self.assertIn('main_app_notificationalumni: 5 rows, 1 unread, 3 to archive', out.getvalue())
+        self.assertIn('main_app_notificationalumni: 2 rows, 1 unread, 0 to archive', out.getvalue())
+
+    def test_dry_run_and_jsonl_archive(self):
+        call_command('archive_notifications', '--dry-run', stdout=StringIO())
+        self.assertEqual(NotificationAlumni.objects.count(), 5)
+
+        path = os.path.join(tempfile.mkdtemp(), 'notifications.jsonl.gz')
+        self.addCleanup(shutil.rmtree, os.path.dirname(path))
+        call_command('archive_notifications', '--source', 'alumni', '--jsonl', path, stdout=StringIO())
+        with gzip.open(path, 'rt') as handle:
+            records = [json.loads(line) for line in handle]
+        self.assertEqual(sorted(r['source_id'] for r in records), sorted(n.pk for n in self.stale))
+        self.assertEqual({r['source'] for r in records}, {'alumni'})
+        self.assertFalse(ArchivedNotification.objects.exists())
+        self.assertEqual(Notification.objects.count(), 1)
+
+
+
+class NotificationFeedTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(email='member@example.com', password='x', is_verified=True)
+        self.friend = User.objects.create_user(
+            email='friend@example.com', password='x', first_name='Fay', is_verified=True
+        )
+        start = timezone.now() - timedelta(hours=1)
+        # Interleave the two tables, with one alumni and one social row sharing a timestamp.
+        self.items = []
+        for minute, source in enumerate(['alumni', 'social', 'alumni', 'social', 'alumni']):
+            if source == 'alumni':
+                row = NotificationAlumni.objects.create(alumni=self.user.alumni, title=f'Item {minute}', message='m')
+            else:
+                row = Notification.objects.create(recipient=self.user, sender=self.friend, notification_type='follow')
+            type(row).objects.filter(pk=row.pk).update(created_at=start + timedelta(minutes=min(minute, 3)))
+            self.items.append((source, row.pk))
+        Notification.objects.create(recipient=self.friend, sender=self.user, notification_type='follow')
+        self.client.force_login(self.user)
+
+    def _feed(self, **params):
+        return self.client.get(reverse('notifications_feed'), params).json()
+
+    def test_feed_merges_both_tables_newest_first_in_one_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            results = feed_page(self.user, limit=10).object_list
+        self.assertEqual(len(queries), 1)
+        self.assertIn('UNION ALL', queries[0]['sql'])
+        # Ties on created_at order the 'social' source before 'alumni'.
+        expected = [self.items[i] for i in (3, 4, 2, 1, 0)]
+        self.assertEqual([(item['source'], item['id']) for item in results], expected)
+        self.assertEqual(results[1]['title'], 'Item 4')
+        self.assertEqual(results[0]['sender']['name'], 'Fay')
+        self.assertEqual(results[0]['title'], 'Follow')
+
+    def test_cursor_pages_cover_the_feed_once(self):
+        seen, cursor = [], None
+        while True:
+            data = self._feed(limit=2, **({'cursor': cursor} if cursor else {}))
+            seen += [(item['source'], item['id']) for item in data['results']]
+            cursor = data['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual(seen, [self.items[i] for i in (3, 4, 2, 1, 0)])
+        self.assertEqual(self._feed(unread='1', cursor='garbage')['unread'], 5)
+
+    def test_mark_read_by_cursor_range(self):
+        first = self._feed(limit=2)
+        second = self._feed(limit=2, cursor=first['next_cursor'])
+        url = reverse('mark_notifications_read')
+        response = self.client.post(url, {
+            'first': second['results'][0]['cursor'], 'last': second['results'][-1]['cursor'],
+        })
+        self.assertEqual(response.json()['marked'], 2)
+        self.assertEqual(response.json()['unread'], 3)
+        self.assertTrue(NotificationAlumni.objects.get(pk=self.items[2][1]).is_read)
+        self.assertTrue(Notification.objects.get(pk=self.items[1][1]).is_read)
+        self.assertEqual([item['id'] for item in self._feed(unread='1')['results']], [self.items[i][1] for i in (3, 4, 0)])
+
+        self.assertEqual(self.client.post(url, {'last': second['results'][-1]['cursor']}).status_code, 400)
+        self.assertEqual(self.client.post(url, {'first': 'garbage', 'last': 'garbage'}).status_code, 400)
+
+    def test_mark_read_leaves_newer_arrivals_unread(self):
+        page = self._feed()['results']
+        newer = NotificationAlumni.objects.create(alumni=self.user.alumni, title='Just in', message='m')
+        response = self.client.post(reverse('mark_notifications_read'), {
+            'first': page[0]['cursor'], 'last': page[-1]['cursor'],
+        })
+        self.assertEqual(response.json()['marked'], 5)
+        self.assertEqual([item['id'] for item in self._feed(unread='1')['results']], [newer.pk])
+        self.assertFalse(Notification.objects.get(recipient=self.friend).is_read)
+
+
+class LiveEventTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.alumnus = get_user_model().objects.create_user(email='live@example.com', password='x', is_verified=True)
+
+    def test_local_broker_fans_out_per_user_and_broadcasts(self):
+        async def scenario():
+            broker = LocalBroker()
+            mine, other = broker.subscribe(1), broker.subscribe(2)
+            broker.publish(1, {'type': 'badges'})
+            broker.publish(None, {'type': 'notification'})
+            received = [await mine.get(1), await mine.get(1), await other.get(1)]
+            mine.close()
+            broker.publish(1, {'type': 'badges'})
+            self.assertTrue(mine.queue.empty())
+            return received
+
+        self.assertEqual(
+            [event['type'] for event in async_to_sync(scenario)()],
+            ['badges', 'notification', 'notification'],
+        )
+
+    def test_new_notifications_reach_open_subscriptions(self):
+        broker = LocalBroker()
+
+        def notify():
+            with self.captureOnCommitCallbacks(execute=True):
+                NotificationAlumni.objects.create(alumni=self.alumnus.alumni, title='Reunion', message='Soon')
+
+        async def scenario():
+            subscription = broker.subscribe(self.alumnus.pk)
+            await sync_to_async(notify)()
+            await asyncio.sleep(0)
+            return [subscription.get_nowait()['type'] for _ in range(subscription.queue.qsize())]
+
+        live._broker = broker
+        try:
+            self.assertEqual(async_to_sync(scenario)(), ['badges', 'notification'])
+        finally:
+            live._broker = None
+
+    def test_long_poll_starts_with_a_badge_snapshot(self):
+        Notification.objects.create(recipient=self.alumnus, sender=self.alumnus, notification_type='follow')
+        self.client.force_login(self.alumnus)
+        res = self.client.get(reverse('live_events'), {'transport': 'poll', 'initial': 1})
+        [event] = res.json()['events']
+        self.assertEqual(event['type'], 'badges')
+        self.assertEqual(event['alumni_badges']['alerts'], 1)
+
+    def test_long_poll_returns_what_arrived_between_polls(self):
+        self.client.force_login(self.alumnus)
+        cursor = self.client.get(reverse('live_events'), {'transport': 'poll', 'initial': 1}).json()['cursor']
+        # Published while no poll was open, so no subscription saw it.
+        NotificationAlumni.objects.create(alumni=self.alumnus.alumni, title='Reunion', message='Soon')
+
+        res = self.client.get(reverse('live_events'), {'transport': 'poll', 'since': cursor}).json()
+        notification, badges = res['events']
+        self.assertEqual((notification['type'], notification['title']), ('notification', 'Reunion'))
+        self.assertEqual(badges['alumni_badges']['alerts'], 1)
+        self.assertEqual(feed_since(self.alumnus, res['cursor']), ([], res['cursor']))
+
+    def test_wsgi_long_poll_answers_at_once(self):
+        self.client.force_login(self.alumnus)
+        cursor = self.client.get(reverse('live_events'), {'transport': 'poll', 'initial': 1}).json()['cursor']
+        res = self.client.get(reverse('live_events'), {'transport': 'poll', 'since': cursor}).json()
+        self.assertEqual([event['type'] for event in res['events']], ['badges'])
+        self.assertEqual(res['retry'], LIVE_WSGI_POLL_INTERVAL)
+
+    def test_admin_and_coordinator_badges_are_live(self):
+        admin = get_user_model().objects.create_user(
+            email='admin@example.com', password='x', user_type='1', is_verified=True
+        )
+        self.client.force_login(admin)
+        self.assertContains(self.client.get(reverse('admin_home')), 'data-live-badge="admin_badges.alumni"')
+
+    def test_backlog_longer_than_a_poll_is_drained_in_order(self):
+        _, cursor = feed_since(self.alumnus, None)
+        created = [
+            NotificationAlumni.objects.create(alumni=self.alumnus.alumni, title=f'N{index}', message='x').pk
+            for index in range(30)
+        ]
+        received = []
+        while True:
+            items, cursor = feed_since(self.alumnus, cursor, limit=20)
+            if not items:
+                break
+            received += [item['id'] for item in items]
+        self.assertEqual(received, created)
+
+
+class DashboardStatsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.admin = User.objects.create_user(email='admin@example.com', password='x', user_type='1', is_verified=True)
+        self.alumnus = User.objects.create_user(email='alumnus@example.com', password='x', is_verified=True)
+        User.objects.create_user(email='pending@example.com', password='x')
+
+    def test_only_bumped_sections_are_recomputed(self):
+        stats = dashboard.dashboard_stats()
+        self.assertEqual((stats['alumni_verified'], stats['alumni_pending']), (1, 1))
+        with self.assertNumQueries(0):
+            dashboard.dashboard_stats()
+
+        Company.objects.create(name='Acme', industry='Tech', is_verified=True)
+        with self.assertNumQueries(1):
+            self.assertEqual(dashboard.dashboard_stats()['companies_verified'], 1)
+
+    def test_concurrent_readers_serve_the_previous_snapshot(self):
+        dashboard.dashboard_stats()
+        Company.objects.create(name='Acme', industry='Tech', is_verified=True)
+        cache.add(dashboard.LOCK_CACHE_KEY, True)
+        with self.assertNumQueries(0):
+            self.assertEqual(dashboard.dashboard_stats()['companies_verified'], 0)
+
+    def test_refresh_command_and_stats_endpoint(self):
+        Donation.objects.create(donor=self.alumnus.alumni, amount=25, donation_type='general', payment_status='completed')
+        out = StringIO()
+        call_command('refresh_dashboard_stats', '--section', 'donations', stdout=out)
+        self.assertIn('donations_completed_total=25', out.getvalue())
+
+        self.client.force_login(self.admin)
+        data = self.client.get(reverse('get_system_stats')).json()
+        self.assertEqual(data['total_donations'], 25.0)
+        self.assertEqual((data['total_alumni'], data['pending_verifications']), (1, 1))
+
+
+class DailyRollupTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.donor = get_user_model().objects.create_user(email='donor@example.com', password='x', is_verified=True).alumni
+
+    def _donate(self, amount, when=None, donation_type='general'):
+        donation = Donation.objects.create(
+            donor=self.donor, amount=amount, donation_type=donation_type, payment_status='completed'
+        )
+        if when is not None:
+            Donation.objects.filter(pk=donation.pk).update(created_at=when)
+        return donation
+
+    def test_saves_and_deletes_retally_their_day(self):
+        donation = self._donate(40)
+        self._donate(10, donation_type='scholarship')
+        today = timezone.localdate()
+        self.assertEqual(
+            list(DailyRollup.objects.filter(metric='donations', day=today).values_list('bucket', 'count', 'amount')),
+            [('general', 1, 40), ('scholarship', 1, 10)],
+        )
+        donation.payment_status = 'refunded'
+        donation.save()
+        self.assertEqual(rollups.totals('donations'), {'count': 1, 'total': 10})
+
+    def test_upsert_without_conflict_target_support(self):
+        # MySQL's ON DUPLICATE KEY upsert takes no unique_fields.
+        with mock.patch.object(connection.features, 'supports_update_conflicts_with_target', False):
+            self.assertNotIn('unique_fields', rollups._upsert_options())
+            with CaptureQueriesContext(connection) as queries:
+                self._donate(40)
+        inserts = [q['sql'] for q in queries.captured_queries if 'INSERT INTO "main_app_dailyrollup"' in q['sql']]
+        self.assertEqual(len(inserts), 1)
+        self.assertNotIn('ON CONFLICT', inserts[0])
+        self.assertEqual(rollups.totals('donations'), {'count': 1, 'total': 40})
+
+    def test_monthly_series_keeps_years_apart(self):
+        today = timezone.localdate()
+        this_month = timezone.make_aware(datetime(today.year, today.month, 1, 12))
+        self._donate(25, when=this_month)
+        self._donate(75, when=this_month.replace(year=today.year - 1))
+        call_command('backfill_rollups', '--metric', 'donations', stdout=StringIO())
+
+        trend = rollups.series('donations', 'month', 13, today=today)
+        self.assertEqual(len(trend), 13)
+        self.assertEqual((trend[0]['period'], trend[0]['total']), (this_month.date().replace(year=today.year - 1), 75))
+        self.assertEqual((trend[-1]['period'], trend[-1]['total']), (this_month.date(), 25))
+        self.assertEqual(sum(item['count'] for item in trend[1:-1]), 0)
+
+        weeks = rollups.series('donations', 'week', 2, today=today)
+        self.assertEqual(weeks[-1]['period'].weekday(), 0)
+
+    def test_analytics_page_reads_the_rollups(self):
+        self._donate(30)
+        admin = get_user_model().objects.create_user(email='admin@example.com', password='x', user_type='1', is_verified=True)
+        self.client.force_login(admin)
+        res = self.client.get(reverse('system_analytics'))
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.context['donation_stats']['total_amount'], 30)
+        self.assertEqual(res.context['donation_stats']['monthly_trend'][-1]['count'], 1)
+
+
+class ExcelExportTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.year = GraduationYear.objects.create(year='2015')
+        for index in range(3):
+            user = User.objects.create_user(
+                email=f'export{index}@example.com', password='x', first_name='Export', last_name=f'Member {index}'
+            )
+            user.alumni.graduation_year = self.year
+            user.alumni.current_city = 'Kampala'
+            user.alumni.save()
+
+    def _sheet(self, workbook):
+        with save_to_tempfile(workbook) as output:
+            return load_workbook(output).worksheets[0]
+
+    def test_alumni_export_streams_rows_and_summary(self):
+        with self.assertNumQueries(1):
+            filename, workbook = build_alumni_workbook(Alumni.objects.all(), 'basic')
+        self.assertTrue(filename.startswith('COSA_Alumni_Export_basic_'))
+
+        sheet = self._sheet(workbook)
+        rows = list(sheet.values)
+        self.assertEqual(rows[0][:3], ('Student ID', 'Full Name', 'Email'))
+        self.assertEqual(sorted(row[2] for row in rows[1:4]), [f'export{index}@example.com' for index in range(3)])
+        self.assertEqual(rows[6][0], 'Export Summary:')
+        self.assertEqual(rows[7][0], 'Total Registered Members Exported: 3')
+        self.assertTrue(sheet['A1'].font.bold)
+        self.assertEqual(sheet.column_dimensions['C'].width, len('export0@example.com') + 2)
+
+    def test_class_export_lists_one_year(self):
+        get_user_model().objects.create_user(email='other@example.com', password='x')
+        sheet = self._sheet(build_class_workbook(self.year)[1])
+        rows = list(sheet.values)
+        self.assertEqual([row[8] for row in rows[1:4]], ['Kampala'] * 3)
+        self.assertEqual(rows[6][0], 'Class of 2015 Alumni Export')
+        self.assertEqual(rows[7][0], 'Total Registered Members: 3')
+
+
+class AlumniStatisticsExportTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.department = Department.objects.create(name='Computing', code='CS')
+        self.degree = Degree.objects.create(name='BSc Computer Science', degree_type='S6', department=self.department)
+        for index, year in enumerate(['2015', '2016']):
+            user = User.objects.create_user(email=f'stats{index}@example.com', password='x', is_verified=True)
+            user.alumni.graduation_year = GraduationYear.objects.create(year=year)
+            user.alumni.degree = self.degree
+            user.alumni.current_country = 'Uganda'
+            user.alumni.is_mentor = index == 0
+            user.alumni.save()
+        User.objects.create_user(email='unplaced@example.com', password='x')
+
+    def _sheets(self):
+        with save_to_tempfile(build_statistics_workbook()[1]) as output:
+            workbook = load_workbook(output)
+        return {sheet.title: list(sheet.values) for sheet in workbook.worksheets}
+
+    def test_breakdowns_take_a_fixed_number_of_queries(self):
+        with self.assertNumQueries(7):
+            alumni_breakdowns()
+        for year in ['2017', '2018', '2019']:
+            GraduationYear.objects.create(year=year)
+            Degree.objects.create(
+                name=f'Diploma {year}', degree_type='S6',
+                department=Department.objects.create(name=f'Dept {year}', code=year),
+            )
+        with self.assertNumQueries(7):
+            alumni_breakdowns()
+
+    def test_workbook_has_one_sheet_per_breakdown(self):
+        sheets = self._sheets()
+        self.assertEqual(list(sheets), [
+            'Alumni Statistics', 'Graduation Years', 'Degrees', 'Departments', 'Employment', 'Privacy', 'Countries',
+        ])
+        overview = {row[0]: row[1:] for row in sheets['Alumni Statistics'][1:]}
+        self.assertEqual(overview['Total Registered Members'], (3, '100%'))
+        self.assertEqual(overview['Mentors'], (1, '33.3%'))
+        self.assertIn(('Class of 2016', 1, '33.3%'), sheets['Graduation Years'])
+        self.assertIn(('Not specified', 1, '33.3%'), sheets['Graduation Years'])
+        self.assertIn(('Computing', 2, '66.7%'), sheets['Departments'])
+        self.assertEqual(sheets['Countries'][1], ('Uganda', 2, '66.7%'))
+
+    def test_statistics_export_job_completes(self):
+        admin = get_user_model().objects.create_user(email='admin@example.com', password='x', user_type='1')
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        with override_settings(MEDIA_ROOT=media_root):
+            job = exports.submit_export(admin, 'statistics')
+            exports.run_job(job.id)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'completed')
+        self.assertTrue(job.filename.startswith('COSA_Alumni_Statistics_'))
+
+
+class ExportJobTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        User = get_user_model()
+        self.admin = User.objects.create_user(email='admin@example.com', password='x', user_type='1', is_verified=True)
+        User.objects.create_user(email='member@example.com', password='x', first_name='Member')
+        self.client.force_login(self.admin)
+
+    def test_identical_exports_share_one_job_until_the_data_changes(self):
+        url = reverse('admin_export_alumni_excel', args=['basic'])
+        first = self.client.get(url)
+        job = ExportJob.objects.get()
+        self.assertRedirects(first, reverse('export_job_detail', args=[job.id]))
+        self.assertContains(self.client.get(first.url), 'Preparing your export')
+        self.client.get(url)
+        self.assertEqual(ExportJob.objects.count(), 1)
+
+        get_user_model().objects.create_user(email='late@example.com', password='x')
+        self.client.get(url)
+        self.assertEqual(ExportJob.objects.count(), 2)
+
+    def test_worker_builds_the_artifact_and_reports_progress(self):
+        self.client.get(reverse('admin_export_alumni_excel', args=['basic']))
+        job = ExportJob.objects.get()
+        status = self.client.get(reverse('export_job_status', args=[job.id])).json()
+        self.assertEqual((status['status'], status['percent']), ('pending', 0))
+
+        out = StringIO()
+        call_command('run_export_jobs', '--once', stdout=out)
+        self.assertIn('Built 1 export jobs', out.getvalue())
+        status = self.client.get(reverse('export_job_status', args=[job.id])).json()
+        self.assertEqual((status['status'], status['processed'], status['total']), ('completed', 1, 1))
+
+        response = self.client.get(status['download_url'])
+        self.assertTrue(response['Content-Disposition'].startswith('attachment; filename="COSA_Alumni_Export_basic_'))
+        rows = list(load_workbook(BytesIO(b''.join(response.streaming_content))).worksheets[0].values)
+        self.assertEqual(rows[1][2], 'member@example.com')
+        response.close()
+
+    def test_expired_artifacts_are_purged(self):
+        job = exports.submit_export(self.admin, 'alumni', {'export_type': 'basic'})
+        exports.run_job(job.id)
+        job.refresh_from_db()
+        path = job.file.path
+        ExportJob.objects.filter(pk=job.pk).update(expires_at=timezone.now())
+        self.assertEqual(exports.purge_expired(), 1)
+        self.assertFalse(ExportJob.objects.exists())
+        self.assertFalse(os.path.exists(path))
+
+    def test_stalled_running_jobs_are_rebuilt(self):
+        job = exports.submit_export(self.admin, 'alumni', {'export_type': 'basic'})
+        ExportJob.objects.filter(pk=job.pk).update(
+            status='running', started_at=timezone.now() - exports.STALE_AFTER - timedelta(seconds=1)
+        )
+        self.assertEqual(exports.submit_export(self.admin, 'alumni', {'export_type': 'basic'}), job)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'pending')
+
+        ExportJob.objects.filter(pk=job.pk).update(
+            status='running', heartbeat_at=timezone.now() - exports.STALE_AFTER - timedelta(seconds=1)
+        )
+        out = StringIO()
+        call_command('run_export_jobs', '--once', stdout=out)
+        self.assertIn('Requeued 1 stalled export jobs', out.getvalue())
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'completed')
+
+    def test_alumni_cannot_see_export_jobs(self):
+        job = exports.submit_export(self.admin, 'statistics')
+        self.client.force_login(get_user_model().objects.get(email='member@example.com'))
+        self.assertEqual(self.client.get(reverse('export_job_status', args=[job.id])).status_code, 404)
+
+
+class StreamingExportTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.admin = User.objects.create_user(email='admin@example.com', password='x', user_type='1', is_verified=True)
+        self.donor = User.objects.create_user(email='donor@example.com', password='x', first_name='Dana')
+        User.objects.create_user(email='other@example.com', password='x', first_name='Otto')
+        Donation.objects.create(donor=self.donor.alumni, amount='12.50', donation_type='general', payment_status='completed')
+        self.client.force_login(self.admin)
+
+    def _body(self, response):
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_applies_the_alumni_filters(self):
+        response = self.client.get(reverse('export_data', args=['alumni', 'csv']), {'search': 'dana'})
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        with self.assertNumQueries(1):
+            lines = self._body(response).splitlines()
+        self.assertEqual(lines[0].split(',')[:4], ['student_id', 'first_name', 'last_name', 'email'])
+        self.assertEqual(len(lines), 2)
+        self.assertIn('donor@example.com', lines[1])
+
+    def test_jsonl_rows_are_plain_json(self):
+        response = self.client.get(reverse('export_data', args=['donations', 'jsonl']))
+        [row] = [json.loads(line) for line in self._body(response).splitlines()]
+        self.assertEqual((row['email'], row['amount'], row['payment_status']), ('donor@example.com', '12.50', 'completed'))
+        self.assertRegex(row['created_at'], r'^\d{4}-\d{2}-\d{2}T')
+
+    def test_unknown_datasets_and_alumni_are_refused(self):
+        self.assertEqual(self.client.get(reverse('export_data', args=['users', 'csv'])).status_code, 404)
+        self.client.force_login(self.donor)
+        self.assertRedirects(
+            self.client.get(reverse('export_data', args=['alumni', 'csv'])), reverse('login_page'), fetch_redirect_response=False
+        )
@@ -13,6 +13,7 @@ urlpatterns = [
     path("contact/", views.contact_us, name='contact_us'),
     path("alumni-directory/", views.public_alumni_directory, name='public_alumni_directory'),
     path("alumni-directory/data/", views.public_alumni_directory_data, name='public_alumni_directory_data'),
+    path("skills/autocomplete/", views.skill_autocomplete, name='skill_autocomplete'),
     path("jobs/", views.public_job_board, name='public_job_board'),
     path("job/<int:job_id>/", views.job_detail, name='job_detail'),
     path("events/", views.public_events, name='public_events'),
@@ -38,6 +39,13 @@ urlpatterns = [
     path("add_comment/", views.add_comment, name='add_comment'),
     path("add_reply/", views.add_reply, name='add_reply'),
     path("toggle_comment_like/", views.toggle_comment_like, name='toggle_comment_like'),
+    path("comments/", views.comment_page, name='comment_page'),
+    path("comments/<int:comment_id>/replies/", views.comment_replies, name='comment_replies'),
+    path("live/events/", views.live_events, name='live_events'),
+    path("exports/<int:job_id>/", views.export_job_detail, name='export_job_detail'),
+    path("exports/<int:job_id>/status/", views.export_job_status, name='export_job_status'),
+    path("exports/<int:job_id>/download/", views.export_job_download, name='export_job_download'),
+    path("exports/data/<str:dataset>/<str:fmt>/", views.export_data, name='export_data'),
     
     # System Administrator URLs
     path("admin/home/", admin_views.admin_home, name='admin_home'),
@@ -82,6 +90,7 @@ urlpatterns = [
     path("admin/messages/", admin_views.admin_messages_inbox, name='admin_messages_inbox'),
     path("admin/messages/send/", admin_views.admin_send_message, name='admin_send_message'),
     path("admin/messages/send/<int:recipient_id>/", admin_views.admin_send_message, name='admin_send_message_to'),
+    path("admin/messages/alumni-search/", admin_views.admin_alumni_search, name='admin_alumni_search'),
     path("admin/messages/view/<int:message_id>/", admin_views.admin_view_message, name='admin_view_message'),
     
     # Admin Export URLs
@@ -129,6 +138,7 @@ urlpatterns = [
     path("coordinator/feedback/pending/<int:feedback_id>/", coordinator_views.pending_feedback, name='pending_feedback'),
     
     path("coordinator/notifications/send/", coordinator_views.send_notification, name='send_notification'),
+    path("coordinator/notifications/broadcasts/<int:broadcast_id>/status/", coordinator_views.broadcast_status, name='broadcast_status'),
     path("coordinator/fcmtoken/", coordinator_views.coordinator_fcmtoken, name='coordinator_fcmtoken'),
     
     # Coordinator Messaging
@@ -163,6 +173,7 @@ urlpatterns = [
     path("alumni/messages/", alumni_views.messages_inbox, name='messages_inbox'),
     path("alumni/messages/send/", alumni_views.send_message, name='send_message'),
     path("alumni/messages/send/<int:recipient_id>/", alumni_views.send_message, name='send_message_to'),
+    path("alumni/messages/recipient-search/", alumni_views.alumni_recipient_search, name='alumni_recipient_search'),
     path("alumni/messages/view/<int:message_id>/", alumni_views.view_message, name='view_message'),
     path("alumni/messages/sent/", alumni_views.messages_sent, name='messages_sent'),
     path("alumni/messages/delete/<int:message_id>/", alumni_views.delete_message, name='delete_message'),
@@ -186,6 +197,7 @@ urlpatterns = [
     path("social/friends/<int:user_id>/", alumni_views.list_friends, name='list_friends_of'),
 
     path("social/notifications/", alumni_views.notifications_feed, name='notifications_feed'),
+    path("social/notifications/read/", alumni_views.mark_notifications_read, name='mark_notifications_read'),
     path("social/notifications/<int:notification_id>/read/", alumni_views.mark_notification_read, name='mark_notification_read'),
 
     # Social pages
@@ -1,19 +1,32 @@
+import asyncio
 import json
 from django.contrib import messages
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
-from django.http import HttpResponse, JsonResponse
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
 from django.views.decorators.csrf import csrf_exempt
-from django.db.models import Q
 from django.core.paginator import Paginator
 from django.utils import timezone
 from django.template.loader import render_to_string
 
 from .EmailBackend import EmailBackend
 from .models import *
+from .badges import badge_context
+from .counters import CONTENT_MODELS, read_counter
+from .excel_utils import XLSX_CONTENT_TYPE
+from .streaming_exports import DATASETS, FORMATS, streaming_export_response
+from .engagement import load_comment_page, load_engagement, load_replies, prime_comment
+from .likes import COMMENT, record_toggle
+from .live import get_broker
+from .notification_feed import feed_since
 from .forms import AlumniRegistrationForm, AlumniSearchForm, CommentForm
+from .pagination import KeysetPaginator, alumni_directory_keyset, cached_count, wants_cursor
+from .search import search_alumni
+from .skills import AUTOCOMPLETE_LIMIT, autocomplete_skills, filter_by_skill, prefetch_skills
 
 
 def login_page(request):
@@ -123,14 +136,14 @@ def _build_public_directory_context(request):
     if can_view and form.is_valid():
         search = form.cleaned_data.get('search')
         if search:
-            alumni_qs = alumni_qs.filter(
-                Q(admin__first_name__icontains=search) |
-                Q(admin__last_name__icontains=search) |
-                Q(current_company__name__icontains=search) |
-                Q(skills__icontains=search) |
-                Q(industry__icontains=search)
+            alumni_qs = search_alumni(alumni_qs, search).order_by(
+                'search_rank', *Alumni._meta.ordering
             )
         
+        skill = form.cleaned_data.get('skill')
+        if skill:
+            alumni_qs = filter_by_skill(alumni_qs, skill)
+        
         graduation_year = form.cleaned_data.get('graduation_year')
         if graduation_year:
             alumni_qs = alumni_qs.filter(graduation_year__year=graduation_year)
@@ -145,16 +158,24 @@ def _build_public_directory_context(request):
         if form.cleaned_data.get('willing_to_hire'):
             alumni_qs = alumni_qs.filter(willing_to_hire=True)
     
-    total_count = alumni_qs.count()
-    paginator = Paginator(alumni_qs, 24)
-    page_number = request.GET.get('page')
-    alumni_page = paginator.get_page(page_number)
+    # Cursors seek on the directory order, so ranked searches page by number
+    cursor_mode = wants_cursor(request) and not (form.is_valid() and form.cleaned_data.get('search'))
+    if cursor_mode:
+        keyed_qs, keys = alumni_directory_keyset(prefetch_skills(alumni_qs))
+        alumni_page = KeysetPaginator(keyed_qs, keys, 24).get_page(request.GET.get('cursor'))
+        total_count = cached_count(alumni_qs, 'public-directory', request.GET) if can_view else 0
+    else:
+        paginator = Paginator(prefetch_skills(alumni_qs), 24)
+        page_number = request.GET.get('page')
+        alumni_page = paginator.get_page(page_number)
+        total_count = paginator.count
     
     return {
         'form': form,
         'alumni': alumni_page,
         'total_count': total_count,
         'can_view_directory': can_view,
+        'cursor_mode': cursor_mode,
     }
 
 
@@ -175,6 +196,14 @@ def public_alumni_directory_data(request):
     
     alumni_page = context['alumni']
     
+    if context['cursor_mode']:
+        return JsonResponse({
+            'html': html,
+            'total_count': context['total_count'],
+            'next_cursor': alumni_page.next_cursor,
+            'previous_cursor': alumni_page.previous_cursor,
+        })
+    
     return JsonResponse({
         'html': html,
         'total_count': context['total_count'],
@@ -295,69 +324,10 @@ def news_detail(request, slug):
         is_published=True
     ).exclude(id=article.id).order_by('-publish_date')[:3]
     
-    # Like and comment functionality
-    user_liked = False
-    total_likes = 0
-    comments = []
-    total_comments = 0
-    
-    if request.user.is_authenticated:
-        # Check if user liked this article
-        user_liked = Like.objects.filter(
-            user=request.user,
-            content_type='news',
-            object_id=article.id
-        ).exists()
-    
-    # Get total likes
-    total_likes = Like.objects.filter(
-        content_type='news',
-        object_id=article.id
-    ).count()
-    
-    # Get comments
-    comments = Comment.objects.filter(
-        content_type='news',
-        object_id=article.id,
-        is_approved=True,
-        parent__isnull=True  # Only top-level comments
-    ).select_related('user').prefetch_related('replies__user').order_by('-created_at')
-    
-    # Add like status to comments and replies
-    for comment in comments:
-        if request.user.is_authenticated:
-            comment.user_liked = CommentLike.objects.filter(
-                user=request.user,
-                comment=comment
-            ).exists()
-            
-            # Add like status to replies
-            for reply in comment.replies.all():
-                reply.user_liked = CommentLike.objects.filter(
-                    user=request.user,
-                    comment=reply
-                ).exists()
-        else:
-            comment.user_liked = False
-            # Add like status to replies
-            for reply in comment.replies.all():
-                reply.user_liked = False
-    
-    total_comments = Comment.objects.filter(
-        content_type='news',
-        object_id=article.id,
-        is_approved=True
-    ).count()
-    
     context = {
         'article': article,
         'related_news': related_news,
-        'content_type': 'news',
-        'object_id': article.id,
-        'user_liked': user_liked,
-        'total_likes': total_likes,
-        'comments': comments,
-        'total_comments': total_comments,
+        **load_engagement('news', article, request.user),
     }
     
     # Intentionally avoid noisy prints in production paths
@@ -377,69 +347,10 @@ def job_detail(request, job_id):
             applicant=request.user.alumni
         ).exists()
     
-    # Like and comment functionality
-    user_liked = False
-    total_likes = 0
-    comments = []
-    total_comments = 0
-    
-    if request.user.is_authenticated:
-        # Check if user liked this job
-        user_liked = Like.objects.filter(
-            user=request.user,
-            content_type='job',
-            object_id=job.id
-        ).exists()
-    
-    # Get total likes
-    total_likes = Like.objects.filter(
-        content_type='job',
-        object_id=job.id
-    ).count()
-    
-    # Get comments
-    comments = Comment.objects.filter(
-        content_type='job',
-        object_id=job.id,
-        is_approved=True,
-        parent__isnull=True  # Only top-level comments
-    ).select_related('user').prefetch_related('replies__user').order_by('-created_at')
-    
-    # Add like status to comments and replies
-    for comment in comments:
-        if request.user.is_authenticated:
-            comment.user_liked = CommentLike.objects.filter(
-                user=request.user,
-                comment=comment
-            ).exists()
-            
-            # Add like status to replies
-            for reply in comment.replies.all():
-                reply.user_liked = CommentLike.objects.filter(
-                    user=request.user,
-                    comment=reply
-                ).exists()
-        else:
-            comment.user_liked = False
-            # Add like status to replies
-            for reply in comment.replies.all():
-                reply.user_liked = False
-    
-    total_comments = Comment.objects.filter(
-        content_type='job',
-        object_id=job.id,
-        is_approved=True
-    ).count()
-    
     context = {
         'job': job,
         'has_applied': has_applied,
-        'content_type': 'job',
-        'object_id': job.id,
-        'user_liked': user_liked,
-        'total_likes': total_likes,
-        'comments': comments,
-        'total_comments': total_comments,
+        **load_engagement('job', job, request.user),
     }
     
     # Intentionally avoid noisy prints in production paths
@@ -459,69 +370,10 @@ def event_detail(request, event_id):
             alumni=request.user.alumni
         ).exists()
     
-    # Like and comment functionality
-    user_liked = False
-    total_likes = 0
-    comments = []
-    total_comments = 0
-    
-    if request.user.is_authenticated:
-        # Check if user liked this event
-        user_liked = Like.objects.filter(
-            user=request.user,
-            content_type='event',
-            object_id=event.id
-        ).exists()
-    
-    # Get total likes
-    total_likes = Like.objects.filter(
-        content_type='event',
-        object_id=event.id
-    ).count()
-    
-    # Get comments
-    comments = Comment.objects.filter(
-        content_type='event',
-        object_id=event.id,
-        is_approved=True,
-        parent__isnull=True  # Only top-level comments
-    ).select_related('user').prefetch_related('replies__user').order_by('-created_at')
-    
-    # Add like status to comments and replies
-    for comment in comments:
-        if request.user.is_authenticated:
-            comment.user_liked = CommentLike.objects.filter(
-                user=request.user,
-                comment=comment
-            ).exists()
-            
-            # Add like status to replies
-            for reply in comment.replies.all():
-                reply.user_liked = CommentLike.objects.filter(
-                    user=request.user,
-                    comment=reply
-                ).exists()
-        else:
-            comment.user_liked = False
-            # Add like status to replies
-            for reply in comment.replies.all():
-                reply.user_liked = False
-    
-    total_comments = Comment.objects.filter(
-        content_type='event',
-        object_id=event.id,
-        is_approved=True
-    ).count()
-    
     context = {
         'event': event,
         'has_registered': has_registered,
-        'content_type': 'event',
-        'object_id': event.id,
-        'user_liked': user_liked,
-        'total_likes': total_likes,
-        'comments': comments,
-        'total_comments': total_comments,
+        **load_engagement('event', event, request.user),
     }
     
     # Intentionally avoid noisy prints in production paths
@@ -539,6 +391,22 @@ def check_email_availability(request):
     return JsonResponse({'available': False})
 
 
+@login_required
+def skill_autocomplete(request):
+    """AJAX endpoint suggesting skills that start with the typed prefix"""
+    try:
+        limit = min(max(int(request.GET.get('limit', AUTOCOMPLETE_LIMIT)), 1), 50)
+    except (TypeError, ValueError):
+        limit = AUTOCOMPLETE_LIMIT
+    skills = autocomplete_skills(request.GET.get('q', ''), limit=limit)
+    return JsonResponse({
+        'results': [
+            {'id': skill.id, 'name': skill.name, 'alumni_count': skill.alumni_count}
+            for skill in skills
+        ]
+    })
+
+
 def about_cosa(request):
     """AboutCOSA management System page"""
     # Get some statistics
@@ -624,26 +492,8 @@ def toggle_like(request):
         if content_type not in ['news', 'job', 'event']:
             return JsonResponse({'error': 'Invalid content type'}, status=400)
         
-        # Check if like exists
-        like, created = Like.objects.get_or_create(
-            user=request.user,
-            content_type=content_type,
-            object_id=object_id
-        )
-        
-        if not created:
-            # Unlike - delete the like
-            like.delete()
-            liked = False
-        else:
-            # Like created
-            liked = True
-        
-        # Get total likes count
-        total_likes = Like.objects.filter(
-            content_type=content_type,
-            object_id=object_id
-        ).count()
+        # Buffered; the like itself is written by the next flush
+        liked, total_likes = record_toggle(request.user, content_type, object_id)
         
         return JsonResponse({
             'liked': liked,
@@ -682,18 +532,12 @@ def add_comment(request):
             parent_id=parent_id if parent_id else None
         )
         
-        # Get total comments count
-        total_comments = Comment.objects.filter(
-            content_type=content_type,
-            object_id=object_id,
-            is_approved=True
-        ).count()
+        total_comments = read_counter(content_type, object_id, 'comments_count')
         
         # Generate comment HTML using the template
         from django.template.loader import render_to_string
         
-        # Add like status for the comment
-        comment.user_liked = False
+        prime_comment(comment)
         
         comment_html = render_to_string('main_app/comment_item.html', {
             'comment': comment,
@@ -711,6 +555,155 @@ def add_comment(request):
         return JsonResponse({'error': str(e)}, status=500)
 
 
+# What the detail pages show; comments of anything else stay hidden too.
+VISIBLE_CONTENT = {
+    'news': {'is_published': True},
+    'job': {'is_active': True},
+    'event': {},
+}
+
+
+def _get_visible_content(content_type, object_id):
+    model = CONTENT_MODELS.get(content_type)
+    if model is None:
+        raise Http404('No such content')
+    return get_object_or_404(model, pk=object_id, **VISIBLE_CONTENT[content_type])
+
+
+def comment_page(request):
+    """Next page of top-level comments for a news article, job or event"""
+    content_type = request.GET.get('content_type')
+    if content_type not in CONTENT_MODELS:
+        return JsonResponse({'error': 'Invalid content type'}, status=400)
+    try:
+        object_id = int(request.GET.get('object_id'))
+    except (TypeError, ValueError):
+        return JsonResponse({'error': 'Invalid object ID'}, status=400)
+    _get_visible_content(content_type, object_id)
+    
+    page = load_comment_page(content_type, object_id, request.user, request.GET.get('cursor'))
+    comments_html = ''.join(
+        render_to_string('main_app/comment_item.html', {'comment': comment, 'user': request.user}, request=request)
+        for comment in page
+    )
+    
+    return JsonResponse({
+        'comments_html': comments_html,
+        'next_cursor': page.next_cursor,
+    })
+
+
+def comment_replies(request, comment_id):
+    """Expand a collapsed comment thread one page of replies at a time"""
+    comment = get_object_or_404(Comment, id=comment_id, is_approved=True)
+    _get_visible_content(comment.content_type, comment.object_id)
+    replies, next_after = load_replies(comment, request.user, after_path=request.GET.get('after'))
+    replies_html = ''.join(
+        render_to_string('main_app/comment_item.html', {'comment': reply, 'user': request.user}, request=request)
+        for reply in replies
+    )
+    
+    return JsonResponse({
+        'replies_html': replies_html,
+        'next_after': next_after,
+    })
+
+
+LIVE_HEARTBEAT_SECONDS = 20
+LIVE_POLL_SECONDS = 25
+# A held request would tie up a whole sync worker, so WSGI polls answer at
+# once and the client waits this long before asking again.
+LIVE_WSGI_POLL_INTERVAL = 15
+
+
+async def _live_batch(user, events):
+    """Collapse queued badge events into one fresh snapshot for ``user``."""
+    batch = [event for event in events if event['type'] != 'badges']
+    if len(batch) < len(events):
+        batch.append({'type': 'badges', **await sync_to_async(badge_context)(user)})
+    return batch
+
+
+def _drain(subscription, first):
+    events = [first]
+    while True:
+        try:
+            events.append(subscription.get_nowait())
+        except asyncio.QueueEmpty:
+            return events
+
+
+async def _live_stream(user, subscription):
+    try:
+        yield 'retry: 5000\n\n'
+        events = [{'type': 'badges'}]
+        while True:
+            for event in await _live_batch(user, events):
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+            try:
+                events = _drain(subscription, await subscription.get(LIVE_HEARTBEAT_SECONDS))
+            except asyncio.TimeoutError:
+                events = []
+                yield ': keep-alive\n\n'
+    finally:
+        subscription.close()
+
+
+def _signed_in_user(request):
+    user = request.user
+    return user if user.is_authenticated else None
+
+
+def _notification_event(item):
+    return {
+        'type': 'notification',
+        'id': item['id'],
+        'kind': item['type'],
+        'title': item['title'],
+        'message': item['message'],
+        'url': item['url'],
+    }
+
+
+async def live_events(request):
+    """Push badge counts and new notifications to the signed-in user"""
+    user = await sync_to_async(_signed_in_user)(request)
+    if user is None:
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+
+    subscription = get_broker().subscribe(user.pk)
+    if request.GET.get('transport') != 'poll':
+        response = StreamingHttpResponse(_live_stream(user, subscription), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    # Long-poll: the subscription only lives for this request, so whatever
+    # arrived since the client's cursor is read from the feed, and every
+    # answer carries a fresh badge snapshot. Under ASGI a request with
+    # nothing new waits until something is published or the poll times out;
+    # the first request, and every WSGI one, answers at once.
+    initial = request.GET.get('initial')
+    hold = isinstance(request, ASGIRequest)
+    try:
+        notifications, cursor = await sync_to_async(feed_since)(user, None if initial else request.GET.get('since'))
+        if hold and not initial and not notifications:
+            try:
+                await subscription.get(LIVE_POLL_SECONDS)
+                notifications, cursor = await sync_to_async(feed_since)(user, cursor)
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        subscription.close()
+    events = [_notification_event(item) for item in notifications] + [{'type': 'badges'}]
+    return JsonResponse({
+        'events': await _live_batch(user, events),
+        'cursor': cursor,
+        # A backlog longer than one answer is fetched straight away.
+        'retry': 0 if hold or notifications else LIVE_WSGI_POLL_INTERVAL,
+    })
+
+
 @csrf_exempt
 @login_required
 def add_reply(request):
@@ -740,8 +733,7 @@ def add_reply(request):
         # Generate reply HTML using the template
         from django.template.loader import render_to_string
         
-        # Add like status for the reply
-        reply.user_liked = False
+        prime_comment(reply)
         
         reply_html = render_to_string('main_app/comment_item.html', {
             'comment': reply,
@@ -769,24 +761,11 @@ def toggle_comment_like(request):
     try:
         comment_id = int(request.POST.get('comment_id'))
         
-        comment = Comment.objects.get(id=comment_id)
+        if not Comment.objects.filter(id=comment_id).exists():
+            raise Comment.DoesNotExist
         
-        # Check if like exists
-        like, created = CommentLike.objects.get_or_create(
-            user=request.user,
-            comment=comment
-        )
-        
-        if not created:
-            # Unlike - delete the like
-            like.delete()
-            liked = False
-        else:
-            # Like created
-            liked = True
-        
-        # Get total likes count
-        total_likes = CommentLike.objects.filter(comment=comment).count()
+        # Buffered; the like itself is written by the next flush
+        liked, total_likes = record_toggle(request.user, COMMENT, comment_id)
         
         return JsonResponse({
             'liked': liked,
@@ -812,3 +791,73 @@ def suspension_notice(request):
             return redirect('alumni_home')
     
     return render(request, 'main_app/suspension_notice.html')
+
+
+EXPORT_BASE_TEMPLATES = {
+    '1': 'admin_template/base.html',
+    '2': 'coordinator_template/base.html',
+}
+
+
+def _export_job(request, job_id):
+    if request.user.user_type not in EXPORT_BASE_TEMPLATES:
+        raise Http404
+    return get_object_or_404(ExportJob, id=job_id)
+
+
+def _export_job_data(job):
+    data = {
+        'id': job.id,
+        'status': job.status,
+        'processed': job.processed,
+        'total': job.total,
+        'percent': job.percent,
+        'error': job.error,
+    }
+    if job.status == 'completed':
+        data['download_url'] = reverse('export_job_download', args=[job.id])
+    return data
+
+
+@login_required
+def export_job_detail(request, job_id):
+    """Progress page for a queued export"""
+    job = _export_job(request, job_id)
+    context = {
+        'job': job,
+        'job_data': _export_job_data(job),
+        'base_template': EXPORT_BASE_TEMPLATES[request.user.user_type],
+    }
+    return render(request, 'main_app/export_job.html', context)
+
+
+@login_required
+def export_job_status(request, job_id):
+    """JSON progress of an export job, polled by the progress page"""
+    return JsonResponse(_export_job_data(_export_job(request, job_id)))
+
+
+@login_required
+def export_job_download(request, job_id):
+    """Download a finished export"""
+    job = _export_job(request, job_id)
+    if job.status != 'completed' or not job.file or job.expires_at <= timezone.now():
+        raise Http404
+    return FileResponse(job.file.open('rb'), as_attachment=True, filename=job.filename, content_type=XLSX_CONTENT_TYPE)
+
+
+@login_required
+def export_data(request, dataset, fmt):
+    """Stream alumni, registrations, applications or donations as CSV or JSON Lines"""
+    if request.user.user_type not in EXPORT_BASE_TEMPLATES:
+        return redirect('login_page')
+    if dataset not in DATASETS or fmt not in FORMATS:
+        raise Http404
+    
+    params = {
+        'search': request.GET.get('search', ''),
+        'graduation_year': request.GET.get('graduation_year', ''),
+        'degree': request.GET.get('degree', ''),
+    }
+    timestamp = timezone.now().strftime('%Y%m%d_%H%M%S')
+    return streaming_export_response(dataset, fmt, params, filename=f'COSA_{dataset}_{timestamp}.{fmt}')
@@ -302,9 +302,45 @@ JOBS_PER_PAGE = 20
 EVENTS_PER_PAGE = 12
 NEWS_PER_PAGE = 10
 
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'cosa-alumni-cache',
+# Cached counts (header badges, directory facets, dashboard stats) are
+# dropped by signal handlers. Only a shared cache lets a drop in one worker
+# reach the others, so set CACHE_URL (e.g. redis://localhost:6379/1) when
+# running more than one process. The local fallback is per process.
+CACHE_URL = os.getenv('CACHE_URL', '').strip()
+if CACHE_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+        }
     }
-}
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'cosa-alumni-cache',
+        }
+    }
+
+# Live badge/notification events (main_app.live). Pages open a stream only
+# when a transport is set: "sse" needs the ASGI app. "poll" holds each request
+# open under ASGI; under WSGI it answers at once and the page polls every few
+# seconds, so no sync worker is held. The local broker only fans out within
+# one process; use the Redis broker with several workers.
+LIVE_EVENTS_TRANSPORT = os.getenv('LIVE_EVENTS_TRANSPORT', '').strip().lower()
+LIVE_EVENTS_BROKER = os.getenv('LIVE_EVENTS_BROKER', 'main_app.live.LocalBroker')
+LIVE_EVENTS_REDIS_URL = os.getenv('LIVE_EVENTS_REDIS_URL', 'redis://localhost:6379/0')
+
+# Spreadsheet exports run as background jobs (main_app.exports). The thread
+# runner builds them inside the web process; with the database runner a
+# separate `manage.py run_export_jobs` worker picks them up.
+EXPORT_JOBS_RUNNER = os.getenv('EXPORT_JOBS_RUNNER', 'main_app.exports.ThreadRunner')
+
+# Coordinator notification broadcasts fan out in the background
+# (main_app.fanout), on a thread in the web process or, with the database
+# runner, in a separate `manage.py run_notification_fanout` worker.
+NOTIFICATION_FANOUT_RUNNER = os.getenv('NOTIFICATION_FANOUT_RUNNER', 'main_app.fanout.ThreadRunner')
+
+# Read notifications older than this are moved to the archive by
+# `manage.py archive_notifications` (main_app.retention).
+NOTIFICATION_RETENTION_DAYS = int(os.getenv('NOTIFICATION_RETENTION_DAYS', '90'))